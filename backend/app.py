@@ -11,16 +11,22 @@ import string
 from datetime import datetime, timedelta
 import json
 
-# Configuration
+from config import config
+from utils.sqlite_profile import init_sqlite_profile, read_session
+
+if __name__ == '__main__':
+    os.environ.setdefault('FLASK_ENV', 'development')
+
+# Configuration (config.py) selon FLASK_ENV ; sans FLASK_ENV (gunicorn app:app) : production
 app = Flask(__name__)
-app.config['SECRET_KEY'] = 'your-secret-key-change-in-production'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///voting_system.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['UPLOAD_FOLDER'] = 'faces_data'
-app.config['MODELS_FOLDER'] = 'models'
+app.config.from_object(config[os.environ.get('FLASK_ENV', 'production')])
+if not app.config.get('SECRET_KEY'):
+    raise RuntimeError("SECRET_KEY doit être définie (variable d'environnement) hors développement")
 
 # Initialize extensions
 db = SQLAlchemy(app)
+# SQLite : WAL, pragmas par connexion et pool de lecture pour résultats/statistiques
+init_sqlite_profile(app, db)
 CORS(app, supports_credentials=True)
 
 # Create folders if they don't exist
@@ -28,16 +34,22 @@ os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 os.makedirs(app.config['MODELS_FOLDER'], exist_ok=True)
 
 # Import models and routes
-from models import Electeur, Vote, Candidat, OTP
+from models import Electeur, Candidat, OTP
 from routes.auth import auth_bp
 from routes.voting import voting_bp
 from routes.face_recognition import face_bp
+from utils import metrics, tally
+from utils.face_engine import init_face_engine
+from utils.results_cache import get_results_cache
 
 # Register blueprints
 app.register_blueprint(auth_bp, url_prefix='/api/auth')
 app.register_blueprint(voting_bp, url_prefix='/api/vote')
 app.register_blueprint(face_bp, url_prefix='/api/face')
 
+# Moteur de reconnaissance faciale partagé par toutes les routes
+init_face_engine(app)
+
 
 def create_tables():
     """Create database tables and sample data"""
@@ -53,12 +65,21 @@ def create_tables():
         for candidat in candidats:
             db.session.add(candidat)
         db.session.commit()
+    
+    # Décompte matérialisé des votes (initialisé depuis les votes existants)
+    tally.ensure_tally()
+    db.session.commit()
 
 @app.route('/api/health')
 def health_check():
     """Health check endpoint"""
     return jsonify({'status': 'ok', 'message': 'Server is running'})
 
+@app.route('/api/metrics')
+def get_metrics():
+    """Métriques internes des sous-systèmes (caches, files, détecteurs)"""
+    return jsonify(metrics.snapshot())
+
 @app.route('/api/candidates')
 def get_candidates():
     """Get all candidates"""
@@ -70,26 +91,25 @@ def get_candidates():
         'description': c.description
     } for c in candidats])
 
-@app.route('/api/results')
-def get_results():
-    """Get voting results"""
-    results = db.session.query(
-        Candidat.nom,
-        Candidat.parti,
-        db.func.count(Vote.id).label('votes')
-    ).outerjoin(Vote, Candidat.id == Vote.id_candidat).group_by(Candidat.id).all()
-    
-    total_votes = Vote.query.count()
+def compute_public_results():
+    """Résultats publics (dict sérialisable, mis en cache par /api/results)"""
+    with read_session() as reader:
+        results, total_votes, _ = tally.read_results(reader)
     
-    return jsonify({
+    return {
         'results': [{
-            'candidat': r.nom,
-            'parti': r.parti,
-            'votes': r.votes,
-            'pourcentage': round((r.votes / total_votes * 100) if total_votes > 0 else 0, 2)
-        } for r in results],
+            'candidat': nom,
+            'parti': parti,
+            'votes': votes,
+            'pourcentage': round((votes / total_votes * 100) if total_votes > 0 else 0, 2)
+        } for _, nom, parti, votes in results],
         'total_votes': total_votes
-    })
+    }
+
+@app.route('/api/results')
+def get_results():
+    """Get voting results (ETag / 304 via the results cache)"""
+    return get_results_cache().response('public_results', compute_public_results)
 
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
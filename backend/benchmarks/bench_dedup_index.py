@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark : rappel et latence de l'index LSH de doublons à 10k, 100k et 1M enrôlements
+
+Les électeurs sont des histogrammes synthétiques (Dirichlet par cellule) ; un
+doublon est le même histogramme perturbé par un bruit multiplicatif puis
+renormalisé. Le rappel mesure la part des doublons dont l'original figure dans
+les candidats LSH ; la vérification chi-carré exacte sur les candidats n'est
+pas incluse (elle ne dépend que du nombre de candidats).
+
+La dimension par défaut (grille 2x2, 1024 valeurs) garde le jeu à 1M électeurs
+en mémoire ; --dim 16384 reproduit la grille 8x8 de production.
+
+Usage:
+    python benchmarks/bench_dedup_index.py [--sizes 10000 100000 1000000] [--tables 16] [--bits 16] [--noise 0.3]
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from utils.dedup_index import DEFAULT_LSH_PARAMS, DuplicateIndex
+from utils.lbph import chi_square_distances
+
+BINS = 256
+
+
+def synthetic_histograms(rng, n, dim):
+    """Histogrammes LBPH synthétiques : chaque cellule de 256 cases somme à 1"""
+    cells = rng.gamma(0.3, size=(n, dim // BINS, BINS)).astype(np.float32)
+    cells /= cells.sum(axis=2, keepdims=True)
+    return cells.reshape(n, dim)
+
+
+def perturb(rng, histograms, noise):
+    """Même visage, autre capture : bruit multiplicatif log-normal puis renormalisation"""
+    cells = histograms.reshape(len(histograms), -1, BINS) * rng.lognormal(0, noise, (len(histograms), histograms.shape[1] // BINS, BINS))
+    cells /= cells.sum(axis=2, keepdims=True)
+    return cells.reshape(histograms.shape).astype(np.float32)
+
+
+def run(size, dim, queries, noise, batch, params, root):
+    rng = np.random.default_rng(size)
+    index = DuplicateIndex(os.path.join(root, str(size)), dim, params=params)
+
+    sample_ids = np.sort(rng.choice(size, min(queries, size), replace=False))
+    originals = np.empty((len(sample_ids), dim), dtype=np.float32)
+
+    start = time.perf_counter()
+    for first in range(0, size, batch):
+        histograms = synthetic_histograms(rng, min(batch, size - first), dim)
+        ids = np.arange(first, first + len(histograms))
+        index.add_many(ids, np.sqrt(histograms))
+
+        in_batch = (sample_ids >= first) & (sample_ids < first + len(histograms))
+        originals[in_batch] = histograms[sample_ids[in_batch] - first]
+    build_time = time.perf_counter() - start
+
+    probes = perturb(rng, originals, noise)
+    hits, candidate_counts, timings = 0, [], []
+    for electeur_id, probe in zip(sample_ids.tolist(), probes):
+        t0 = time.perf_counter()
+        candidates = index.candidates(probe.reshape(1, -1), limit=size)
+        timings.append(time.perf_counter() - t0)
+        candidate_counts.append(len(candidates))
+        hits += electeur_id in candidates[:32]
+
+    # Distance chi-carré typique d'un doublon et de deux électeurs distincts (référence du seuil)
+    same = chi_square_distances(originals[:50], probes[0])[0]
+    other = np.median(chi_square_distances(originals[1:50], probes[0]))
+
+    ms = sorted(t * 1000 for t in timings)
+    print(f"{size:>9} enrôlements | construction {build_time:7.1f}s | rappel@32 {hits / len(sample_ids):6.1%} | "
+          f"candidats moy. {statistics.mean(candidate_counts):8.1f} | requête p50 {ms[len(ms) // 2]:6.2f} ms "
+          f"p99 {ms[int(len(ms) * 0.99)]:6.2f} ms | chi² doublon {same:.1f} / autre {other:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rappel et latence de l'index de doublons")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--dim', type=int, default=4 * BINS)
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--noise', type=float, default=0.3)
+    parser.add_argument('--batch', type=int, default=20000)
+    parser.add_argument('--tables', type=int, default=DEFAULT_LSH_PARAMS['tables'])
+    parser.add_argument('--bits', type=int, default=DEFAULT_LSH_PARAMS['bits'])
+    args = parser.parse_args()
+
+    params = dict(DEFAULT_LSH_PARAMS, tables=args.tables, bits=args.bits)
+    print(f"LSH : {args.tables} tables x {args.bits} bits, dim {args.dim}, bruit {args.noise}")
+
+    root = tempfile.mkdtemp(prefix='bench_dedup_')
+    try:
+        for size in args.sizes:
+            run(size, args.dim, args.queries, args.noise, args.batch, params, root)
+            shutil.rmtree(os.path.join(root, str(size)), ignore_errors=True)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark : taux de détection et latence du mode de détection rapide
+
+Sur un corpus d'images (captures webcam enregistrées), compare la détection
+pleine résolution (référence) à la détection sur image réduite pour plusieurs
+largeurs et tailles minimales de visage. Pour chaque réglage :
+- taux d'images avec exactement un visage (condition d'acceptation de /capture)
+- accord avec la référence (IoU >= 0.5 du rectangle retenu)
+- latence moyenne et p95 de detect_face (conversion + détection)
+
+Usage:
+    python benchmarks/bench_detection.py --corpus chemin/vers/images [--widths 0 640 480 320 240] [--min-sizes 30 60 90]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import cv2
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from utils.face_detector import get_face_detector
+
+CASCADE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'models', 'haarcascade_frontalface_default.xml')
+EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+def load_corpus(folder):
+    images = []
+    for root, _, files in os.walk(folder):
+        for filename in sorted(files):
+            if filename.lower().endswith(EXTENSIONS):
+                img = cv2.imread(os.path.join(root, filename), cv2.IMREAD_COLOR)
+                if img is not None:
+                    images.append(img)
+    return images
+
+
+def iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    ix = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    iy = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = ix * iy
+    union = aw * ah + bw * bh - inter
+    return inter / union if union else 0.0
+
+
+def run(detector, images, detect_width, min_size):
+    boxes, timings = [], []
+    for img in images:
+        start = time.perf_counter()
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        faces = detector.detect_scaled(gray, detect_width=detect_width, min_size=(min_size, min_size),
+                                       scaleFactor=1.1, minNeighbors=4)
+        timings.append(time.perf_counter() - start)
+        boxes.append(tuple(faces[0]) if faces is not None and len(faces) == 1 else None)
+    return boxes, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Détection pleine résolution contre image réduite")
+    parser.add_argument('--corpus', required=True, help="Dossier d'images (parcouru récursivement)")
+    parser.add_argument('--widths', type=int, nargs='+', default=[0, 640, 480, 320, 240], help="0 : pleine résolution")
+    parser.add_argument('--min-sizes', type=int, nargs='+', default=[30, 60, 90])
+    args = parser.parse_args()
+
+    images = load_corpus(args.corpus)
+    if not images:
+        sys.exit(f"Aucune image trouvée dans {args.corpus}")
+    resolutions = sorted({img.shape[1] for img in images})
+    print(f"{len(images)} images (largeurs : {resolutions[0]}-{resolutions[-1]} px)")
+
+    detector = get_face_detector(CASCADE_PATH)
+    if detector.get_classifier() is None:
+        sys.exit(f"Haar Cascade introuvable : {CASCADE_PATH}")
+
+    reference, _ = run(detector, images, None, 30)
+    print(f"Référence (pleine résolution, minSize 30) : {sum(b is not None for b in reference)} images à un visage\n")
+    print(f"{'largeur':>8} {'minSize':>8} {'1 visage':>9} {'accord':>8} {'moy. ms':>9} {'p95 ms':>8}")
+
+    for detect_width in args.widths:
+        for min_size in args.min_sizes:
+            boxes, timings = run(detector, images, detect_width or None, min_size)
+            found = sum(b is not None for b in boxes)
+            comparable = [(b, r) for b, r in zip(boxes, reference) if r is not None]
+            agree = sum(b is not None and iou(b, r) >= 0.5 for b, r in comparable)
+            ms = sorted(t * 1000 for t in timings)
+            print(f"{detect_width or 'pleine':>8} {min_size:>8} {found / len(images):>9.1%} "
+                  f"{agree / len(comparable) if comparable else 0:>8.1%} "
+                  f"{statistics.mean(ms):>9.2f} {ms[int(len(ms) * 0.95)]:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark : ingestion d'une capture de 20 images, JSON base64 contre multipart binaire
+
+Chaque mode est mesuré dans un processus séparé (pic RSS indépendant) : la
+requête est construite avec le client de test Flask puis les images sont
+extraites et décodées par utils/image_input comme dans /api/face/capture.
+
+Usage:
+    python benchmarks/bench_image_upload.py [--images 20] [--width 1280] [--height 720] [--runs 10]
+"""
+
+import argparse
+import base64
+import io
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+MODES = ('json', 'multipart')
+
+
+def make_jpegs(count, width, height):
+    rng = np.random.default_rng(0)
+    base = cv2.GaussianBlur(rng.integers(0, 256, (height, width, 3), dtype=np.uint8), (0, 0), 3)
+    return [cv2.imencode('.jpg', np.roll(base, i * 7, axis=1))[1].tobytes() for i in range(count)]
+
+
+def run_mode(mode, count, width, height, runs):
+    """Exécuté dans le processus fils : mesure la latence et le pic RSS d'un mode"""
+    from flask import Flask, request
+
+    from utils.image_input import decode_image, request_images
+
+    app = Flask(__name__)
+    jpegs = make_jpegs(count, width, height)
+    payload_bytes = 0
+    timings = []
+
+    @app.route('/capture', methods=['POST'])
+    def capture():
+        start = time.perf_counter()
+        images, data = request_images(request)
+        decoded = [decode_image(image) for image in images]
+        timings.append(time.perf_counter() - start)
+        assert all(img is not None for img in decoded) and str(data['electeur_id']) == '1'
+        return {'decoded': len(decoded)}
+
+    client = app.test_client()
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    for _ in range(runs):
+        if mode == 'json':
+            body = json.dumps({'electeur_id': 1, 'images': [base64.b64encode(j).decode() for j in jpegs]})
+            payload_bytes = len(body)
+            response = client.post('/capture', data=body, content_type='application/json')
+        else:
+            payload_bytes = sum(len(j) for j in jpegs)
+            files = [(io.BytesIO(j), f'capture_{i}.jpg') for i, j in enumerate(jpegs)]
+            response = client.post('/capture', data={'electeur_id': '1', 'images': files}, content_type='multipart/form-data')
+        assert response.status_code == 200, response.data
+
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({
+        'payload_bytes': payload_bytes,
+        'timings': timings,
+        'rss_peak_delta_kb': rss_after - rss_before
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingestion d'images JSON base64 contre multipart")
+    parser.add_argument('--images', type=int, default=20)
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=720)
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--mode', choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args.images, args.width, args.height, args.runs)
+        return
+
+    print(f"Capture de {args.images} images {args.width}x{args.height}, {args.runs} requêtes par mode")
+    for mode in MODES:
+        output = subprocess.run(
+            [sys.executable, __file__, '--mode', mode, '--images', str(args.images),
+             '--width', str(args.width), '--height', str(args.height), '--runs', str(args.runs)],
+            capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        ms = sorted(t * 1000 for t in result['timings'])
+        print(f"  {mode:<10} charge {result['payload_bytes'] / 1e6:6.2f} Mo | extraction + décodage "
+              f"moy. {statistics.mean(ms):7.1f} ms, p50 {ms[len(ms) // 2]:7.1f} ms | "
+              f"pic RSS +{result['rss_peak_delta_kb'] / 1024:6.1f} Mo")
+
+
+if __name__ == '__main__':
+    main()
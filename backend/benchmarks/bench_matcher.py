@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark : identification 1:N vectorisée contre boucle predict() par modèle
+
+1. Vérifie sur un petit échantillon que LBPHMatcher.identify retourne le même
+   électeur et la même distance que la boucle LBPHFaceRecognizer.predict.
+2. Mesure la latence d'identification sur un stockage de N électeurs synthétiques.
+
+Usage:
+    python benchmarks/bench_matcher.py [--check-voters 30] [--voters 10000] [--images 10]
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from utils import lbph
+from utils.matcher import LBPHMatcher
+from utils.model_store import ModelStore
+
+
+def check_equivalence(root, voters, images, probes=20):
+    """Comparer identify() à la boucle predict() historique sur des visages synthétiques"""
+    rng = np.random.default_rng(1)
+    store = ModelStore(os.path.join(root, 'check'))
+    recognizers = {}
+
+    for electeur_id in range(1, voters + 1):
+        faces = [rng.integers(0, 256, (200, 200), dtype=np.uint8) for _ in range(images)]
+        recognizer = lbph.create_recognizer()
+        recognizer.train(faces, np.full(images, electeur_id, dtype=np.int32))
+        recognizers[electeur_id] = recognizer
+        store.put(electeur_id, np.vstack([h.reshape(1, -1) for h in recognizer.getHistograms()]))
+
+    matcher = LBPHMatcher(store)
+    mismatches = 0
+    for _ in range(probes):
+        probe = rng.integers(0, 256, (200, 200), dtype=np.uint8)
+
+        best_id, best_confidence = None, float('inf')
+        for electeur_id, recognizer in recognizers.items():
+            _, confidence = recognizer.predict(probe)
+            if confidence < best_confidence:
+                best_id, best_confidence = electeur_id, confidence
+
+        matched_id, distance = matcher.identify(lbph.compute_histogram(probe))[0]
+        if matched_id != best_id or not np.isclose(distance, best_confidence, rtol=1e-6):
+            mismatches += 1
+            print(f"  écart : predict() -> ({best_id}, {best_confidence}), identify() -> ({matched_id}, {distance})")
+
+    print(f"Équivalence : {probes - mismatches}/{probes} sondes identiques sur {voters} électeurs")
+    return mismatches == 0
+
+
+def bench_identify(root, voters, images, probes=20, top_k=5):
+    """Latence d'identification sur des histogrammes aléatoires normalisés"""
+    rng = np.random.default_rng(2)
+    store = ModelStore(os.path.join(root, 'bench'))
+    dim = store.dim
+
+    start = time.perf_counter()
+    for electeur_id in range(1, voters + 1):
+        histograms = rng.random((images, dim), dtype=np.float32)
+        histograms /= histograms.sum(axis=1, keepdims=True) / 64
+        store.put(electeur_id, histograms)
+    print(f"\n{voters} électeurs x {images} histogrammes écrits en {time.perf_counter() - start:.1f}s "
+          f"({store.stats()['data_bytes'] / 1e9:.2f} Go)")
+
+    matcher = LBPHMatcher(store)
+    start = time.perf_counter()
+    matcher.identify(rng.random(dim))  # Construction de la disposition des lignes
+    print(f"Première identification (construction + lecture froide) : {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    timings = []
+    for _ in range(probes):
+        probe = rng.random(dim, dtype=np.float32)
+        t0 = time.perf_counter()
+        matcher.identify(probe, top_k=top_k)
+        timings.append(time.perf_counter() - t0)
+
+    ms = sorted(t * 1000 for t in timings)
+    print(f"identify(top_k={top_k}) : moyenne {statistics.mean(ms):.1f} ms, p50 {ms[len(ms) // 2]:.1f} ms, "
+          f"max {ms[-1]:.1f} ms ({voters * images / statistics.mean(timings) / 1e6:.2f} M lignes/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Identification 1:N vectorisée")
+    parser.add_argument('--check-voters', type=int, default=30)
+    parser.add_argument('--voters', type=int, default=10000)
+    parser.add_argument('--images', type=int, default=10)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix='bench_matcher_')
+    try:
+        ok = check_equivalence(root, args.check_voters, args.images)
+        bench_identify(root, args.voters, args.images)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark : reconstruction de tous les modèles, électeur par électeur contre pool de processus
+
+Génère `--voters` dossiers faces_data/user_<id> de `--images` visages 200x200
+synthétiques (textures lissées), puis reconstruit les modèles :
+- serial : FaceEngine.train(id) pour chaque électeur (chemin d'origine, un seul cœur)
+- pool   : utils/model_rebuild.py avec chacun des `--workers` (0 : un par cœur)
+
+Mesures : images/s, durée totale et projection de la fenêtre de
+ré-entraînement pour `--target` électeurs.
+
+Usage:
+    python benchmarks/bench_model_rebuild.py [--voters 200] [--images 10] [--workers 1 0] [--target 100000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+from flask import Flask
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from utils.face_engine import init_face_engine
+from utils.model_rebuild import rebuild_models
+
+
+def write_faces(root, voters, images, rng):
+    for electeur_id in range(1, voters + 1):
+        folder = os.path.join(root, f'user_{electeur_id}')
+        os.makedirs(folder, exist_ok=True)
+        for number in range(images):
+            face = cv2.GaussianBlur(rng.integers(0, 256, (200, 200), dtype=np.uint8), (5, 5), 0)
+            cv2.imwrite(os.path.join(folder, f'user.{electeur_id}.{number}.jpg'), face)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconstruction des modèles : électeur par électeur contre pool de processus")
+    parser.add_argument('--voters', type=int, default=200)
+    parser.add_argument('--images', type=int, default=10)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 0], help="Processus par essai (0 : un par cœur)")
+    parser.add_argument('--target', type=int, default=100000, help="Électeurs pour la projection")
+    args = parser.parse_args()
+
+    tmpdir = tempfile.TemporaryDirectory()
+    app = Flask('bench_model_rebuild')
+    app.config['UPLOAD_FOLDER'] = os.path.join(tmpdir.name, 'faces_data')
+    app.config['FACE_MODEL_STORE_PATH'] = os.path.join(tmpdir.name, 'store')
+
+    start = time.perf_counter()
+    write_faces(app.config['UPLOAD_FOLDER'], args.voters, args.images, np.random.default_rng(3))
+    print(f"{args.voters} électeurs x {args.images} images générés en {time.perf_counter() - start:.1f}s, "
+          f"{os.cpu_count()} cœurs\n")
+
+    engine = init_face_engine(app)
+    total_images = args.voters * args.images
+
+    start = time.perf_counter()
+    for electeur_id in range(1, args.voters + 1):
+        engine.train(electeur_id)
+    elapsed = time.perf_counter() - start
+    print(f"serial   : {total_images / elapsed:8.1f} images/s  ({elapsed:.2f}s), "
+          f"{args.target} électeurs en {elapsed / args.voters * args.target / 3600:.1f} h")
+
+    for workers in args.workers:
+        report = rebuild_models(engine, workers=workers or None, restart=True,
+                                checkpoint_path=os.path.join(tmpdir.name, 'rebuild.checkpoint'))
+        label = f"pool x{workers or os.cpu_count()}"
+        print(f"{label:9s}: {report['images_par_s']:8.1f} images/s  ({report['duree']:.2f}s), "
+              f"{args.target} électeurs en {report['duree'] / args.voters * args.target / 3600:.1f} h  "
+              f"({report['rebuilt']} reconstruits, {report['failed']} échecs)")
+
+
+if __name__ == '__main__':
+    main()
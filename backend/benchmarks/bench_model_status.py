@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark : /api/face/model-status, parcours de faces_data et models contre compteurs persistés
+
+Crée `--voters` dossiers faces_data/user_<id> de `--images` fichiers .jpg
+(vides : seul le nombre d'entrées compte) et autant de dossiers models/user_<id>,
+puis mesure :
+- scan     : l'ancien FaceEngine.status (listdir de chaque dossier d'électeur
+             et recherche des trainer.yml)
+- counters : utils/enrollment_counters.read_counters (une requête sur compteurs)
+
+La réconciliation (parcours complet unique) est chronométrée à part.
+
+Usage:
+    python benchmarks/bench_model_status.py [--voters 100000] [--images 10] [--calls 20]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from flask import Flask
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ.setdefault('FLASK_ENV', 'development')
+
+from app import db
+from utils import enrollment_counters
+
+
+def legacy_status(faces_data_path, models_folder):
+    """Comptage de l'ancien FaceEngine.status"""
+    training_images = 0
+    for user_folder in os.listdir(faces_data_path):
+        user_path = os.path.join(faces_data_path, user_folder)
+        if os.path.isdir(user_path):
+            training_images += sum(1 for f in os.listdir(user_path) if f.endswith('.jpg'))
+    trained_models = 0
+    for user_folder in os.listdir(models_folder):
+        if os.path.isfile(os.path.join(models_folder, user_folder, 'trainer.yml')):
+            trained_models += 1
+    return training_images, trained_models
+
+
+def timed(fn, calls):
+    durations = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="model-status : parcours du disque contre compteurs persistés")
+    parser.add_argument('--voters', type=int, default=100000)
+    parser.add_argument('--images', type=int, default=10)
+    parser.add_argument('--calls', type=int, default=20)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.TemporaryDirectory()
+    faces_data = os.path.join(tmpdir.name, 'faces_data')
+    models_folder = os.path.join(tmpdir.name, 'models')
+    start = time.perf_counter()
+    for electeur_id in range(args.voters):
+        folder = os.path.join(faces_data, f'user_{electeur_id}')
+        os.makedirs(folder)
+        for number in range(args.images):
+            open(os.path.join(folder, f'user.{electeur_id}.{number}.jpg'), 'wb').close()
+        os.makedirs(os.path.join(models_folder, f'user_{electeur_id}'))
+    print(f"{args.voters} électeurs x {args.images} images créés en {time.perf_counter() - start:.1f}s\n")
+
+    app = Flask('bench_model_status')
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(tmpdir.name, 'bench.db')}"
+    app.config['UPLOAD_FOLDER'] = faces_data
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        start = time.perf_counter()
+        enrollment_counters.reconcile(fix=True)
+        reconcile_ms = (time.perf_counter() - start) * 1000
+
+        scan_ms = timed(lambda: legacy_status(faces_data, models_folder), args.calls)
+        counters_ms = timed(enrollment_counters.read_counters, args.calls)
+        counters = enrollment_counters.read_counters()
+
+    print(f"scan     : {scan_ms:10.3f} ms/appel (médiane de {args.calls})")
+    print(f"counters : {counters_ms:10.3f} ms/appel  {counters}")
+    print(f"réconciliation (un parcours complet) : {reconcile_ms:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
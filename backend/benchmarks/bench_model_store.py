@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark : latence de chargement d'un modèle, trainer.yml contre stockage binaire
+
+Génère des modèles LBPH synthétiques, les enregistre aux deux formats puis
+mesure le chargement d'un modèle tiré au hasard.
+
+Usage:
+    python benchmarks/bench_model_store.py [--voters 200] [--images 10] [--loads 500]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from utils import lbph
+from utils.model_store import ModelStore
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def report(name, timings):
+    ms = [t * 1000 for t in timings]
+    print(f"  {name:<28} moyenne {statistics.mean(ms):8.3f} ms   p50 {percentile(ms, 50):8.3f} ms   "
+          f"p99 {percentile(ms, 99):8.3f} ms")
+
+
+def build_fixtures(root, voters, images):
+    """Créer les trainer.yml et le stockage binaire pour `voters` électeurs synthétiques"""
+    rng = np.random.default_rng(0)
+    models_folder = os.path.join(root, 'models')
+    store = ModelStore(os.path.join(root, 'store'))
+
+    for electeur_id in range(1, voters + 1):
+        faces = [rng.integers(0, 256, (200, 200), dtype=np.uint8) for _ in range(images)]
+        recognizer = lbph.create_recognizer()
+        recognizer.train(faces, np.full(images, electeur_id, dtype=np.int32))
+
+        user_folder = os.path.join(models_folder, f"user_{electeur_id}")
+        os.makedirs(user_folder, exist_ok=True)
+        recognizer.save(os.path.join(user_folder, 'trainer.yml'))
+
+        store.put(electeur_id, np.vstack([h.reshape(1, -1) for h in recognizer.getHistograms()]))
+
+    return models_folder, store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Comparer le chargement trainer.yml et stockage binaire")
+    parser.add_argument('--voters', type=int, default=200)
+    parser.add_argument('--images', type=int, default=10)
+    parser.add_argument('--loads', type=int, default=500)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix='bench_model_store_')
+    try:
+        start = time.perf_counter()
+        models_folder, store = build_fixtures(root, args.voters, args.images)
+        print(f"{args.voters} électeurs x {args.images} images préparés en {time.perf_counter() - start:.1f}s")
+
+        ids = [random.randint(1, args.voters) for _ in range(args.loads)]
+
+        yaml_timings = []
+        for electeur_id in ids:
+            model_path = os.path.join(models_folder, f"user_{electeur_id}", 'trainer.yml')
+            t0 = time.perf_counter()
+            recognizer = cv2.face.LBPHFaceRecognizer_create()
+            recognizer.read(model_path)
+            yaml_timings.append(time.perf_counter() - t0)
+
+        store_timings = []
+        for electeur_id in ids:
+            t0 = time.perf_counter()
+            histograms = store.get(electeur_id)
+            float(histograms[-1, -1])  # Forcer l'accès à la page mappée
+            store_timings.append(time.perf_counter() - t0)
+
+        yaml_bytes = sum(
+            os.path.getsize(os.path.join(models_folder, d, 'trainer.yml')) for d in os.listdir(models_folder)
+        )
+        stats = store.stats()
+
+        print(f"\nChargement d'un modèle ({args.loads} tirages)")
+        report('trainer.yml (read)', yaml_timings)
+        report('stockage binaire (get)', store_timings)
+        print(f"  accélération (moyenne)       x{statistics.mean(yaml_timings) / statistics.mean(store_timings):.0f}")
+        print(f"\nTaille sur disque : YAML {yaml_bytes / 1e6:.1f} Mo, binaire {stats['data_bytes'] / 1e6:.1f} Mo")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
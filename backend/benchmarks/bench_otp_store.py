@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Benchmark : journée de vote simulée (12 h) pour les OTP, table seule contre utils/otp_store.py
+
+Chaque heure simulée, `--logins-per-hour` connexions émettent un code, une
+partie se trompe une fois avant le bon code, une partie abandonne (le code
+expire). Deux configurations, chacune sur une base neuve :
+- legacy : INSERT à l'émission, recherche (téléphone, code, non utilisé) et
+           marquage ORM à la vérification, aucune suppression (code d'origine)
+- store  : OtpStore (emplacements en mémoire, consommation conditionnelle,
+           purge par lots toutes les 5 minutes simulées)
+
+Mesures par heure simulée : latence de vérification p50/p99 et taille de la
+table otps en fin d'heure. La base est en synchronous=OFF dans les deux
+configurations : on mesure le coût des requêtes, pas celui du fsync.
+
+Usage:
+    python benchmarks/bench_otp_store.py [--hours 12] [--logins-per-hour 20000] [--wrong 0.1] [--abandon 0.05]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import sqlalchemy as sa
+from flask import Flask
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ.setdefault('FLASK_ENV', 'development')
+
+from app import db
+from models import OTP
+from utils.otp_store import OTP_OK, OtpStore
+
+LIFETIME = timedelta(minutes=5)
+PURGE_EVERY = timedelta(minutes=5)
+
+
+class SimulatedClock:
+    def __init__(self):
+        self.now = datetime(2026, 1, 1, 7, 0)
+
+    def __call__(self):
+        return self.now
+
+
+def legacy_issue(clock, phone, code):
+    db.session.add(OTP(numero_telephone=phone, code=code, expire_at=clock() + LIFETIME, type_otp='login'))
+    db.session.commit()
+
+
+def legacy_verify(clock, phone, code):
+    otp = OTP.query.filter_by(numero_telephone=phone, code=code, utilise=False).order_by(OTP.id.desc()).first()
+    if not otp or clock() > otp.expire_at:
+        return False
+    otp.utilise = True
+    db.session.commit()
+    return True
+
+
+def simulate(app, mode, args):
+    """Journée simulée ; retourne [(heure, latences de vérification, lignes otps)]"""
+    clock = SimulatedClock()
+    store = OtpStore(max_attempts=5, purge_interval=float('inf'), clock=clock)
+    rng = random.Random(42)
+    step = timedelta(seconds=3600 / args.logins_per_hour)
+    report = []
+    flow = 0
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        next_purge = clock() + PURGE_EVERY
+        pending = []  # (téléphone, code, mauvais code d'abord) vérifiés 30 s après l'émission
+
+        for hour in range(args.hours):
+            latencies = []
+            for _ in range(args.logins_per_hour):
+                clock.now += step
+                flow += 1
+                phone, code = f'+2376{flow:08d}', f'{rng.randrange(10 ** 6):06d}'
+                if mode == 'legacy':
+                    legacy_issue(clock, phone, code)
+                else:
+                    store.issue(phone, 'login', code, LIFETIME)
+                    db.session.commit()
+                if rng.random() >= args.abandon:
+                    pending.append((clock() + timedelta(seconds=30), phone, code, rng.random() < args.wrong))
+
+                while pending and pending[0][0] <= clock():
+                    _, phone, code, wrong_first = pending.pop(0)
+                    attempts = [f'{(int(code) + 1) % 10 ** 6:06d}', code] if wrong_first else [code]
+                    for attempt in attempts:
+                        start = time.perf_counter()
+                        if mode == 'legacy':
+                            ok = legacy_verify(clock, phone, attempt)
+                        else:
+                            ok = store.verify(phone, attempt)[0] == OTP_OK
+                            db.session.commit()
+                        latencies.append(time.perf_counter() - start)
+                    assert ok, "le bon code doit être accepté"
+
+                if mode == 'store' and clock() >= next_purge:
+                    store.purge()
+                    next_purge = clock() + PURGE_EVERY
+
+            report.append((hour + 1, latencies, db.session.query(OTP).count()))
+        stats = store.stats() if mode == 'store' else None
+        db.session.remove()
+    return report, stats
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] * 1000 if values else float('nan')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Journée de vote simulée : vérification OTP et taille de la table")
+    parser.add_argument('--hours', type=int, default=12)
+    parser.add_argument('--logins-per-hour', type=int, default=20000)
+    parser.add_argument('--wrong', type=float, default=0.1, help="Part des électeurs se trompant une fois")
+    parser.add_argument('--abandon', type=float, default=0.05, help="Part des codes jamais saisis")
+    args = parser.parse_args()
+
+    tmpdir = tempfile.TemporaryDirectory()
+    print(f"{args.hours} h simulées, {args.logins_per_hour} connexions/h, {args.wrong:.0%} erreurs, {args.abandon:.0%} abandons\n")
+
+    for mode in ('legacy', 'store'):
+        app = Flask(f'bench_otp_{mode}')
+        app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(tmpdir.name, mode + '.db')}"
+        db.init_app(app)
+        with app.app_context():
+            sa.event.listen(db.engine, 'connect', lambda conn, _: conn.execute('PRAGMA synchronous=OFF'))
+        start = time.perf_counter()
+        report, stats = simulate(app, mode, args)
+        print(f"{mode}  ({time.perf_counter() - start:.1f}s)")
+        print(f"  {'heure':>5} {'p50 ms':>8} {'p99 ms':>8} {'lignes otps':>12}")
+        for hour, latencies, rows in report:
+            print(f"  {hour:>5} {statistics.median(latencies) * 1000:>8.3f} {percentile(latencies, 0.99):>8.3f} {rows:>12}")
+        if stats:
+            print(f"  statistiques : {stats}")
+        print()
+
+
+if __name__ == '__main__':
+    main()
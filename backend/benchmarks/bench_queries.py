@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Benchmark : plans d'exécution et latences des requêtes chaudes, sans puis avec index
+
+Crée une base jetable (SQLite par défaut) avec le schéma de models.py, la
+remplit avec des volumes réalistes puis, pour chaque requête des parcours
+d'authentification et de vote, affiche le plan (EXPLAIN) et la latence
+médiane sans les index secondaires puis après leur création.
+
+Usage:
+    python benchmarks/bench_queries.py [--voters 200000] [--runs 200] [--database sqlite:////tmp/bench_queries.db]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import string
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import sqlalchemy as sa
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ.setdefault('FLASK_ENV', 'development')
+
+from app import db
+import models  # noqa: F401  (enregistre les tables dans db.metadata)
+
+# Index ajoutés par migrations/versions/3f1c2a9d7b10_index_auth_and_vote_hot_paths.py
+HOT_PATH_INDEXES = (
+    'ix_otps_telephone_code_utilise',
+    'ix_sessions_auth_electeur_etape2_date',
+    'ix_electeurs_numero_telephone',
+    'ix_electeurs_a_vote',
+    'ix_electeurs_modele_facial_entraine',
+    'ix_votes_id_candidat',
+)
+
+# Requêtes émises par les routes (paramètres tirés au hasard parmi les données existantes)
+QUERIES = {
+    'verify_otp: OTP': (
+        "SELECT * FROM otps WHERE numero_telephone = :tel AND code = :code AND utilise = 0 "
+        "ORDER BY id DESC LIMIT 1"
+    ),
+    'verify_otp: électeur par téléphone': (
+        "SELECT * FROM electeurs WHERE numero_telephone = :tel LIMIT 1"
+    ),
+    'verify_otp: session étape 2': (
+        "SELECT * FROM sessions_auth WHERE id_electeur = :electeur AND etape_2_complete = 0 "
+        "ORDER BY date_creation DESC LIMIT 1"
+    ),
+    '/stats: électeurs ayant voté': (
+        "SELECT count(*) FROM electeurs WHERE a_vote = 1"
+    ),
+    '/stats: électeurs enrôlés': (
+        "SELECT count(*) FROM electeurs WHERE modele_facial_entraine = 1"
+    ),
+    'résultats: votes par candidat': (
+        "SELECT candidats.id, count(votes.id) FROM candidats "
+        "LEFT OUTER JOIN votes ON candidats.id = votes.id_candidat GROUP BY candidats.id"
+    ),
+}
+
+
+def phone(i):
+    return f"+2376{i:08d}"
+
+
+def seed(engine, voters, candidates=8, batch=20000):
+    """Électeurs, votes (60 %), sessions (2 par électeur) et OTP (3 par électeur)"""
+    rng = random.Random(0)
+    now = datetime.utcnow()
+    tables = db.metadata.tables
+
+    def insert(table, rows):
+        with engine.begin() as conn:
+            for i in range(0, len(rows), batch):
+                conn.execute(tables[table].insert(), rows[i:i + batch])
+
+    insert('candidats', [{'id': c + 1, 'nom': f'Candidat {c + 1}', 'parti': 'P', 'date_ajout': now}
+                         for c in range(candidates)])
+    insert('electeurs', [{
+        'id': i + 1,
+        'identifiant_electeur': f'E{i:09d}',
+        'identifiant_aadhar': f'A{i:09d}',
+        'numero_telephone': phone(i),
+        'a_vote': i % 5 < 3,
+        'date_inscription': now,
+        'modele_facial_entraine': i % 10 < 9
+    } for i in range(voters)])
+    insert('votes', [{
+        'id_electeur': i + 1,
+        'id_candidat': rng.randrange(candidates) + 1,
+        'heure_vote': now - timedelta(seconds=rng.randrange(86400))
+    } for i in range(voters) if i % 5 < 3])
+    insert('sessions_auth', [{
+        'id_electeur': i % voters + 1,
+        'etape_1_complete': True,
+        'etape_2_complete': i < voters,
+        'etape_3_complete': False,
+        'session_token': f'tok-{i}',
+        'expire_at': now + timedelta(minutes=30),
+        'date_creation': now - timedelta(seconds=rng.randrange(86400))
+    } for i in range(2 * voters)])
+    insert('otps', [{
+        'numero_telephone': phone(i % voters),
+        'code': ''.join(rng.choices(string.digits, k=6)),
+        'expire_at': now + timedelta(minutes=5),
+        'utilise': i < 2 * voters,
+        'type_otp': 'login'
+    } for i in range(3 * voters)])
+
+
+def sample_params(conn, voters, rng):
+    """Paramètres d'une requête : un OTP non utilisé existant et son électeur"""
+    otp_id = rng.randrange(2 * voters + 1, 3 * voters + 1)
+    tel, code = conn.execute(sa.text("SELECT numero_telephone, code FROM otps WHERE id = :id"), {'id': otp_id}).one()
+    return {'tel': tel, 'code': code, 'electeur': rng.randrange(voters) + 1}
+
+
+def explain(conn, sql, params):
+    prefix = 'EXPLAIN QUERY PLAN ' if conn.dialect.name == 'sqlite' else 'EXPLAIN '
+    rows = conn.execute(sa.text(prefix + sql), params).fetchall()
+    # SQLite : (id, parent, notused, détail) ; autres moteurs : une ligne de texte par nœud
+    return [str(row[-1]) if conn.dialect.name == 'sqlite' else str(row[0]) for row in rows]
+
+
+def analyze(engine):
+    """Mettre à jour les statistiques du planificateur"""
+    with engine.begin() as conn:
+        if conn.dialect.name in ('sqlite', 'postgresql'):
+            conn.execute(sa.text('ANALYZE'))
+
+
+def measure(engine, voters, runs):
+    """Plan et latence médiane de chaque requête"""
+    rng = random.Random(1)
+    results = {}
+    with engine.connect() as conn:
+        params = [sample_params(conn, voters, rng) for _ in range(runs)]
+        for name, sql in QUERIES.items():
+            plan = explain(conn, sql, params[0])
+            # Les agrégats (sans paramètre) sont coûteux sans index : moins d'itérations
+            n = runs if ':' in sql else max(5, runs // 20)
+            timings = []
+            for p in params[:n]:
+                start = time.perf_counter()
+                conn.execute(sa.text(sql), p).fetchall()
+                timings.append(time.perf_counter() - start)
+            results[name] = (plan, statistics.median(timings) * 1000)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN et latences des requêtes chaudes, avant/après index")
+    parser.add_argument('--voters', type=int, default=200000)
+    parser.add_argument('--runs', type=int, default=200)
+    parser.add_argument('--database', help="URL SQLAlchemy d'une base jetable (défaut : fichier SQLite temporaire)")
+    args = parser.parse_args()
+
+    tmpdir = None
+    url = args.database
+    if url is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        url = f"sqlite:///{os.path.join(tmpdir.name, 'bench.db')}"
+    engine = sa.create_engine(url)
+
+    indexes = [index for table in db.metadata.tables.values() for index in table.indexes
+               if index.name in HOT_PATH_INDEXES]
+
+    db.metadata.drop_all(engine)
+    db.metadata.create_all(engine)
+    for index in indexes:
+        index.drop(engine)
+
+    start = time.perf_counter()
+    seed(engine, args.voters)
+    print(f"Base remplie en {time.perf_counter() - start:.1f}s : {args.voters} électeurs, "
+          f"{args.voters * 3 // 5} votes, {2 * args.voters} sessions, {3 * args.voters} OTP\n")
+
+    analyze(engine)
+    before = measure(engine, args.voters, args.runs)
+
+    start = time.perf_counter()
+    for index in indexes:
+        index.create(engine)
+    analyze(engine)
+    print(f"Index créés en {time.perf_counter() - start:.1f}s\n")
+    after = measure(engine, args.voters, args.runs)
+
+    for name in QUERIES:
+        plan_before, ms_before = before[name]
+        plan_after, ms_after = after[name]
+        print(f"{name}")
+        print(f"  sans index : {ms_before:9.3f} ms  | {' ; '.join(plan_before)}")
+        print(f"  avec index : {ms_after:9.3f} ms  | {' ; '.join(plan_after)}")
+        print(f"  gain       : x{ms_before / ms_after if ms_after else float('inf'):.1f}\n")
+
+    if args.database:
+        db.metadata.drop_all(engine)
+    engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
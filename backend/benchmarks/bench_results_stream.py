@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Benchmark : diffusion SSE des résultats à un grand nombre d'abonnés
+
+Inscrit N abonnés auprès d'un ResultsBroadcaster puis fait varier les résultats
+à chaque tick. Une fraction d'abonnés lit son flux trop lentement et doit être
+déconnectée sans ralentir les autres. Deux modèles de serveur :
+- loop    : une boucle coopérative lit tous les flux après chaque événement
+            (coût CPU par client d'un worker gevent/eventlet, un seul thread)
+- threads : un thread système par abonné (worker gthread / serveur de dev) ;
+            le réveil de 10k threads est dominé par les changements de contexte
+
+Mesures : calculs de résultats (doivent suivre les ticks, pas N), durée de
+publication, temps pour servir l'événement à tous les abonnés, latence de
+livraison (calcul -> lecture), déconnexions de consommateurs lents, pic RSS.
+
+Usage:
+    python benchmarks/bench_results_stream.py [--subscribers 10000] [--ticks 10] [--tick 1.0] [--slow 0.01] [--mode loop|threads]
+"""
+
+import argparse
+import os
+import resource
+import statistics
+import sys
+import threading
+import time
+
+from flask import Flask
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from utils.results_stream import ResultsBroadcaster
+
+CANDIDATES = 4
+
+
+def make_compute(counter, published):
+    """Résultats fictifs : un vote supplémentaire pour un candidat à chaque calcul"""
+    votes = [0] * CANDIDATES
+
+    def compute():
+        counter['computes'] += 1
+        # Chaque calcul change les résultats : le calcul n produit l'événement n
+        published[counter['computes']] = time.perf_counter()
+        votes[counter['computes'] % CANDIDATES] += 1
+        total = sum(votes)
+        return {
+            'results': [{'id': i + 1, 'candidat': f'Candidat {i + 1}', 'parti': 'P', 'votes': v,
+                         'pourcentage': round(v / total * 100, 2) if total else 0} for i, v in enumerate(votes)],
+            'total_votes': total,
+            'total_electeurs': 10 * total,
+            'participation': 10.0
+        }
+    return compute
+
+
+def event_ids(chunk):
+    """Numéros des événements contenus dans un bloc SSE"""
+    for event in chunk.split(b'\n\n'):
+        if event.startswith(b'id: '):
+            yield int(event.split(b'\n', 1)[0][4:])
+
+
+def run_loop(broadcaster, args, published, is_slow):
+    """Boucle coopérative : après chaque événement, lire chaque flux une fois"""
+    streams = [broadcaster.stream(broadcaster.subscribe()) for _ in range(args.subscribers)]
+    for stream in streams:
+        next(stream)  # instantané initial
+
+    latencies, sweeps = [], []
+    broadcaster.start()
+    seen = 0
+    while seen < args.ticks:
+        while broadcaster.events == seen:
+            time.sleep(0.001)
+        seen = broadcaster.events
+
+        start = time.perf_counter()
+        for i, stream in enumerate(streams):
+            # Un consommateur lent ne lit qu'un événement sur (fenêtre + 2)
+            if stream is None or (is_slow(i) and seen % (args.buffer + 2)):
+                continue
+            try:
+                chunk = next(stream)
+            except StopIteration:
+                streams[i] = None
+                continue
+            now = time.perf_counter()
+            latencies.extend(now - published[seq] for seq in event_ids(chunk) if seq in published)
+        sweeps.append(time.perf_counter() - start)
+
+    broadcaster.stop()
+    return latencies, sweeps
+
+
+def run_threads(broadcaster, args, published, is_slow):
+    """Un thread système par abonné"""
+    latencies = []
+    latencies_lock = threading.Lock()
+    stop = threading.Event()
+
+    def consume(subscriber, delay):
+        local = []
+        for chunk in broadcaster.stream(subscriber):
+            now = time.perf_counter()
+            local.extend(now - published[seq] for seq in event_ids(chunk) if seq in published)
+            if stop.is_set():
+                break
+            if delay:
+                time.sleep(delay)
+        with latencies_lock:
+            latencies.extend(local)
+
+    threading.stack_size(256 * 1024)
+    slow_delay = (args.buffer + 2) * args.tick  # lit moins vite que la fenêtre ne se renouvelle
+    threads = []
+    for i in range(args.subscribers):
+        thread = threading.Thread(target=consume, args=(broadcaster.subscribe(), slow_delay if is_slow(i) else 0), daemon=True)
+        thread.start()
+        threads.append(thread)
+
+    broadcaster.start()
+    while broadcaster.events < args.ticks:
+        time.sleep(args.tick / 10)
+    time.sleep(args.tick)  # laisser les abonnés lire le dernier événement
+    stop.set()
+    broadcaster.stop()
+    for thread in threads:
+        thread.join(timeout=5)
+    return latencies, []
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Diffusion SSE à N abonnés")
+    parser.add_argument('--subscribers', type=int, default=10000)
+    parser.add_argument('--ticks', type=int, default=10)
+    parser.add_argument('--tick', type=float, default=1.0, help="Secondes entre deux calculs")
+    parser.add_argument('--buffer', type=int, default=8, help="Fenêtre d'événements (retard maximal d'un abonné)")
+    parser.add_argument('--slow', type=float, default=0.01, help="Fraction d'abonnés trop lents")
+    parser.add_argument('--mode', choices=('loop', 'threads'), default='loop')
+    args = parser.parse_args()
+
+    counter = {'computes': 0}
+    published = {}  # seq -> instant du calcul
+    broadcaster = ResultsBroadcaster(Flask(__name__), make_compute(counter, published), tick=args.tick,
+                                     buffer_size=args.buffer, heartbeat=60.0)
+    slow_every = int(1 / args.slow) if args.slow else 0
+    slow_count = len(range(0, args.subscribers, slow_every)) if slow_every else 0
+
+    def is_slow(i):
+        return bool(slow_every) and i % slow_every == 0
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    run = run_loop if args.mode == 'loop' else run_threads
+    latencies, sweeps = run(broadcaster, args, published, is_slow)
+    elapsed = time.perf_counter() - start
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    stats = broadcaster.stats()
+    ms = sorted(latency * 1000 for latency in latencies)
+    print(f"Mode {args.mode} : {args.subscribers} abonnés ({slow_count} lents), {stats['ticks']} ticks en {elapsed:.1f}s")
+    print(f"Calculs de résultats : {counter['computes']} (1 initial + 1 par tick, indépendant du nombre d'abonnés)")
+    print(f"Événements publiés : {stats['events']}, lus par les abonnés : {len(ms)} "
+          f"(attendu ~{stats['events'] * (args.subscribers - slow_count)})")
+    print(f"Consommateurs lents déconnectés : {stats['dropped_slow_consumers']}")
+    print(f"Publication d'un événement : moy. {stats['publish_avg_ms']:.3f} ms")
+    if sweeps:
+        print(f"Service d'un événement à tous les abonnés : moy. {statistics.mean(sweeps) * 1000:.1f} ms, "
+              f"max {max(sweeps) * 1000:.1f} ms")
+    if ms:
+        print(f"Latence de livraison : p50 {ms[len(ms) // 2]:.1f} ms, p99 {ms[int(len(ms) * 0.99)]:.1f} ms, "
+              f"moy. {statistics.mean(ms):.1f} ms")
+    print(f"Pic RSS : +{(rss_after - rss_before) / 1024:.0f} Mo")
+
+
+if __name__ == '__main__':
+    main()
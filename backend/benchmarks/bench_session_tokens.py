@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Benchmark : validation d'un jeton Bearer, recherche en base contre jeton signé HMAC
+
+Sur une base jetable remplie de sessions entièrement authentifiées, mesure le
+nombre de validations par seconde pour :
+- db     : ancien jeton UUID, SELECT sessions_auth par session_token à chaque requête
+- cache  : ancien jeton UUID servi par utils/session_cache.py (entrées chaudes)
+- signed : jeton signé (utils/session_tokens.py), signature + expiration + liste
+           de révocation en mémoire, sans requête (hors rafraîchissement périodique)
+
+Une partie des sessions est révoquée avant la mesure pour que la liste de
+révocation ait une taille réaliste ; les jetons révoqués doivent être rejetés.
+
+Usage:
+    python benchmarks/bench_session_tokens.py [--sessions 20000] [--revoked 2000] [--validations 100000] [--threads 1 4]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import sqlalchemy as sa
+from flask import Flask
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ.setdefault('FLASK_ENV', 'development')
+
+from app import db
+from models import Electeur, SessionAuthentification
+from utils.session_cache import SessionCache, is_fully_authenticated
+from utils.session_tokens import ALL_STEPS, SessionTokenService
+
+
+def seed(app, sessions):
+    """Un électeur et une session complète (jeton UUID) par électeur"""
+    now = datetime.utcnow()
+    with app.app_context():
+        db.create_all()
+        db.session.execute(sa.insert(Electeur), [{
+            'id': i + 1,
+            'identifiant_electeur': f'E{i:09d}',
+            'identifiant_aadhar': f'A{i:09d}',
+            'numero_telephone': f'+2376{i:08d}',
+            'a_vote': False,
+            'date_inscription': now,
+            'modele_facial_entraine': True
+        } for i in range(sessions)])
+        db.session.execute(sa.insert(SessionAuthentification), [{
+            'id_electeur': i + 1,
+            'session_token': str(uuid.uuid4()),
+            'etape_1_complete': True,
+            'etape_2_complete': True,
+            'etape_3_complete': True,
+            'date_creation': now,
+            'expire_at': now + timedelta(minutes=30)
+        } for i in range(sessions)])
+        db.session.commit()
+        return db.session.query(
+            SessionAuthentification.id_electeur, SessionAuthentification.session_token, SessionAuthentification.expire_at
+        ).all()
+
+
+def measure(app, validate, tokens, validations, threads):
+    """Validations/s de `validate` sur des jetons tirés au hasard, réparties sur `threads` threads"""
+    per_thread = validations // threads
+    barrier = threading.Barrier(threads + 1)
+    accepted = [0] * threads
+
+    def worker(index):
+        rng = random.Random(index)
+        sample = [rng.choice(tokens) for _ in range(per_thread)]
+        with app.app_context():
+            barrier.wait()
+            accepted[index] = sum(1 for token in sample if validate(token))
+            db.session.remove()
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return per_thread * threads / elapsed, sum(accepted) / (per_thread * threads)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validations de jetons/s : recherche en base contre jeton signé")
+    parser.add_argument('--sessions', type=int, default=20000)
+    parser.add_argument('--revoked', type=int, default=2000, help="Sessions révoquées avant la mesure")
+    parser.add_argument('--validations', type=int, default=100000)
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 4])
+    args = parser.parse_args()
+
+    tmpdir = tempfile.TemporaryDirectory()
+    app = Flask('bench_session_tokens')
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(tmpdir.name, 'bench.db')}"
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'pool_size': max(args.threads), 'max_overflow': 0}
+    db.init_app(app)
+
+    rows = seed(app, args.sessions)
+    service = SessionTokenService('bench-secret')
+    cache = SessionCache(ttl=3600.0, max_entries=args.sessions)
+    legacy = [token for _, token, _ in rows]
+    signed = [service.issue(electeur_id, ALL_STEPS, expire_at, token.replace('-', ''))
+              for electeur_id, token, expire_at in rows]
+
+    with app.app_context():
+        for electeur_id in range(1, args.revoked + 1):
+            service.revoke_voter(electeur_id)
+        # Cache chaud : chaque session lue une fois
+        for token in legacy:
+            cache.get_session(token)
+
+    def db_lookup(token):
+        auth_session = SessionAuthentification.query.filter_by(session_token=token).first()
+        return auth_session is not None and auth_session.is_fully_authenticated()
+
+    def cache_hit(token):
+        entry = cache.get_session(token)
+        return entry is not None and is_fully_authenticated(entry)
+
+    def signed_check(token):
+        return service.validate(token) is not None
+
+    print(f"{args.sessions} sessions, {args.revoked} révocations, {args.validations} validations par mesure\n")
+    print(f"{'méthode':8} {'threads':>7} {'validations/s':>15} {'acceptées':>10}")
+    results = {}
+    for name, validate, tokens in (('db', db_lookup, legacy), ('cache', cache_hit, legacy), ('signed', signed_check, signed)):
+        for threads in args.threads:
+            # La recherche en base est ~1000x plus lente : échantillon réduit
+            count = args.validations // 20 if name == 'db' else args.validations
+            rate, ratio = measure(app, validate, tokens, count, threads)
+            results[(name, threads)] = rate
+            print(f"{name:8} {threads:>7} {rate:>15,.0f} {ratio:>9.1%}")
+
+    threads = args.threads[0]
+    print(f"\nsigned / db : x{results[('signed', threads)] / results[('db', threads)]:.0f} "
+          f"(attendu : {1 - args.revoked / args.sessions:.1%} acceptées pour signed, révocations comprises)")
+    print(f"statistiques : {service.stats()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Benchmark : latence de /api/auth/login avec envoi du SMS dans la requête ou en file
+
+La passerelle est le fournisseur 'fake' de utils/sms_service.py avec une
+latence par appel (aller-retour HTTP + TLS d'un fournisseur réel) et un taux
+d'échec configurables. Deux configurations, chacune sur une base neuve :
+- inline : SMS_ASYNC = False, la requête attend la passerelle (comportement d'origine)
+- queued : utils/sms_dispatch.py, workers en arrière-plan, lots, reprises
+
+Mesures : latence p50/p99 de /login, puis temps de vidage de la file,
+messages livrés, appels à la passerelle et reprises.
+
+Usage:
+    python benchmarks/bench_sms_dispatch.py [--logins 400] [--threads 8] [--latency 0.25] [--failure-rate 0.05]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import sqlalchemy as sa
+from flask import Flask
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ.setdefault('FLASK_ENV', 'development')
+
+from app import db
+from models import Electeur
+from routes.auth import auth_bp
+from utils import sms_dispatch
+
+
+def make_app(path, mode, args):
+    app = Flask(f'bench_sms_{mode}')
+    app.config['SECRET_KEY'] = 'bench'
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{path}"
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'pool_size': args.threads, 'max_overflow': 0}
+    app.config['SMS_PROVIDER'] = 'fake'
+    app.config['SMS_FAKE_LATENCY'] = args.latency
+    app.config['SMS_FAKE_FAILURE_RATE'] = args.failure_rate
+    app.config['SMS_RETRY_BASE'] = 0.05
+    app.config['SMS_ASYNC'] = mode == 'queued'
+    db.init_app(app)
+    app.register_blueprint(auth_bp, url_prefix='/api/auth')
+
+    now = datetime.utcnow()
+    with app.app_context():
+        db.create_all()
+        db.session.execute(sa.insert(Electeur), [{
+            'id': i + 1,
+            'identifiant_electeur': f'E{i:09d}',
+            'identifiant_aadhar': f'A{i:09d}',
+            'numero_telephone': f'+2376{i:08d}',
+            'a_vote': False,
+            'date_inscription': now,
+            'modele_facial_entraine': True
+        } for i in range(args.logins)])
+        db.session.commit()
+    return app
+
+
+def run(app, args):
+    """`--logins` connexions réparties sur `--threads` clients ; retourne les latences et les statuts"""
+    latencies, statuses = [], []
+    lock = threading.Lock()
+    barrier = threading.Barrier(args.threads)
+
+    def client(offset):
+        local, codes = [], []
+        http = app.test_client()
+        barrier.wait()
+        for i in range(offset, args.logins, args.threads):
+            start = time.perf_counter()
+            response = http.post('/api/auth/login', json={
+                'identifiant_electeur': f'E{i:09d}', 'identifiant_aadhar': f'A{i:09d}'
+            })
+            local.append(time.perf_counter() - start)
+            codes.append(response.status_code)
+        with lock:
+            latencies.extend(local)
+            statuses.extend(codes)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, statuses
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] * 1000 if values else float('nan')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latence de /login : SMS envoyé dans la requête ou en file")
+    parser.add_argument('--logins', type=int, default=400)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.25, help="Secondes par appel à la passerelle")
+    parser.add_argument('--failure-rate', type=float, default=0.05, help="Part des envois en échec temporaire")
+    args = parser.parse_args()
+
+    tmpdir = tempfile.TemporaryDirectory()
+    print(f"{args.logins} connexions, {args.threads} clients, passerelle {args.latency * 1000:.0f} ms/appel, "
+          f"{args.failure_rate:.0%} d'échecs\n")
+
+    for mode in ('inline', 'queued'):
+        app = make_app(os.path.join(tmpdir.name, mode + '.db'), mode, args)
+        sms_dispatch._sms_dispatcher = None
+        start = time.perf_counter()
+        latencies, statuses = run(app, args)
+        elapsed = time.perf_counter() - start
+
+        with app.app_context():
+            dispatcher = sms_dispatch.get_sms_dispatcher()
+        while mode == 'queued' and dispatcher.stats()['pending']:
+            time.sleep(0.01)
+        drained = time.perf_counter() - start
+        dispatcher.stop()
+        stats = dispatcher.stats()
+
+        print(f"{mode}")
+        print(f"  /login    : {len(latencies) / elapsed:8.1f} req/s  p50 {statistics.median(latencies) * 1000:8.2f} ms  "
+              f"p99 {percentile(latencies, 0.99):8.2f} ms  (200 : {statuses.count(200)}/{len(statuses)})")
+        if mode == 'queued':
+            print(f"  livraison : file vidée en {drained:.2f}s, {stats['sent']} livrés, {stats['batches']} appels, "
+                  f"{stats['retried']} reprises, {stats['failed']} abandons, "
+                  f"délai moyen {stats['avg_delivery_time_ms']} ms")
+        else:
+            print(f"  livraison : {len(dispatcher.provider.sent)} livrés dans la requête (échecs non réessayés)")
+        print()
+
+
+if __name__ == '__main__':
+    main()
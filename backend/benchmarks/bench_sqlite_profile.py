@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Benchmark : charge mixte lectures/écritures SQLite, réglages par défaut contre profil de production
+
+Des threads écrivains votent en continu (ballot.cast_vote, un commit par vote)
+pendant que des threads lecteurs calculent les résultats (compute_results
+de routes/voting.py, sans le cache HTTP : chaque lecture va en base).
+Deux configurations, chacune sur une base neuve :
+- default : moteur SQLAlchemy par défaut (journal rollback, un seul pool)
+- profile : utils.sqlite_profile (WAL, synchronous=NORMAL, busy_timeout,
+            cache/mmap, pool de lecture query_only)
+
+Mesures : votes/s et lectures/s, latences p50/p99 de chaque côté, erreurs
+(« database is locked »).
+
+Usage:
+    python benchmarks/bench_sqlite_profile.py [--voters 200000] [--writers 4] [--readers 8] [--duration 10]
+"""
+
+import argparse
+import itertools
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+import sqlalchemy as sa
+from flask import Flask
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ.setdefault('FLASK_ENV', 'development')
+
+from app import db
+from models import Candidat, Electeur, Vote
+from routes.voting import compute_results
+from utils import ballot, tally
+from utils.sqlite_profile import init_sqlite_profile
+
+CANDIDATES = 8
+
+
+def seed(app, voters):
+    """Électeurs dont la moitié a déjà voté (votes répartis sur 24 h), décompte initialisé"""
+    now = datetime.utcnow()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.execute(sa.insert(Candidat), [
+            {'id': c + 1, 'nom': f'Candidat {c + 1}', 'parti': 'P', 'date_ajout': now} for c in range(CANDIDATES)
+        ])
+        db.session.execute(sa.insert(Electeur), [{
+            'id': i + 1,
+            'identifiant_electeur': f'E{i:09d}',
+            'identifiant_aadhar': f'A{i:09d}',
+            'numero_telephone': f'+2376{i:08d}',
+            'a_vote': i % 2 == 0,
+            'date_inscription': now,
+            'modele_facial_entraine': True
+        } for i in range(voters)])
+        db.session.execute(sa.insert(Vote), [{
+            'id_electeur': i + 1,
+            'id_candidat': i % CANDIDATES + 1,
+            'heure_vote': now - timedelta(seconds=i % 86400)
+        } for i in range(0, voters, 2)])
+        tally.ensure_tally()
+        db.session.commit()
+    ballot.invalidate_candidates()
+
+
+def run(app, voters, writers, readers, duration):
+    """Écrivains et lecteurs en parallèle pendant `duration` secondes"""
+    # Électeurs n'ayant pas encore voté : un par vote
+    pending = itertools.count(2, 2)
+    stop = threading.Event()
+    lock = threading.Lock()
+    latencies = {'write': [], 'read': []}
+    errors = Counter()
+    barrier = threading.Barrier(writers + readers + 1)
+
+    def loop(kind, operation):
+        local = []
+        with app.app_context():
+            barrier.wait()
+            while not stop.is_set():
+                start = time.perf_counter()
+                try:
+                    operation()
+                    local.append(time.perf_counter() - start)
+                except Exception as e:
+                    db.session.rollback()
+                    errors[f'{kind}: {str(e).splitlines()[0][:60]}'] += 1
+            db.session.remove()
+        with lock:
+            latencies[kind].extend(local)
+
+    def write():
+        electeur_id = next(pending)
+        if electeur_id > voters:
+            stop.set()  # plus d'électeurs n'ayant pas voté : augmenter --voters
+            return
+        ballot.cast_vote(electeur_id, electeur_id % CANDIDATES + 1)
+
+    def read():
+        compute_results()
+
+    threads = [threading.Thread(target=loop, args=('write', write)) for _ in range(writers)]
+    threads += [threading.Thread(target=loop, args=('read', read)) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return latencies, errors
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] * 1000 if values else float('nan')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Charge mixte lectures/écritures : SQLite par défaut contre profil WAL")
+    parser.add_argument('--voters', type=int, default=200000)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10.0)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.TemporaryDirectory()
+    print(f"{args.voters} électeurs, {args.writers} écrivains, {args.readers} lecteurs, {args.duration:.0f}s par configuration\n")
+
+    for name in ('default', 'profile'):
+        app = Flask(f'bench_{name}')
+        app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(tmpdir.name, name + '.db')}"
+        pool = args.writers + args.readers
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'pool_size': pool, 'max_overflow': 0}
+        app.config['SQLITE_READ_POOL_SIZE'] = args.readers
+        db.init_app(app)
+        if name == 'profile':
+            init_sqlite_profile(app, db)
+
+        seed(app, args.voters)
+        latencies, errors = run(app, args.voters, args.writers, args.readers, args.duration)
+
+        writes, reads = latencies['write'], latencies['read']
+        print(f"{name}")
+        print(f"  écritures : {len(writes) / args.duration:8.1f} votes/s     "
+              f"p50 {statistics.median(writes) * 1000 if writes else float('nan'):8.2f} ms  p99 {percentile(writes, 0.99):8.2f} ms")
+        print(f"  lectures  : {len(reads) / args.duration:8.1f} lectures/s  "
+              f"p50 {statistics.median(reads) * 1000 if reads else float('nan'):8.2f} ms  p99 {percentile(reads, 0.99):8.2f} ms")
+        print(f"  erreurs   : {dict(errors) if errors else 0}\n")
+
+        with app.app_context():
+            db.engine.dispose()
+        read_engine = app.extensions.get('sqlite_read_engine')
+        if read_engine is not None:
+            read_engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
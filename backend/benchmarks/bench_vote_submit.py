@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Benchmark : soumission concurrente des votes (historique, UPDATE conditionnel, écriture groupée)
+
+Chaque électeur soumet son vote plusieurs fois en parallèle (tentatives
+consécutives prises par des threads différents). Trois chemins :
+- legacy  : lecture de l'électeur, test de a_vote, lecture du candidat, INSERT
+            du vote et a_vote = vrai (submit_vote historique), sans index unique
+- atomic  : utils.ballot.cast_vote (UPDATE ... WHERE a_vote n'est pas vrai,
+            INSERT et décompte dans la même transaction, index unique),
+            un commit par requête
+- grouped : utils.vote_writer.VoteWriter (mêmes écritures, un commit par lot ;
+            la requête attend le commit de son lot)
+
+Mesures : votes/s, latence p50/p99 par tentative, issues, et contrôle
+« exactement une fois » : un vote par électeur ayant voté, a_vote cohérent
+avec la table votes, décompte matérialisé égal aux votes bruts.
+
+Usage:
+    python benchmarks/bench_vote_submit.py [--voters 5000] [--attempts 3] [--threads 8]
+        [--paths legacy,atomic,grouped] [--batch-max 200] [--batch-window 0.005] [--database sqlite:////tmp/bench_votes.db]
+"""
+
+import argparse
+import itertools
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+import sqlalchemy as sa
+from flask import Flask
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ.setdefault('FLASK_ENV', 'development')
+
+from app import db
+from models import Candidat, Compteur, DecompteVotes, Electeur, Vote
+from utils import ballot, tally
+from utils.vote_writer import VoteWriter
+
+CANDIDATES = 8
+
+
+def legacy_vote(electeur_id, candidat_id):
+    """submit_vote historique : quatre allers-retours, test puis écriture"""
+    electeur = db.session.get(Electeur, electeur_id)
+    if not electeur:
+        return ballot.VOTE_UNKNOWN_VOTER
+    if electeur.a_vote:
+        return ballot.VOTE_ALREADY_CAST
+    candidat = db.session.get(Candidat, candidat_id)
+    if not candidat:
+        return ballot.VOTE_UNKNOWN_CANDIDATE
+    vote = Vote(id_electeur=electeur_id, id_candidat=candidat_id, heure_vote=datetime.utcnow())
+    electeur.a_vote = True
+    db.session.add(vote)
+    tally.record_vote(candidat.id)
+    db.session.commit()
+    return ballot.VOTE_OK
+
+
+def atomic_vote(electeur_id, candidat_id):
+    return ballot.cast_vote(electeur_id, candidat_id)[0]
+
+
+PATHS = ('legacy', 'atomic', 'grouped')
+
+
+def setup(app, voters, unique):
+    """Schéma neuf, électeurs n'ayant pas voté, décompte initialisé"""
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        if not unique:
+            db.session.execute(sa.text('DROP INDEX uq_votes_id_electeur'))
+        now = datetime.utcnow()
+        db.session.execute(sa.insert(Candidat), [
+            {'id': c + 1, 'nom': f'Candidat {c + 1}', 'parti': 'P', 'date_ajout': now} for c in range(CANDIDATES)
+        ])
+        db.session.execute(sa.insert(Electeur), [{
+            'id': i + 1,
+            'identifiant_electeur': f'E{i:09d}',
+            'identifiant_aadhar': f'A{i:09d}',
+            'numero_telephone': f'+2376{i:08d}',
+            'a_vote': False,
+            'date_inscription': now,
+            'modele_facial_entraine': True
+        } for i in range(voters)])
+        tally.ensure_tally()
+        db.session.commit()
+    ballot.invalidate_candidates()
+
+
+def run(app, vote, voters, attempts, threads):
+    """Toutes les tentatives, réparties entre threads via un compteur partagé"""
+    rng = random.Random(0)
+    order = list(range(1, voters + 1))
+    rng.shuffle(order)
+    # Les tentatives d'un même électeur se suivent : elles partent de threads différents au même moment
+    tasks = [(electeur_id, rng.randrange(CANDIDATES) + 1) for electeur_id in order for _ in range(attempts)]
+    cursor = itertools.count()
+    outcomes = Counter()
+    latencies = []
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(threads + 1)
+
+    def worker():
+        local_outcomes = Counter()
+        local_latencies = []
+        with app.app_context():
+            start_barrier.wait()
+            while True:
+                i = next(cursor)
+                if i >= len(tasks):
+                    break
+                electeur_id, candidat_id = tasks[i]
+                start = time.perf_counter()
+                try:
+                    outcome = vote(electeur_id, candidat_id)
+                except Exception as e:
+                    db.session.rollback()
+                    outcome = f'erreur ({type(e).__name__})'
+                local_latencies.append(time.perf_counter() - start)
+                local_outcomes[outcome] += 1
+            db.session.remove()
+        with lock:
+            outcomes.update(local_outcomes)
+            latencies.extend(local_latencies)
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    start_barrier.wait()
+    start = time.perf_counter()
+    for thread in pool:
+        thread.join()
+    return outcomes, latencies, time.perf_counter() - start
+
+
+def check(app):
+    """Contrôle exactement-une-fois sur la base après le run"""
+    with app.app_context():
+        votes = Vote.query.count()
+        voters_with_vote = db.session.query(sa.func.count(sa.distinct(Vote.id_electeur))).scalar()
+        flagged = Electeur.query.filter_by(a_vote=True).count()
+        tallied = db.session.query(sa.func.coalesce(sa.func.sum(DecompteVotes.votes), 0)).scalar()
+        counter = db.session.get(Compteur, tally.TOTAL_VOTES).valeur
+    return {
+        'votes': votes,
+        'doubles votes': votes - voters_with_vote,
+        'a_vote sans vote': flagged - voters_with_vote,
+        'décompte - votes': tallied - votes,
+        'compteur - votes': counter - votes
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Votes concurrents : historique, UPDATE conditionnel, écriture groupée")
+    parser.add_argument('--voters', type=int, default=5000)
+    parser.add_argument('--attempts', type=int, default=3, help="soumissions simultanées par électeur")
+    parser.add_argument('--threads', type=int, default=8, help="requêtes simultanées")
+    parser.add_argument('--paths', default=','.join(PATHS))
+    parser.add_argument('--batch-max', type=int, default=200)
+    parser.add_argument('--batch-window', type=float, default=0.005)
+    parser.add_argument('--database', help="URL SQLAlchemy d'une base jetable (défaut : fichier SQLite temporaire)")
+    args = parser.parse_args()
+
+    tmpdir = None
+    url = args.database
+    if url is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        url = f"sqlite:///{os.path.join(tmpdir.name, 'bench.db')}"
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = url
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'pool_size': args.threads, 'max_overflow': 0}
+    db.init_app(app)
+
+    print(f"{args.voters} électeurs x {args.attempts} tentatives, {args.threads} threads, {url}\n")
+    for name in args.paths.split(','):
+        setup(app, args.voters, unique=(name != 'legacy'))
+        writer = None
+        if name == 'legacy':
+            vote = legacy_vote
+        elif name == 'atomic':
+            vote = atomic_vote
+        else:
+            writer = VoteWriter(app, batch_max=args.batch_max, batch_window=args.batch_window,
+                                max_pending=args.voters * args.attempts)
+            writer.start()
+            vote = lambda electeur_id, candidat_id: writer.submit(electeur_id, candidat_id)[0]
+        outcomes, latencies, elapsed = run(app, vote, args.voters, args.attempts, args.threads)
+        if writer is not None:
+            writer.stop()
+        latencies.sort()
+        accepted = outcomes[ballot.VOTE_OK]
+        print(f"{name}")
+        print(f"  {len(latencies)} tentatives en {elapsed:.2f}s : {len(latencies) / elapsed:.0f} tentatives/s, "
+              f"{accepted / elapsed:.0f} votes acceptés/s")
+        print(f"  latence p50 {statistics.median(latencies) * 1000:.2f} ms, "
+              f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.2f} ms")
+        print(f"  issues : {dict(outcomes)}")
+        if writer is not None:
+            writer_stats = writer.stats()
+            print(f"  lots : {writer_stats['batches']}, taille moyenne {writer_stats['avg_batch_size']}, "
+                  f"max {writer_stats['max_batch_size']}, commit moyen {writer_stats['avg_commit_time_ms']} ms")
+        result = check(app)
+        verdict = 'OK' if all(v == 0 for k, v in result.items() if k != 'votes') and accepted == result['votes'] else 'ÉCHEC'
+        print(f"  exactement une fois : {verdict} {result}\n")
+
+    with app.app_context():
+        if args.database:
+            db.drop_all()
+        db.engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
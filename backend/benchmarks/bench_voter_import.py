@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Benchmark : import d'une liste électorale, /register ligne à ligne contre import en masse
+
+Génère un fichier (CSV ou NDJSON) de `--rows` lignes dont une part a un
+téléphone invalide et une part est en double (avec la base ou le fichier),
+sur une base contenant déjà `--existing` électeurs. Deux chemins :
+- legacy : écritures de /api/auth/register (recherche d'existence, INSERT,
+           commit, INSERT de l'OTP, commit) sur un échantillon de
+           `--legacy-rows` lignes, extrapolé à la taille du fichier
+- bulk   : utils/voter_import.py (ensembles d'identifiants, paquets, executemany)
+
+Mesures : lignes/s, durée totale, rejets par motif, contrôle du compteur
+global 'electeurs' contre COUNT(*).
+
+Usage:
+    python benchmarks/bench_voter_import.py [--rows 1000000] [--existing 10000] [--format csv] [--chunk 5000]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import sqlalchemy as sa
+from flask import Flask
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ.setdefault('FLASK_ENV', 'development')
+
+from app import db
+from models import Compteur, Electeur, OTP
+from utils import tally
+from utils.voter_import import import_voters, iter_records
+
+
+def write_roll(path, fmt, rows, existing, rng):
+    """Liste électorale synthétique : ~1 % téléphones invalides, ~1 % doublons"""
+    with open(path, 'w', encoding='utf-8', newline='') as output:
+        if fmt == 'csv':
+            output.write('identifiant_electeur,identifiant_aadhar,numero_telephone\n')
+        for i in range(rows):
+            n = existing + i
+            draw = rng.random()
+            if draw < 0.005 and existing:
+                n = rng.randrange(existing)          # déjà en base
+            elif draw < 0.01 and i:
+                n = existing + rng.randrange(i)      # déjà dans le fichier
+            phone = '12' if 0.01 <= draw < 0.02 else f'06{n % 10 ** 8:08d}'
+            record = (f'E{n:010d}', f'A{n:012d}', phone)
+            if fmt == 'csv':
+                output.write(','.join(record) + '\n')
+            else:
+                output.write(json.dumps(dict(zip(('identifiant_electeur', 'identifiant_aadhar', 'numero_telephone'), record))) + '\n')
+
+
+def seed(app, existing):
+    now = datetime.utcnow()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        for start in range(0, existing, 50000):
+            db.session.execute(sa.insert(Electeur), [{
+                'identifiant_electeur': f'E{n:010d}',
+                'identifiant_aadhar': f'A{n:012d}',
+                'numero_telephone': f'+336{n % 10 ** 8:08d}',
+                'a_vote': False,
+                'date_inscription': now,
+                'modele_facial_entraine': False
+            } for n in range(start, min(existing, start + 50000))])
+        tally.ensure_tally()
+        db.session.commit()
+
+
+def legacy_register(record):
+    """Écritures de /api/auth/register pour une ligne"""
+    existing = Electeur.query.filter(
+        (Electeur.identifiant_electeur == record['identifiant_electeur']) |
+        (Electeur.identifiant_aadhar == record['identifiant_aadhar'])
+    ).first()
+    if existing:
+        return False
+    db.session.add(Electeur(**record))
+    tally.increment_counter(tally.TOTAL_ELECTEURS)
+    db.session.commit()
+    db.session.add(OTP(numero_telephone=record['numero_telephone'], code='000000',
+                       expire_at=datetime.utcnow() + timedelta(minutes=5), type_otp='registration'))
+    db.session.commit()
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import d'une liste électorale : ligne à ligne contre en masse")
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--existing', type=int, default=10000)
+    parser.add_argument('--format', choices=('csv', 'ndjson'), default='csv')
+    parser.add_argument('--chunk', type=int, default=5000)
+    parser.add_argument('--legacy-rows', type=int, default=2000)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.TemporaryDirectory()
+    roll = os.path.join(tmpdir.name, f'liste.{args.format}')
+    start = time.perf_counter()
+    write_roll(roll, args.format, args.rows, args.existing, random.Random(7))
+    print(f"{args.rows} lignes {args.format} ({os.path.getsize(roll) / 2 ** 20:.0f} Mio) générées en "
+          f"{time.perf_counter() - start:.1f}s, {args.existing} électeurs déjà en base\n")
+
+    app = Flask('bench_voter_import')
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(tmpdir.name, 'bench.db')}"
+    db.init_app(app)
+
+    # legacy : échantillon
+    seed(app, args.existing)
+    with app.app_context(), open(roll, encoding='utf-8', newline='') as stream:
+        sample = []
+        for _, record in iter_records(stream, args.format):
+            sample.append({k: record[k] for k in ('identifiant_electeur', 'identifiant_aadhar', 'numero_telephone')})
+            if len(sample) >= args.legacy_rows:
+                break
+        start = time.perf_counter()
+        for record in sample:
+            legacy_register(record)
+        legacy_rate = len(sample) / (time.perf_counter() - start)
+    print(f"legacy : {legacy_rate:10,.0f} lignes/s  (échantillon de {len(sample)}), "
+          f"soit {args.rows / legacy_rate / 3600:.1f} h pour le fichier")
+
+    # bulk : fichier complet
+    seed(app, args.existing)
+    with app.app_context(), open(roll, encoding='utf-8', newline='') as stream:
+        report = import_voters(stream, args.format, chunk_size=args.chunk, max_rejects=0)
+        total = db.session.query(Electeur).count()
+        counter = db.session.get(Compteur, tally.TOTAL_ELECTEURS).valeur
+    print(f"bulk   : {report['lus'] / report['duree']:10,.0f} lignes/s  ({report['duree']:.1f}s), "
+          f"{report['importes']} importées, {report['rejetes']} rejetées {report['motifs']}")
+    print(f"contrôle : COUNT(*) {total}, compteur 'electeurs' {counter} ({'OK' if total == counter else 'ÉCART'})")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,12 @@
 import os
+import secrets
 from datetime import timedelta
 
 class Config:
     """Configuration de base pour Flask"""
     
-    # Clé secrète pour les sessions (CHANGEZ EN PRODUCTION!)
-    SECRET_KEY = os.environ.get('SECRET_KEY') or 'your-secret-key-change-in-production'
+    # Clé secrète des sessions et des jetons signés : obligatoire hors développement (app.py refuse de démarrer)
+    SECRET_KEY = os.environ.get('SECRET_KEY')
     
     # Configuration base de données
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///voting_system.db'
@@ -25,36 +26,147 @@ class Config:
     # Configuration OTP
     OTP_EXPIRY_MINUTES = 5
     OTP_LENGTH = 6
+    # Échecs de vérification par téléphone avant refus (429), sur une fenêtre fixe.
+    # Compteur en mémoire, par processus : avec N workers (gunicorn), un attaquant
+    # réparti sur les workers dispose de N x OTP_MAX_ATTEMPTS essais par fenêtre
+    OTP_MAX_ATTEMPTS = 5
+    OTP_ATTEMPT_WINDOW = 900.0  # secondes
+    # Purge par lots des OTP utilisés ou expirés (utils/otp_store.py, scripts/purge_otps.py)
+    OTP_PURGE_INTERVAL = 300.0  # secondes
+    OTP_PURGE_BATCH_SIZE = 5000
+    
+    # Import en masse des listes électorales (scripts/import_voters.py, /api/auth/import-voters)
+    VOTER_IMPORT_TOKEN = os.environ.get('VOTER_IMPORT_TOKEN')  # en-tête X-Import-Token ; route désactivée si absent
+    VOTER_IMPORT_CHUNK_SIZE = 5000  # lignes par INSERT / transaction
+    VOTER_IMPORT_MAX_REJECTS = 1000  # rejets détaillés dans la réponse
     
     # Configuration reconnaissance faciale
     CONFIDENCE_THRESHOLD = 100
     MIN_TRAINING_IMAGES = 10
     FACE_IMAGE_SIZE = (200, 200)
+    HAAR_CASCADE_PATH = os.path.join('models', 'haarcascade_frontalface_default.xml')
+    # Égalisation d'histogramme des visages : les modèles existants doivent être
+    # réentraînés après activation (scripts de migration / ré-enrôlement)
+    FACE_EQUALIZE_HIST = False
+    
+    # Détection rapide : Haar Cascade sur une image réduite à FACE_DETECTION_WIDTH pixels
+    # de large, rectangle ramené à la pleine résolution (voir benchmarks/bench_detection.py)
+    FACE_FAST_DETECTION = False
+    FACE_DETECTION_WIDTH = 320
+    FACE_MIN_SIZE = (30, 30)    # en pixels de l'image d'origine
+    FACE_MAX_SIZE = None
+    
+    # Cache LRU des modèles LBPH par électeur
+    FACE_MODEL_CACHE_MAX_ENTRIES = 1024
+    FACE_MODEL_CACHE_MAX_BYTES = 256 * 1024 * 1024
+    
+    # Stockage binaire des histogrammes LBPH (remplace les trainer.yml par électeur)
+    FACE_MODEL_STORE_PATH = os.environ.get('FACE_MODEL_STORE_PATH') or os.path.join('models', 'store')
+    
+    # Reconstruction en masse des modèles (flask rebuild-models) : 0 = un processus par cœur
+    MODEL_REBUILD_WORKERS = 0
+    MODEL_REBUILD_BATCH_SIZE = 64
+    
+    # Détection des doubles inscriptions (index LSH, distance chi-carré médiane)
+    FACE_DUPLICATE_THRESHOLD = 60.0
+    FACE_DEDUP_TABLES = 16
+    FACE_DEDUP_BITS = 16
+    
+    # Pool de threads du pipeline de capture (décodage, détection, encodage)
+    FACE_CAPTURE_WORKERS = 4
+    
+    # File d'entraînement asynchrone (tâches persistées dans training_jobs)
+    FACE_TRAINING_WORKERS = 2
+    FACE_TRAINING_QUEUE_MAX = 500
+    FACE_TRAINING_JOB_TIMEOUT = 600  # secondes avant reprise d'une tâche abandonnée
+    
+    # Compteurs d'enrôlement (images, électeurs capturés, modèles) : réconciliation
+    # périodique avec faces_data en arrière-plan, 0 = désactivée (scripts/reconcile_enrollment.py)
+    ENROLLMENT_RECONCILE_INTERVAL = 0  # secondes
+    
+    # Cache des réponses publiques /results et /stats (invalidé à chaque vote)
+    RESULTS_CACHE_TTL = 5.0  # secondes (borne la fraîcheur entre processus)
+    
+    # Flux SSE /api/vote/results/stream (un calcul par tick, partagé par tous les clients)
+    RESULTS_STREAM_TICK = 1.0        # secondes entre deux calculs
+    RESULTS_STREAM_BUFFER = 32       # événements en attente par client avant déconnexion
+    RESULTS_STREAM_HEARTBEAT = 15.0  # secondes sans événement avant un commentaire de maintien
+    
+    # Vote : candidats gardés en mémoire, rechargés au plus une fois par intervalle
+    # lorsqu'un identifiant inconnu est soumis
+    VOTE_CANDIDATES_REFRESH = 30.0  # secondes
+    
+    # Écriture groupée des votes : un thread valide les votes par lots (un commit
+    # par lot) ; chaque requête est acquittée après le commit de son lot
+    VOTE_GROUP_COMMIT = os.environ.get('VOTE_GROUP_COMMIT', '').lower() in ('1', 'true', 'yes')
+    VOTE_BATCH_MAX = 200         # votes par lot
+    VOTE_BATCH_WINDOW = 0.005    # secondes d'attente après le premier vote du lot
+    VOTE_WRITER_QUEUE_MAX = 10000
+    VOTE_WRITER_TIMEOUT = 10.0   # secondes avant réponse 503 (le vote peut encore être validé)
+    
+    # Cache des sessions d'authentification et des électeurs (jeton Bearer -> étapes,
+    # expiration, a_vote), invalidé par les routes qui les modifient
+    SESSION_CACHE_TTL = 10.0  # secondes (borne l'écart avec les autres processus)
+    SESSION_CACHE_MAX_ENTRIES = 100000
+    
+    # Jetons de session signés HMAC (utils/session_tokens.py) : vérifiés sans la base,
+    # révoqués à la déconnexion et au vote (table revocations_jetons)
+    SESSION_TOKEN_SECRET = os.environ.get('SESSION_TOKEN_SECRET')  # SECRET_KEY si absent
+    SESSION_TOKEN_LIFETIME_MINUTES = 30
+    SESSION_TOKEN_ACCEPT_LEGACY = True  # anciens jetons UUID vérifiés en base
+    SESSION_REVOCATION_REFRESH = 2.0  # secondes entre deux lectures des révocations des autres processus
+    
+    # Histogramme des votes (/api/vote/stats/histogram) : tranches stockées lues au plus
+    # par requête (10080 = 7 jours par minute, 420 jours par heure)
+    STATS_HISTOGRAM_MAX_ROWS = 10080
+    
+    # Profil SQLite (base fichier uniquement) : WAL, synchronous=NORMAL, busy_timeout,
+    # cache et mmap posés sur chaque connexion (utils/sqlite_profile.py), et pool
+    # en lecture seule pour les résultats et statistiques
+    SQLITE_PROFILE = True
+    SQLITE_PRAGMAS = {}             # surcharges, ex. {'mmap_size': 0}
+    SQLITE_READ_POOL_SIZE = 8
+    SQLITE_READ_POOL_OVERFLOW = 8
     
     # Configuration Twilio (optionnel)
     TWILIO_ACCOUNT_SID = os.environ.get('TWILIO_ACCOUNT_SID')
     TWILIO_AUTH_TOKEN = os.environ.get('TWILIO_AUTH_TOKEN')
     TWILIO_PHONE_NUMBER = os.environ.get('TWILIO_PHONE_NUMBER')
+    
+    # Envoi des SMS (utils/sms_service.py, utils/sms_dispatch.py) : fournisseur
+    # 'console' (affichage), 'fake' (passerelle locale de test) ou 'twilio' ;
+    # sans valeur : 'console' si DEBUG ou TESTING, 'twilio' sinon
+    SMS_PROVIDER = os.environ.get('SMS_PROVIDER')
+    SMS_ASYNC = True  # file d'envoi en arrière-plan ; False : envoi dans la requête
+    SMS_WORKERS = 4
+    SMS_QUEUE_MAX = 10000
+    SMS_BATCH_MAX = 20  # messages par appel au fournisseur
+    SMS_MAX_ATTEMPTS = 5
+    SMS_RETRY_BASE = 0.5  # secondes, doublé à chaque échec (avec gigue)
+    SMS_RETRY_MAX = 30.0
+    SMS_RATE_LIMITS = {'twilio': 10.0}  # envois par seconde et par fournisseur
+    SMS_FAKE_LATENCY = 0.0  # secondes par appel de la passerelle 'fake'
+    SMS_FAKE_FAILURE_RATE = 0.0
 
 class DevelopmentConfig(Config):
     """Configuration pour le développement"""
     DEBUG = True
     TESTING = False
+    # Sans SECRET_KEY : clé aléatoire du processus (sessions et jetons perdus au redémarrage)
+    SECRET_KEY = os.environ.get('SECRET_KEY') or secrets.token_hex(32)
 
 class ProductionConfig(Config):
     """Configuration pour la production"""
     DEBUG = False
     TESTING = False
     
-    # En production, utilisez des variables d'environnement sécurisées
-    SECRET_KEY = os.environ.get('SECRET_KEY')
-    if not SECRET_KEY:
-        raise ValueError("SECRET_KEY doit être définie en production")
+    # En production, SECRET_KEY vient de l'environnement (vérifiée au chargement par app.py)
 
 class TestingConfig(Config):
     """Configuration pour les tests"""
     TESTING = True
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SECRET_KEY = os.environ.get('SECRET_KEY') or secrets.token_hex(32)
+    SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL') or 'sqlite:///:memory:'
     WTF_CSRF_ENABLED = False
 
 # Dictionnaire des configurations
@@ -0,0 +1,39 @@
+"""Index des requêtes chaudes d'authentification et de vote
+
+Les tables sont créées par db.create_all() (run.py) ; cette révision ajoute
+les index secondaires aux bases existantes. if_not_exists rend la révision
+sans effet sur une base créée avec les modèles actuels (index déjà présents).
+
+Revision ID: 3f1c2a9d7b10
+Revises:
+Create Date: 2026-10-17 18:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c2a9d7b10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_otps_telephone_code_utilise', 'otps', ['numero_telephone', 'code', 'utilise']),
+    ('ix_sessions_auth_electeur_etape2_date', 'sessions_auth', ['id_electeur', 'etape_2_complete', 'date_creation']),
+    ('ix_electeurs_numero_telephone', 'electeurs', ['numero_telephone']),
+    ('ix_electeurs_a_vote', 'electeurs', ['a_vote']),
+    ('ix_electeurs_modele_facial_entraine', 'electeurs', ['modele_facial_entraine']),
+    ('ix_votes_id_candidat', 'votes', ['id_candidat']),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False, if_not_exists=True)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,55 @@
+"""Un seul vote par électeur (index unique sur votes.id_electeur)
+
+Filet de sécurité du vote atomique (utils/ballot.py) : un second INSERT pour
+le même électeur échoue même si a_vote a été remis à faux. La révision refuse
+de s'appliquer tant que la table votes contient des doublons, à examiner et
+supprimer à la main (aucun script ne le fait). Lister les votes concernés :
+
+    SELECT v.id, v.id_electeur, v.id_candidat, v.heure_vote
+    FROM votes v
+    WHERE v.id_electeur IN (
+        SELECT id_electeur FROM votes GROUP BY id_electeur HAVING COUNT(*) > 1
+    )
+    ORDER BY v.id_electeur, v.heure_vote, v.id;
+
+puis, si le premier vote de chaque électeur fait foi, supprimer les suivants :
+
+    DELETE FROM votes
+    WHERE id NOT IN (SELECT MIN(id) FROM votes GROUP BY id_electeur);
+
+Les compteurs (decompte_votes, compteurs, histogramme_votes) comptent encore
+les votes supprimés : les recalculer ensuite avec
+scripts/reconcile_tally.py --fix, qui ne touche pas à la table votes.
+
+Revision ID: 8b4e6d2c1a57
+Revises: 3f1c2a9d7b10
+Create Date: 2026-10-17 19:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b4e6d2c1a57'
+down_revision = '3f1c2a9d7b10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    duplicates = op.get_bind().execute(sa.text(
+        "SELECT id_electeur, COUNT(*) FROM votes GROUP BY id_electeur HAVING COUNT(*) > 1"
+    )).fetchall()
+    if duplicates:
+        sample = ', '.join(str(row[0]) for row in duplicates[:10])
+        raise RuntimeError(
+            f"{len(duplicates)} électeur(s) avec plusieurs votes (ex. id_electeur {sample}) : "
+            "supprimer les doublons (requêtes dans la docstring de cette révision) "
+            "avant d'appliquer cette migration"
+        )
+    op.create_index('uq_votes_id_electeur', 'votes', ['id_electeur'], unique=True, if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('uq_votes_id_electeur', table_name='votes', if_exists=True)
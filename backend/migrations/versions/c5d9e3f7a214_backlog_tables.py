@@ -0,0 +1,94 @@
+"""Tables ajoutées aux modèles depuis la base initiale
+
+training_jobs (file d'entraînement), decompte_votes et compteurs (décomptes
+matérialisés), histogramme_votes (votes par tranche de temps) et
+revocations_jetons (jetons de session révoqués). Une base créée par
+db.create_all() les contient déjà : if_not_exists rend alors la révision sans
+effet. Après mise à niveau d'une base existante, les décomptes sont
+initialisés au premier accès ; scripts/reconcile_tally.py --fix et
+scripts/reconcile_enrollment.py --fix les vérifient.
+
+Revision ID: c5d9e3f7a214
+Revises: 8b4e6d2c1a57
+Create Date: 2026-10-17 21:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5d9e3f7a214'
+down_revision = '8b4e6d2c1a57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'training_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('id_electeur', sa.Integer(), nullable=False),
+        sa.Column('statut', sa.String(length=20), nullable=False),
+        sa.Column('message', sa.Text(), nullable=True),
+        sa.Column('tentatives', sa.Integer(), nullable=True),
+        sa.Column('images', sa.Integer(), nullable=True),
+        sa.Column('date_creation', sa.DateTime(), nullable=True),
+        sa.Column('date_debut', sa.DateTime(), nullable=True),
+        sa.Column('date_fin', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['id_electeur'], ['electeurs.id']),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True
+    )
+    op.create_index('ix_training_jobs_statut', 'training_jobs', ['statut'], unique=False, if_not_exists=True)
+
+    op.create_table(
+        'decompte_votes',
+        sa.Column('id_candidat', sa.Integer(), nullable=False),
+        sa.Column('votes', sa.Integer(), nullable=False),
+        sa.Column('date_maj', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['id_candidat'], ['candidats.id']),
+        sa.PrimaryKeyConstraint('id_candidat'),
+        if_not_exists=True
+    )
+
+    op.create_table(
+        'compteurs',
+        sa.Column('nom', sa.String(length=50), nullable=False),
+        sa.Column('valeur', sa.Integer(), nullable=False),
+        sa.Column('date_maj', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('nom'),
+        if_not_exists=True
+    )
+
+    op.create_table(
+        'histogramme_votes',
+        sa.Column('granularite', sa.String(length=10), nullable=False),
+        sa.Column('debut', sa.DateTime(), nullable=False),
+        sa.Column('votes', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('granularite', 'debut'),
+        if_not_exists=True
+    )
+
+    op.create_table(
+        'revocations_jetons',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('type_cle', sa.String(length=20), nullable=False),
+        sa.Column('cle', sa.String(length=64), nullable=False),
+        sa.Column('expire_at', sa.DateTime(), nullable=False),
+        sa.Column('date_creation', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True
+    )
+    op.create_index('ix_revocations_jetons_expire_at', 'revocations_jetons', ['expire_at'], unique=False,
+                    if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_revocations_jetons_expire_at', table_name='revocations_jetons', if_exists=True)
+    op.drop_table('revocations_jetons', if_exists=True)
+    op.drop_table('histogramme_votes', if_exists=True)
+    op.drop_table('compteurs', if_exists=True)
+    op.drop_table('decompte_votes', if_exists=True)
+    op.drop_index('ix_training_jobs_statut', table_name='training_jobs', if_exists=True)
+    op.drop_table('training_jobs', if_exists=True)
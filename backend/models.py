@@ -6,6 +6,11 @@ from datetime import datetime
 class Electeur(db.Model):
     """Table des électeurs"""
     __tablename__ = 'electeurs'
+    __table_args__ = (
+        db.Index('ix_electeurs_numero_telephone', 'numero_telephone'),  # verify_otp (OTP de login)
+        db.Index('ix_electeurs_a_vote', 'a_vote'),  # /stats
+        db.Index('ix_electeurs_modele_facial_entraine', 'modele_facial_entraine'),  # /stats
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     identifiant_electeur = db.Column(db.String(50), unique=True, nullable=False)
@@ -32,6 +37,10 @@ class Electeur(db.Model):
 class Vote(db.Model):
     """Table des votes"""
     __tablename__ = 'votes'
+    __table_args__ = (
+        db.Index('ix_votes_id_candidat', 'id_candidat'),  # décompte par candidat
+        db.Index('uq_votes_id_electeur', 'id_electeur', unique=True),  # un seul vote par électeur
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     id_electeur = db.Column(db.Integer, db.ForeignKey('electeurs.id'), nullable=False)
@@ -70,6 +79,10 @@ class Candidat(db.Model):
 class OTP(db.Model):
     """Table pour les codes OTP"""
     __tablename__ = 'otps'
+    __table_args__ = (
+        # verify_otp : (téléphone, code, non utilisé), le plus récent d'abord (id implicite en fin d'index)
+        db.Index('ix_otps_telephone_code_utilise', 'numero_telephone', 'code', 'utilise'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     numero_telephone = db.Column(db.String(20), nullable=False)
@@ -90,6 +103,10 @@ class OTP(db.Model):
 class SessionAuthentification(db.Model):
     """Table pour les sessions d'authentification"""
     __tablename__ = 'sessions_auth'
+    __table_args__ = (
+        # verify_otp : dernière session de l'électeur dont l'étape 2 est en attente
+        db.Index('ix_sessions_auth_electeur_etape2_date', 'id_electeur', 'etape_2_complete', 'date_creation'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     id_electeur = db.Column(db.Integer, db.ForeignKey('electeurs.id'), nullable=False)
@@ -114,3 +131,82 @@ class SessionAuthentification(db.Model):
                 self.etape_2_complete and 
                 self.etape_3_complete and 
                 not self.is_expired())
+
+class TrainingJob(db.Model):
+    """Table des tâches d'entraînement des modèles faciaux"""
+    __tablename__ = 'training_jobs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    id_electeur = db.Column(db.Integer, db.ForeignKey('electeurs.id'), nullable=False)
+    statut = db.Column(db.String(20), nullable=False, default='en_attente', index=True)  # 'en_attente', 'en_cours', 'termine', 'echoue'
+    message = db.Column(db.Text)
+    tentatives = db.Column(db.Integer, default=0)
+    images = db.Column(db.Integer, default=0)
+    date_creation = db.Column(db.DateTime, default=datetime.utcnow)
+    date_debut = db.Column(db.DateTime)
+    date_fin = db.Column(db.DateTime)
+    
+    # Relations
+    electeur = db.relationship('Electeur', backref=db.backref('training_jobs', lazy=True))
+    
+    def __repr__(self):
+        return f'<TrainingJob {self.id} - Electeur: {self.id_electeur} - {self.statut}>'
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'electeur_id': self.id_electeur,
+            'statut': self.statut,
+            'message': self.message,
+            'tentatives': self.tentatives,
+            'images': self.images,
+            'date_creation': self.date_creation.isoformat() if self.date_creation else None,
+            'date_debut': self.date_debut.isoformat() if self.date_debut else None,
+            'date_fin': self.date_fin.isoformat() if self.date_fin else None
+        }
+
+class DecompteVotes(db.Model):
+    """Décompte matérialisé des votes par candidat (mis à jour avec chaque vote)"""
+    __tablename__ = 'decompte_votes'
+    
+    id_candidat = db.Column(db.Integer, db.ForeignKey('candidats.id'), primary_key=True)
+    votes = db.Column(db.Integer, nullable=False, default=0)
+    date_maj = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<DecompteVotes Candidat: {self.id_candidat} - {self.votes}>'
+
+class Compteur(db.Model):
+    """Compteurs globaux matérialisés ('votes', 'electeurs')"""
+    __tablename__ = 'compteurs'
+    
+    nom = db.Column(db.String(50), primary_key=True)
+    valeur = db.Column(db.Integer, nullable=False, default=0)
+    date_maj = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<Compteur {self.nom} = {self.valeur}>'
+
+class HistogrammeVotes(db.Model):
+    """Votes par tranche de temps ('minute', 'heure'), mis à jour avec chaque vote"""
+    __tablename__ = 'histogramme_votes'
+    
+    granularite = db.Column(db.String(10), primary_key=True)
+    debut = db.Column(db.DateTime, primary_key=True)  # début de la tranche (UTC)
+    votes = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<HistogrammeVotes {self.granularite} {self.debut} - {self.votes}>'
+
+class RevocationJeton(db.Model):
+    """Jetons de session signés révoqués (déconnexion, vote) avant leur expiration"""
+    __tablename__ = 'revocations_jetons'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    type_cle = db.Column(db.String(20), nullable=False)  # 'session' (sid) ou 'electeur'
+    cle = db.Column(db.String(64), nullable=False)
+    expire_at = db.Column(db.DateTime, nullable=False, index=True)  # purgée après l'expiration des jetons visés
+    date_creation = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<RevocationJeton {self.type_cle}:{self.cle}>'
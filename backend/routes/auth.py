@@ -1,9 +1,17 @@
-from flask import Blueprint, request, jsonify, session
-from models import db, Electeur, OTP, SessionAuthentification
-from datetime import datetime, timedelta
+from flask import Blueprint, current_app, request, jsonify, session
+from models import db, Electeur, SessionAuthentification
+from datetime import datetime
+import hmac
 import random
 import string
-import uuid
+from utils import tally
+from utils.otp_store import OTP_EXPIRED, OTP_OK, OTP_TOO_MANY_ATTEMPTS, get_otp_store, otp_lifetime
+from utils.results_cache import invalidate_results
+from utils.session_cache import get_session_cache, invalidate_session, is_fully_authenticated
+from utils.sms_dispatch import queue_sms
+from utils.sms_service import format_phone_number
+from utils.session_tokens import ALL_STEPS, STEP_CREDENTIALS, get_token_service, is_legacy_token, new_session_id
+from utils.voter_import import FORMATS, detect_format, import_voters, text_stream
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -11,12 +19,6 @@ def generate_otp():
     """Génère un code OTP à 6 chiffres"""
     return ''.join(random.choices(string.digits, k=6))
 
-def send_sms(numero, message):
-    """Simulé - Dans la vraie vie, utilisez Twilio ou un autre service SMS"""
-    print(f"SMS à {numero}: {message}")
-    # Ici vous intégreriez Twilio ou un autre service SMS
-    return True
-
 @auth_bp.route('/register', methods=['POST'])
 def register():
     """Inscription d'un nouvel électeur"""
@@ -35,7 +37,11 @@ def register():
         ).first()
         
         if existing_electeur:
-            return jsonify({'error': 'Électeur déjà inscrit'}), 409
+            if not _is_pending_enrolment(existing_electeur, data):
+                return jsonify({'error': 'Électeur déjà inscrit'}), 409
+            # Électeur importé (ou inscription interrompue) sans modèle facial :
+            # nouvel OTP au numéro enregistré, puis capture faciale
+            return _issue_registration_otp(existing_electeur, 'Inscription reprise. Code OTP envoyé.', 200)
         
         # Créer l'électeur
         electeur = Electeur(
@@ -45,34 +51,76 @@ def register():
         )
         
         db.session.add(electeur)
+        tally.increment_counter(tally.TOTAL_ELECTEURS)
         db.session.commit()
+        invalidate_results()
         
-        # Générer et envoyer l'OTP
-        otp_code = generate_otp()
-        otp = OTP(
-            numero_telephone=data['numero_telephone'],
-            code=otp_code,
-            expire_at=datetime.utcnow() + timedelta(minutes=5),
-            type_otp='registration'
-        )
-        
-        db.session.add(otp)
-        db.session.commit()
-        
-        # Envoyer SMS (simulé)
-        message = f"Votre code de vérification pour l'inscription au vote électronique: {otp_code}"
-        send_sms(data['numero_telephone'], message)
-        
-        return jsonify({
-            'message': 'Inscription réussie. Code OTP envoyé.',
-            'next_step': 'verify_otp',
-            'electeur_id': electeur.id
-        }), 201
+        return _issue_registration_otp(electeur, 'Inscription réussie. Code OTP envoyé.', 201)
         
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+def _is_pending_enrolment(electeur, data):
+    """Électeur existant sans modèle facial dont les trois identifiants correspondent à la demande"""
+    if electeur.modele_facial_entraine:
+        return False
+    if electeur.identifiant_electeur != data['identifiant_electeur'] or \
+            electeur.identifiant_aadhar != data['identifiant_aadhar']:
+        return False
+    # L'import enregistre le téléphone normalisé (sms_service.format_phone_number)
+    phone = str(data['numero_telephone'])
+    return electeur.numero_telephone in (phone, format_phone_number(phone))
+
+def _issue_registration_otp(electeur, message, status):
+    """Générer et envoyer l'OTP d'inscription au numéro enregistré de l'électeur"""
+    # Remplace un code d'inscription encore valide
+    otp_store = get_otp_store()
+    otp_code = generate_otp()
+    otp_store.issue(electeur.numero_telephone, 'registration', otp_code, otp_lifetime())
+    db.session.commit()
+    otp_store.maybe_purge()
+    
+    # Envoyer SMS (file d'envoi : la réponse n'attend pas la passerelle)
+    sms = f"Votre code de vérification pour l'inscription au vote électronique: {otp_code}"
+    queue_sms(electeur.numero_telephone, sms)
+    
+    return jsonify({
+        'message': message,
+        'next_step': 'verify_otp',
+        'electeur_id': electeur.id,
+        'numero_telephone': electeur.numero_telephone
+    }), status
+
+@auth_bp.route('/import-voters', methods=['POST'])
+def import_voters_route():
+    """Import en masse d'une liste électorale (CSV ou NDJSON, fichier 'file' ou corps brut)"""
+    expected = current_app.config.get('VOTER_IMPORT_TOKEN')
+    provided = request.headers.get('X-Import-Token', '')
+    if not expected or not hmac.compare_digest(provided, expected):
+        return jsonify({'error': 'Import non autorisé'}), 403
+    
+    upload = request.files.get('file')
+    default_format = 'ndjson' if 'ndjson' in (request.mimetype or '') else 'csv'
+    fmt = request.args.get('format') or detect_format(upload.filename if upload else None, default_format)
+    if fmt not in FORMATS:
+        return jsonify({'error': f"Format inconnu : {fmt}"}), 400
+    
+    try:
+        # Lecture en flux : le fichier n'est jamais chargé entièrement en mémoire
+        report = import_voters(
+            text_stream(upload.stream if upload else request.stream), fmt,
+            chunk_size=current_app.config.get('VOTER_IMPORT_CHUNK_SIZE', 5000),
+            max_rejects=current_app.config.get('VOTER_IMPORT_MAX_REJECTS', 1000)
+        )
+    except (UnicodeDecodeError, ValueError) as e:
+        db.session.rollback()
+        return jsonify({'error': f"Fichier illisible : {e}"}), 400
+    finally:
+        invalidate_results()
+    
+    return jsonify(report), 200
+
 @auth_bp.route('/verify-otp', methods=['POST'])
 def verify_otp():
     """Vérification du code OTP"""
@@ -82,24 +130,21 @@ def verify_otp():
         if not all(field in data for field in ['numero_telephone', 'otp_code']):
             return jsonify({'error': 'Numéro de téléphone et code OTP requis'}), 400
         
-        # Trouver l'OTP valide le plus récent
-        otp = OTP.query.filter_by(
-            numero_telephone=data['numero_telephone'],
-            code=data['otp_code'],
-            utilise=False
-        ).order_by(OTP.id.desc()).first()
+        # Vérifier et consommer le code (mémoire, sinon otps ; échecs bornés par téléphone)
+        outcome, type_otp = get_otp_store().verify(data['numero_telephone'], str(data['otp_code']))
         
-        if not otp:
-            return jsonify({'error': 'Code OTP invalide'}), 400
+        if outcome == OTP_TOO_MANY_ATTEMPTS:
+            return jsonify({'error': 'Trop de tentatives. Réessayez plus tard.'}), 429
         
-        if otp.is_expired():
+        if outcome == OTP_EXPIRED:
             return jsonify({'error': 'Code OTP expiré'}), 400
         
-        # Marquer l'OTP comme utilisé
-        otp.utilise = True
+        if outcome != OTP_OK:
+            return jsonify({'error': 'Code OTP invalide'}), 400
 
         # Si c'est un OTP de login, mettre à jour la session d'authentification
-        if otp.type_otp == 'login':
+        auth_session = None
+        if type_otp == 'login':
             electeur = Electeur.query.filter_by(numero_telephone=data['numero_telephone']).first()
             if electeur:
                 auth_session = SessionAuthentification.query.filter_by(
@@ -111,13 +156,15 @@ def verify_otp():
                     db.session.add(auth_session)
 
         db.session.commit()
+        if auth_session:
+            invalidate_session(auth_session.session_token)
         
-        if otp.type_otp == 'registration':
+        if type_otp == 'registration':
             return jsonify({
                 'message': 'OTP vérifié. Procédez à la capture faciale.',
                 'next_step': 'face_capture'
             }), 200
-        elif otp.type_otp == 'login':
+        elif type_otp == 'login':
             return jsonify({
                 'message': 'OTP vérifié. Procédez à la reconnaissance faciale.',
                 'next_step': 'face_recognition'
@@ -151,32 +198,30 @@ def login():
         if not electeur.modele_facial_entraine:
             return jsonify({'error': 'Modèle facial non entraîné. Veuillez compléter votre inscription.'}), 400
         
-        # Créer une session d'authentification
-        session_token = str(uuid.uuid4())
+        # Créer une session d'authentification ; le client reçoit un jeton signé portant son identifiant
+        tokens = get_token_service()
+        session_id = new_session_id()
+        expire_at = datetime.utcnow() + tokens.lifetime
         auth_session = SessionAuthentification(
             id_electeur=electeur.id,
             etape_1_complete=True,
-            session_token=session_token,
-            expire_at=datetime.utcnow() + timedelta(minutes=30)
+            session_token=session_id,
+            expire_at=expire_at
         )
         
         db.session.add(auth_session)
         
-        # Générer et envoyer l'OTP
+        # Générer et envoyer l'OTP (remplace un code de connexion encore valide)
+        otp_store = get_otp_store()
         otp_code = generate_otp()
-        otp = OTP(
-            numero_telephone=electeur.numero_telephone,
-            code=otp_code,
-            expire_at=datetime.utcnow() + timedelta(minutes=5),
-            type_otp='login'
-        )
-        
-        db.session.add(otp)
+        otp_store.issue(electeur.numero_telephone, 'login', otp_code, otp_lifetime())
         db.session.commit()
+        otp_store.maybe_purge()
+        session_token = tokens.issue(electeur.id, STEP_CREDENTIALS, expire_at, session_id)
         
-        # Envoyer SMS
+        # Envoyer SMS (file d'envoi : la réponse n'attend pas la passerelle)
         message = f"Votre code de connexion pour le vote électronique: {otp_code}"
-        send_sms(electeur.numero_telephone, message)
+        queue_sms(electeur.numero_telephone, message)
         
         # Stocker dans la session Flask
         session['auth_session_token'] = session_token
@@ -203,9 +248,13 @@ def complete_login():
         if not session_token:
             return jsonify({'error': 'Session invalide'}), 401
         
-        # Vérifier la session
+        # Vérifier la session (désignée par le sid d'un jeton signé ou par un ancien jeton UUID)
+        tokens = get_token_service()
+        session_key = tokens.session_key(session_token)
+        if not session_key:
+            return jsonify({'error': 'Session invalide'}), 401
         auth_session = SessionAuthentification.query.filter_by(
-            session_token=session_token
+            session_token=session_key
         ).first()
         
         if not auth_session or auth_session.is_expired():
@@ -218,11 +267,14 @@ def complete_login():
         session['logged_in'] = True
         session['electeur_id'] = auth_session.id_electeur
         
+        # Jeton signé des trois étapes : les requêtes suivantes sont authentifiées sans la base
+        session_token = tokens.issue(auth_session.id_electeur, ALL_STEPS, auth_session.expire_at, session_key)
+        
         return jsonify({
             'message': 'Connexion réussie',
             'next_step': 'vote',
             'electeur_id': auth_session.id_electeur,
-            'session_token': auth_session.session_token
+            'session_token': session_token
         }), 200
         
     except Exception as e:
@@ -231,39 +283,55 @@ def complete_login():
 @auth_bp.route('/logout', methods=['POST'])
 def logout():
     """Déconnexion"""
+    tokens = get_token_service()
+    auth_header = request.headers.get('Authorization')
+    for token in (auth_header[7:] if auth_header and auth_header.startswith('Bearer ') else None,
+                  session.get('auth_session_token')):
+        if not token:
+            continue
+        if is_legacy_token(token):
+            invalidate_session(token)
+            continue
+        # Jeton signé : la révocation de sa session le rend invalide dans tous les processus
+        claims = tokens.validate(token, required_steps=0)
+        if claims:
+            tokens.revoke_session(claims)
     session.clear()
     return jsonify({'message': 'Déconnexion réussie'}), 200
 
-from flask import request, jsonify, session
-from models import SessionAuthentification, Electeur
-
 @auth_bp.route('/status', methods=['GET'])
 def auth_status():
-    # Récupérer token Authorization Bearer
+    # Récupérer token Authorization Bearer (session et électeur servis par le cache de sessions)
+    cache = get_session_cache()
     auth_header = request.headers.get('Authorization')
     if auth_header and auth_header.startswith('Bearer '):
         token = auth_header[7:]
-        auth_session = SessionAuthentification.query.filter_by(session_token=token).first()
-        
-        if auth_session and not auth_session.is_expired() and auth_session.is_fully_authenticated():
-            electeur = Electeur.query.get(auth_session.id_electeur)
+        if is_legacy_token(token):
+            auth_session = cache.get_session(token)
+            electeur_id = auth_session['id_electeur'] if auth_session and is_fully_authenticated(auth_session) else None
+        else:
+            # Jeton signé : vérifié sans requête en base
+            claims = get_token_service().validate(token)
+            electeur_id = claims['electeur_id'] if claims else None
+        
+        if electeur_id:
+            electeur = cache.get_voter(electeur_id)
             if electeur:
                 return jsonify({
                     'authenticated': True,
-                    'electeur': electeur.to_dict(),
-                    'has_voted': electeur.a_vote
+                    'electeur': electeur,
+                    'has_voted': electeur['a_vote']
                 }), 200
 
     # Sinon fallback sur session Flask classique
     if session.get('logged_in'):
         electeur_id = session.get('electeur_id')
-        electeur = Electeur.query.get(electeur_id)
+        electeur = cache.get_voter(electeur_id)
         if electeur:
             return jsonify({
                 'authenticated': True,
-                'electeur': electeur.to_dict(),
-                'has_voted': electeur.a_vote
+                'electeur': electeur,
+                'has_voted': electeur['a_vote']
             }), 200
 
     return jsonify({'authenticated': False}), 200
-
@@ -1,152 +1,108 @@
 # Fichier face_bp.py - VERSION CORRIGÉE ET NETTOYÉE
 
 from flask import Blueprint, request, jsonify
-from models import db, Electeur, SessionAuthentification
-import cv2
-import numpy as np
-import base64
-import os
+from werkzeug.exceptions import RequestEntityTooLarge
+from models import db, Electeur, SessionAuthentification, TrainingJob
 import traceback
+from utils import enrollment_counters
+from utils.face_engine import get_face_engine
+from utils.training_queue import QueueFullError, get_training_queue, register_training_handler
+from utils.image_input import is_raw_image, request_image, request_images
+from utils.session_cache import invalidate_session
+from utils.session_tokens import get_token_service
 
 # --- Configuration ---
 face_bp = Blueprint('face', __name__)
 
-# CORRIGÉ : Constantes définies une seule fois en haut du fichier
-HAAR_CASCADE_PATH = 'models/haarcascade_frontalface_default.xml'
-FACES_DATA_PATH = 'faces_data'
-MODELS_FOLDER = 'models'
+# Détecteur, prétraitement, stockage des modèles et identification : voir utils/face_engine.py
 
-# --- Fonctions Utilitaires (Pas de changement majeur) ---
+# --- Fonctions Utilitaires ---
 
 def decode_base64_image(base64_string):
-    """Décoder une image base64 en array numpy"""
-    try:
-        if base64_string.startswith('data:image'):
-            base64_string = base64_string.split(',')[1]
-        img_data = base64.b64decode(base64_string)
-        nparr = np.frombuffer(img_data, np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        return img
-    except Exception as e:
-        print(f"Erreur décodage image: {e}")
-        return None
+    """Décoder une image base64 en array numpy (API JSON historique)"""
+    return get_face_engine().decode(base64_string)
 
 def detect_face(image):
-    """Détecter un visage dans l'image avec Haar Cascade"""
-    try:
-        if not os.path.exists(HAAR_CASCADE_PATH):
-            return None, "Modèle Haar Cascade non trouvé. Veuillez le télécharger via l'API."
-        
-        face_cascade = cv2.CascadeClassifier(HAAR_CASCADE_PATH)
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        faces = face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=4, minSize=(30, 30))
-        
-        if len(faces) == 0:
-            return None, "Aucun visage n'a été détecté. Assurez-vous d'être bien éclairé et de face."
-        if len(faces) > 1:
-            return None, "Plusieurs visages détectés. Seul un visage est autorisé par image."
-        
-        (x, y, w, h) = faces[0]
-        return gray[y:y+h, x:x+w], None
-    except Exception as e:
-        return None, f"Erreur technique lors de la détection: {str(e)}"
+    """Détecter un visage dans l'image et le préparer pour LBPH"""
+    return get_face_engine().extract(image)
 
 def save_training_images(electeur_id, images):
-    """Sauvegarde les images d'entraînement. Retourne (succès, nb_sauvegardées, message_erreur)."""
-    error_message = None
-    saved_count = 0
+    """
+    Sauvegarde les images d'entraînement (décodage et détection en parallèle).
+
+    Retourne (succès, nb_sauvegardées, message_erreur, rapport) ; le rapport
+    contient l'erreur de chaque image rejetée et la durée de chaque étape.
+    """
+    report = {'image_errors': [], 'timings_ms': {}}
     try:
-        electeur_folder = os.path.join(FACES_DATA_PATH, f"user_{electeur_id}")
-        os.makedirs(electeur_folder, exist_ok=True)
-
-        for i, img_base64 in enumerate(images):
-            img = decode_base64_image(img_base64)
-            if img is None:
-                error_message = f"L'image {i+1} est invalide."
-                continue
-
-            face, error = detect_face(img)
-            if face is None:
-                error_message = f"Pour l'image {i+1}: {error}"
-                continue
-
-            face_resized = cv2.resize(face, (200, 200))
-            filepath = os.path.join(electeur_folder, f"user.{electeur_id}.{saved_count + 1}.jpg")
-            cv2.imwrite(filepath, face_resized)
-            saved_count += 1
-        
+        engine = get_face_engine()
+        user_folder = engine.user_folder(electeur_id)
+        images_before = enrollment_counters.count_images(user_folder)
+        saved_count, errors, timings_ms = engine.save_training_images(electeur_id, images)
+        if saved_count:
+            # Images sur le disque : comptabilisées même si la capture est ensuite refusée
+            enrollment_counters.record_capture(images_before, enrollment_counters.count_images(user_folder))
+            db.session.commit()
+        report['image_errors'] = [{'image': i + 1, 'error': error} for i, error in errors]
+        report['timings_ms'] = timings_ms
+
+        error_message = f"Pour l'image {errors[-1][0] + 1}: {errors[-1][1]}" if errors else None
         if saved_count == 0:
-            return False, 0, error_message or "Aucune image valide n'a pu être traitée."
+            return False, 0, error_message or "Aucune image valide n'a pu être traitée.", report
             
-        return True, saved_count, None
+        return True, saved_count, None, report
     except Exception as e:
         traceback.print_exc()
-        return False, 0, str(e)
+        return False, 0, str(e), report
+
+def train_face_model_for_user(electeur_id, histograms=None):
+    """Entraîner le modèle LBPH d'un utilisateur et l'enregistrer dans le stockage binaire."""
+    return get_face_engine().train(electeur_id, histograms)
+
+def run_training_job(electeur_id):
+    """Tâche de la file d'entraînement : vérification des doublons, entraînement, activation du modèle."""
+    engine = get_face_engine()
+    histograms, error = engine.load_training_histograms(electeur_id)
+    if histograms is None:
+        return False, error
+
+    # Refuser un visage déjà enrôlé sous un autre identifiant
+    duplicates = engine.find_duplicates(electeur_id, histograms)
+    if duplicates:
+        return False, f"Ce visage semble déjà enrôlé pour un autre électeur (score {duplicates[0][1]:.1f})."
+
+    success, message = engine.train(electeur_id, histograms)
+    if not success:
+        return False, message
+
+    # Validé dans le même commit que le statut de la tâche
+    electeur = db.session.get(Electeur, electeur_id)
+    if not electeur.modele_facial_entraine:
+        electeur.modele_facial_entraine = True
+        enrollment_counters.record_training()
+    return True, message
 
-def train_face_model_for_user(electeur_id):
-    """Entraîner le modèle LBPH uniquement pour un utilisateur donné."""
-    try:
-        recognizer = cv2.face.LBPHFaceRecognizer_create()
-        faces, ids = [], []
-        
-        user_folder = os.path.join(FACES_DATA_PATH, f"user_{electeur_id}")
-        if not os.path.exists(user_folder):
-            return False, "Aucune image d'entraînement trouvée"
-        
-        for filename in os.listdir(user_folder):
-            if filename.endswith('.jpg'):
-                img = cv2.imread(os.path.join(user_folder, filename), cv2.IMREAD_GRAYSCALE)
-                if img is not None:
-                    faces.append(img)
-                    ids.append(electeur_id)  # <-- toujours le même id pour cet utilisateur
-        
-        if not faces:
-            return False, "Aucune image valide trouvée dans le dossier d'entraînement."
-        
-        #  CORRECTION : Forcer dtype à np.int32
-        recognizer.train(faces, np.array(ids, dtype=np.int32))
-        
-        user_model_folder = os.path.join(MODELS_FOLDER, f"user_{electeur_id}")
-        os.makedirs(user_model_folder, exist_ok=True)
-        model_path = os.path.join(user_model_folder, 'trainer.yml')
-        recognizer.save(model_path)
-        
-        return True, f"Modèle entraîné avec {len(faces)} images."
-    except Exception as e:
-        traceback.print_exc()
-        return False, f"Erreur lors de l'entraînement: {str(e)}"
+register_training_handler(run_training_job)
 
 def recognize_face_multiple_models(image):
-    """Reconnaître un visage en testant tous les modèles utilisateurs."""
+    """
+    Reconnaître un visage parmi tous les électeurs enrôlés (identification 1:N).
+
+    Les distances à tous les modèles du stockage binaire sont calculées en une
+    passe vectorisée ; les anciens trainer.yml doivent d'abord être importés
+    avec scripts/migrate_models.py.
+    """
     try:
-        face, error = detect_face(image)
+        engine = get_face_engine()
+        face, error = engine.extract(image)
         if face is None:
             return None, 0, error
-        face_resized = cv2.resize(face, (200, 200))
-
-        best_user_id, best_confidence = None, float('inf')
-
-        for user_folder in os.listdir(MODELS_FOLDER):
-            user_path = os.path.join(MODELS_FOLDER, user_folder)
-            model_path = os.path.join(user_path, 'trainer.yml')
-
-            if os.path.isdir(user_path) and os.path.exists(model_path):
-                recognizer = cv2.face.LBPHFaceRecognizer_create()
-                recognizer.read(model_path)
-                user_id, confidence = recognizer.predict(face_resized)
-                
-                # Le user_id est intégré au nom du dossier, on le récupère pour plus de sûreté
-                try:
-                    current_user_id = int(user_folder.replace('user_', ''))
-                    if confidence < best_confidence:
-                        best_confidence = confidence
-                        best_user_id = current_user_id
-                except ValueError:
-                    continue # Dossier non conforme
-
-        if best_user_id is None:
+
+        matches = engine.identify(face)
+        if not matches:
             return None, 0, "Aucun modèle n'a pu reconnaître ce visage."
-            
+
+        best_user_id, best_confidence = matches[0]
         return best_user_id, best_confidence, None
     except Exception as e:
         return None, 0, f"Erreur technique lors de la reconnaissance: {str(e)}"
@@ -154,27 +110,38 @@ def recognize_face_multiple_models(image):
 
 # --- Routes API ---
 
+@face_bp.before_app_request
+def start_training_workers():
+    """Démarrer les workers d'entraînement dès la première requête (reprise des tâches après redémarrage)."""
+    get_training_queue()
+    enrollment_counters.start_reconciler()
+
 @face_bp.route('/detect-single', methods=['POST'])
 def detect_single_face():
     """Vérifie si un visage est détecté dans une image (feedback UI)."""
     try:
-        img = decode_base64_image(request.get_json().get('image'))
+        engine = get_face_engine()
+        image, _ = request_image(request)
+        img = engine.decode(image)
         if img is None:
             return jsonify({'detected': False, 'reason': 'Image invalide'})
 
-        face, error = detect_face(img)
+        face, error = engine.detect(img)
         return jsonify({'detected': face is not None, 'reason': error})
+    except RequestEntityTooLarge as e:
+        return jsonify({'detected': False, 'reason': e.description}), 413
     except Exception as e:
         return jsonify({'detected': False, 'reason': str(e)})
 
 # CORRIGÉ : Un seul décorateur de route
 @face_bp.route('/capture', methods=['POST'])
 def capture_faces():
-    """Capturer les images, vérifier le nombre et entraîner le modèle."""
+    """Capturer les images, vérifier le nombre et mettre l'entraînement du modèle en file."""
     MIN_IMAGES_REQUIRED = 5
     try:
-        data = request.get_json()
-        electeur_id, images = data.get('electeur_id'), data.get('images')
+        # Fichiers multipart (champ 'images') ou liste base64 dans un corps JSON
+        images, data = request_images(request)
+        electeur_id = data.get('electeur_id')
 
         if not all([electeur_id, images, isinstance(images, list)]):
             return jsonify({'error': 'Données invalides fournies.'}), 400
@@ -185,65 +152,89 @@ def capture_faces():
         if electeur.modele_facial_entraine:
             return jsonify({'error': 'Un modèle a déjà été entraîné.'}), 400
 
-        success, count, error_msg = save_training_images(electeur_id, images)
+        # Contre-pression : refuser avant tout traitement si la file est pleine
+        queue = get_training_queue()
+        active_job = queue.active_job(electeur.id)
+        if active_job:
+            return jsonify({'error': 'Un entraînement est déjà en cours.', 'job': active_job.to_dict()}), 409
+        queue.check_capacity()
+
+        success, count, error_msg, report = save_training_images(electeur_id, images)
         if not success:
-            return jsonify({'error': error_msg or "Échec de la sauvegarde."}), 500
+            return jsonify({'error': error_msg or "Échec de la sauvegarde.", **report}), 500
         
         if count < MIN_IMAGES_REQUIRED:
-            return jsonify({'error': f"Seulement {count} visages détectés. Minimum requis: {MIN_IMAGES_REQUIRED}."}), 400
-
-        train_success, train_message = train_face_model_for_user(electeur_id)
-        if not train_success:
-            return jsonify({'error': f"Entraînement échoué: {train_message}"}), 500
-
-        electeur.modele_facial_entraine = True
-        db.session.commit()
-        return jsonify({'message': 'Modèle entraîné avec succès.', 'images_saved': count}), 201
+            return jsonify({'error': f"Seulement {count} visages détectés. Minimum requis: {MIN_IMAGES_REQUIRED}.", **report}), 400
 
+        # L'entraînement est exécuté par la file ; le statut se consulte sur /training-jobs/<id>
+        job = queue.enqueue(electeur.id, images=count)
+        return jsonify({
+            'message': 'Images enregistrées. Entraînement du modèle en cours.',
+            'images_saved': count,
+            'job_id': job.id,
+            'status_url': f"/api/face/training-jobs/{job.id}",
+            **report
+        }), 202
+
+    except QueueFullError as e:
+        response = jsonify({'error': str(e)})
+        response.headers['Retry-After'] = '30'
+        return response, 503
+    except RequestEntityTooLarge as e:
+        return jsonify({'error': e.description}), 413
     except Exception as e:
         db.session.rollback()
         traceback.print_exc()
         return jsonify({'error': f"Erreur serveur: {str(e)}"}), 500
 
+@face_bp.route('/training-jobs/<int:job_id>', methods=['GET'])
+def training_job_status(job_id):
+    """Consulter l'état d'une tâche d'entraînement."""
+    job = db.session.get(TrainingJob, job_id)
+    if not job:
+        return jsonify({'error': f"Tâche {job_id} non trouvée."}), 404
+    return jsonify(job.to_dict()), 200
+
 @face_bp.route('/recognize', methods=['POST'])
 def recognize():
     """Reconnaître un visage et le valider contre la session en cours (modèle unique)."""
     try:
-        data = request.get_json()
-        img = decode_base64_image(data.get('image'))
-        session_token = data.get('session_token')
+        engine = get_face_engine()
+        image, data = request_image(request)
+        img = engine.decode(image)
+        # Jeton en en-tête Bearer (seul accepté pour un corps brut : pas de
+        # jeton dans l'URL, journalisée par les serveurs et les proxys)
+        auth_header = request.headers.get('Authorization')
+        if auth_header and auth_header.startswith('Bearer '):
+            session_token = auth_header[7:]
+        else:
+            session_token = None if is_raw_image(request) else data.get('session_token')
 
         if not all([img is not None, session_token]):
             return jsonify({'recognized': False, 'message': 'Données invalides.'}), 400
 
-        # Récupérer la session pour obtenir l'ID utilisateur
-        auth_session = SessionAuthentification.query.filter_by(session_token=session_token).first()
+        # Récupérer la session (sid du jeton signé ou ancien jeton UUID) pour obtenir l'ID utilisateur
+        session_key = get_token_service().session_key(session_token)
+        auth_session = session_key and SessionAuthentification.query.filter_by(session_token=session_key).first()
         if not auth_session:
             return jsonify({'recognized': False, 'message': 'Session invalide.'}), 401
 
         user_id = auth_session.id_electeur
-
-        # Charger uniquement le modèle de cet utilisateur
-        user_model_folder = os.path.join(MODELS_FOLDER, f"user_{user_id}")
-        model_path = os.path.join(user_model_folder, 'trainer.yml')
-
-        if not os.path.exists(model_path):
+        if not engine.has_model(user_id):
             return jsonify({'recognized': False, 'message': 'Modèle facial non trouvé pour cet utilisateur.'}), 404
 
-        recognizer = cv2.face.LBPHFaceRecognizer_create()
-        recognizer.read(model_path)
-
-        # Détection du visage
-        face, error = detect_face(img)
+        # Détection et prétraitement du visage
+        face, error = engine.extract(img)
         if face is None:
             return jsonify({'recognized': False, 'message': error}), 200
 
-        face_resized = cv2.resize(face, (200, 200))
-
-        predicted_id, confidence = recognizer.predict(face_resized)
+        # Vérification 1:1 contre le seul modèle de cet utilisateur
+        result = engine.verify(user_id, face)
+        if result is None:
+            return jsonify({'recognized': False, 'message': 'Modèle facial non trouvé pour cet utilisateur.'}), 404
+        predicted_id, confidence = result
 
-        CONFIDENCE_THRESHOLD = 100
-        if confidence > CONFIDENCE_THRESHOLD:
+        if not engine.is_recognized(confidence):
             return jsonify({'recognized': False, 'message': 'Visage non reconnu.', 'confidence': confidence}), 200
 
         # Vérifier que l'ID prédit correspond à l'utilisateur
@@ -253,6 +244,7 @@ def recognize():
         # Marquer l'étape 3 complète
         auth_session.etape_3_complete = True
         db.session.commit()
+        invalidate_session(session_key)
 
         return jsonify({
             'recognized': True,
@@ -262,6 +254,8 @@ def recognize():
             'authentication_complete': True
         }), 200
 
+    except RequestEntityTooLarge as e:
+        return jsonify({'recognized': False, 'message': e.description}), 413
     except Exception as e:
         db.session.rollback()
         return jsonify({'recognized': False, 'message': str(e)}), 500
@@ -272,31 +266,11 @@ def recognize():
 def model_status():
     """Vérifier l'état des dépendances du modèle et le nombre d'images d'entraînement."""
     try:
-        haar_exists = os.path.exists(HAAR_CASCADE_PATH)
-
-        training_images = 0
-        if os.path.exists(FACES_DATA_PATH):
-            # Compter toutes les images .jpg dans chaque dossier utilisateur
-            for user_folder in os.listdir(FACES_DATA_PATH):
-                user_path = os.path.join(FACES_DATA_PATH, user_folder)
-                if os.path.isdir(user_path):
-                    images = [f for f in os.listdir(user_path) if f.endswith('.jpg')]
-                    training_images += len(images)
-
-        # Compter le nombre de modèles entraînés
-        trained_models = 0
-        if os.path.exists(MODELS_FOLDER):
-            for user_folder in os.listdir(MODELS_FOLDER):
-                user_path = os.path.join(MODELS_FOLDER, user_folder)
-                model_path = os.path.join(user_path, 'trainer.yml')
-                if os.path.isfile(model_path):
-                    trained_models += 1
-
+        engine = get_face_engine()
         return jsonify({
-            'haar_cascade_available': haar_exists,
-            'training_images_count': training_images,
-            'trained_models_count': trained_models,
-            'models_ready': haar_exists and trained_models > 0
+            **engine.status(),
+            **engine.stats(),
+            'training_queue': get_training_queue().stats()
         }), 200
 
     except Exception as e:
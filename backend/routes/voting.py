@@ -1,6 +1,13 @@
-from flask import Blueprint, request, jsonify, session
-from models import db, Electeur, Vote, Candidat, SessionAuthentification
+from flask import Blueprint, Response, current_app, request, jsonify, session
+from models import db
 from datetime import datetime
+from utils import ballot, enrollment_counters, tally, vote_histogram
+from utils.results_cache import get_results_cache, invalidate_results
+from utils.results_stream import get_results_broadcaster
+from utils.session_cache import get_session_cache, invalidate_voter, is_fully_authenticated
+from utils.session_tokens import get_token_service, is_legacy_token
+from utils.sqlite_profile import read_session
+from utils.vote_writer import VoteWriterTimeout, get_vote_writer
 
 voting_bp = Blueprint('voting', __name__)
 
@@ -10,11 +17,17 @@ def is_authenticated():
     auth_header = request.headers.get('Authorization')
     if auth_header and auth_header.startswith('Bearer '):
         token = auth_header[7:]
-        auth_session = SessionAuthentification.query.filter_by(session_token=token).first()
-        
-        if auth_session and not auth_session.is_expired() and auth_session.is_fully_authenticated():
+        if is_legacy_token(token):
+            auth_session = get_session_cache().get_session(token)
+            electeur_id = auth_session['id_electeur'] if auth_session and is_fully_authenticated(auth_session) else None
+        else:
+            # Jeton signé (utils/session_tokens.py) : signature, étapes, expiration et révocation vérifiées sans la base
+            claims = get_token_service().validate(token)
+            electeur_id = claims['electeur_id'] if claims else None
+        
+        if electeur_id:
             # Injecte l'id_electeur dans la session temporairement pour le reste du traitement
-            session['electeur_id'] = auth_session.id_electeur
+            session['electeur_id'] = electeur_id
             session['logged_in'] = True
             return True
 
@@ -27,8 +40,8 @@ def get_candidates():
     if not is_authenticated():
         return jsonify({'error': 'Non authentifié'}), 401
     
-    candidats = Candidat.query.all()
-    return jsonify([candidat.to_dict() for candidat in candidats]), 200
+    # Registre des candidats en mémoire (utils/ballot.py) : aucune requête
+    return jsonify(ballot.get_candidate_registry().all()), 200
 
 @voting_bp.route('/submit', methods=['POST'])
 def submit_vote():
@@ -44,31 +57,26 @@ def submit_vote():
         if not candidat_id:
             return jsonify({'error': 'ID du candidat requis'}), 400
         
-        # Vérifier que l'électeur existe et n'a pas déjà voté
-        electeur = Electeur.query.get(electeur_id)
-        if not electeur:
+        # UPDATE conditionnel + INSERT en une transaction : un seul vote par électeur
+        # (écriture groupée : réponse après le commit du lot contenant ce vote)
+        if current_app.config.get('VOTE_GROUP_COMMIT'):
+            try:
+                outcome, vote = get_vote_writer().submit(electeur_id, candidat_id)
+            except VoteWriterTimeout:
+                return jsonify({'error': 'Vote en cours de validation, vérifiez votre éligibilité avant de réessayer'}), 503
+        else:
+            outcome, vote = ballot.cast_vote(electeur_id, candidat_id)
+        if outcome == ballot.VOTE_UNKNOWN_VOTER:
             return jsonify({'error': 'Électeur non trouvé'}), 404
-        
-        if electeur.a_vote:
+        if outcome == ballot.VOTE_ALREADY_CAST:
+            invalidate_voter(electeur_id)
             return jsonify({'error': 'Vous avez déjà voté'}), 403
-        
-        # Vérifier que le candidat existe
-        candidat = Candidat.query.get(candidat_id)
-        if not candidat:
+        if outcome == ballot.VOTE_UNKNOWN_CANDIDATE:
             return jsonify({'error': 'Candidat non trouvé'}), 404
-        
-        # Créer le vote
-        vote = Vote(
-            id_electeur=electeur_id,
-            id_candidat=candidat_id,
-            heure_vote=datetime.utcnow()
-        )
-        
-        # Marquer l'électeur comme ayant voté
-        electeur.a_vote = True
-        
-        db.session.add(vote)
-        db.session.commit()
+        invalidate_results()
+        invalidate_voter(electeur_id)
+        # Les jetons signés de l'électeur ne sont plus acceptés
+        get_token_service().revoke_voter(electeur_id)
         
         # Déconnecter l'utilisateur automatiquement
         session.clear()
@@ -77,9 +85,9 @@ def submit_vote():
         return jsonify({
             'success': True,
             'message': 'Vote enregistré avec succès',
-            'transaction_id': f"VT-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}-{vote.id}",
-            'vote_time': vote.heure_vote.isoformat(),
-            'candidat': candidat.to_dict()
+            'transaction_id': f"VT-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}-{vote['id']}",
+            'vote_time': vote['heure_vote'].isoformat(),
+            'candidat': vote['candidat']
         }), 201
         
     except Exception as e:
@@ -87,76 +95,106 @@ def submit_vote():
         return jsonify({'error': str(e)}), 500
 
 
+def compute_results():
+    """Résultats du vote (dict sérialisable, mis en cache par /results)"""
+    # Décompte matérialisé : une ligne par candidat, sans parcours de la table votes
+    with read_session() as reader:
+        results, total_votes, total_electeurs = tally.read_results(reader)
+    
+    results_data = []
+    for candidat_id, nom, parti, votes in results:
+        pourcentage = round((votes / total_votes * 100) if total_votes > 0 else 0, 2)
+        results_data.append({
+            'id': candidat_id,
+            'candidat': nom,
+            'parti': parti,
+            'votes': votes,
+            'pourcentage': pourcentage
+        })
+    
+    # Trier par nombre de votes décroissant
+    results_data.sort(key=lambda x: x['votes'], reverse=True)
+    
+    participation = round((total_votes / total_electeurs * 100) if total_electeurs > 0 else 0, 2)
+    
+    return {
+        'results': results_data,
+        'total_votes': total_votes,
+        'total_electeurs': total_electeurs,
+        'participation': participation
+    }
+
+def compute_stats():
+    """Statistiques de vote (dict sérialisable, mis en cache par /stats)"""
+    with read_session() as reader:
+        # Compteurs matérialisés : un électeur a voté si et seulement si son vote existe (index unique)
+        _, electeurs_votes, total_electeurs = tally.read_results(reader)
+        electeurs_inscrits = enrollment_counters.read_counters(reader)[enrollment_counters.TRAINED]
+        
+        # Votes par heure (dernières 24h) : 24 tranches horaires de l'histogramme
+        votes_par_heure = vote_histogram.read(24 * 3600, 3600, session=reader)
+    
+    return {
+        'total_electeurs': total_electeurs,
+        'electeurs_votes': electeurs_votes,
+        'electeurs_inscrits': electeurs_inscrits,
+        'participation': round((electeurs_votes / total_electeurs * 100) if total_electeurs > 0 else 0, 2),
+        'votes_par_heure': [{
+            'heure': bucket['debut'].strftime('%H'),
+            'debut': bucket['debut'].isoformat(),
+            'votes': bucket['votes']
+        } for bucket in votes_par_heure]
+    }
+
 @voting_bp.route('/results', methods=['GET'])
 def get_results():
-    """Obtenir les résultats du vote"""
+    """Obtenir les résultats du vote (ETag / 304 via le cache de résultats)"""
     try:
-        # Compter les votes par candidat
-        results = db.session.query(
-            Candidat.id,
-            Candidat.nom,
-            Candidat.parti,
-            db.func.count(Vote.id).label('votes')
-        ).outerjoin(Vote, Candidat.id == Vote.id_candidat).group_by(Candidat.id).all()
-        
-        total_votes = Vote.query.count()
-        total_electeurs = Electeur.query.count()
-        
-        results_data = []
-        for result in results:
-            pourcentage = round((result.votes / total_votes * 100) if total_votes > 0 else 0, 2)
-            results_data.append({
-                'id': result.id,
-                'candidat': result.nom,
-                'parti': result.parti,
-                'votes': result.votes,
-                'pourcentage': pourcentage
-            })
-        
-        # Trier par nombre de votes décroissant
-        results_data.sort(key=lambda x: x['votes'], reverse=True)
-        
-        participation = round((total_votes / total_electeurs * 100) if total_electeurs > 0 else 0, 2)
-        
-        return jsonify({
-            'results': results_data,
-            'total_votes': total_votes,
-            'total_electeurs': total_electeurs,
-            'participation': participation
-        }), 200
-        
+        return get_results_cache().response('vote_results', compute_results)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@voting_bp.route('/results/stream', methods=['GET'])
+def stream_results():
+    """Résultats en direct (Server-Sent Events) : instantané puis deltas à chaque tick"""
+    broadcaster = get_results_broadcaster(compute_results)
+    subscriber = broadcaster.subscribe()
+    return Response(
+        broadcaster.stream(subscriber),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @voting_bp.route('/stats', methods=['GET'])
 def get_voting_stats():
-    """Obtenir les statistiques de vote en temps réel"""
+    """Obtenir les statistiques de vote en temps réel (ETag / 304 via le cache de résultats)"""
     try:
-        total_electeurs = Electeur.query.count()
-        electeurs_votes = Electeur.query.filter_by(a_vote=True).count()
-        electeurs_inscrits = Electeur.query.filter_by(modele_facial_entraine=True).count()
-        
-        # Votes par heure (dernières 24h)
-        from sqlalchemy import text
-        votes_par_heure = db.session.execute(text("""
-            SELECT strftime('%H', heure_vote) as heure, COUNT(*) as count
-            FROM votes 
-            WHERE datetime(heure_vote) >= datetime('now', '-1 day')
-            GROUP BY strftime('%H', heure_vote)
-            ORDER BY heure
-        """)).fetchall()
-        
-        return jsonify({
-            'total_electeurs': total_electeurs,
-            'electeurs_votes': electeurs_votes,
-            'electeurs_inscrits': electeurs_inscrits,
-            'participation': round((electeurs_votes / total_electeurs * 100) if total_electeurs > 0 else 0, 2),
-            'votes_par_heure': [{'heure': row[0], 'votes': row[1]} for row in votes_par_heure]
-        }), 200
-        
+        return get_results_cache().response('vote_stats', compute_stats)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@voting_bp.route('/stats/histogram', methods=['GET'])
+def get_vote_histogram():
+    """Votes par tranche de temps (?window=24h&granularity=1h&end=ISO-8601 UTC)"""
+    try:
+        window = vote_histogram.parse_duration(request.args.get('window', '24h'))
+        granularity = vote_histogram.parse_duration(request.args.get('granularity', '1h'))
+        end = request.args.get('end')
+        end = datetime.fromisoformat(end) if end else None
+        buckets = vote_histogram.read(
+            window, granularity, end=end,
+            max_rows=current_app.config.get('STATS_HISTOGRAM_MAX_ROWS', 10080)
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        'window_seconds': window,
+        'granularity_seconds': granularity,
+        'buckets': [{'debut': bucket['debut'].isoformat(), 'votes': bucket['votes']} for bucket in buckets],
+        'total': sum(bucket['votes'] for bucket in buckets)
+    }), 200
+
 @voting_bp.route('/verify-eligibility', methods=['GET'])
 def verify_eligibility():
     """Vérifier l'éligibilité au vote de l'électeur connecté"""
@@ -164,13 +202,13 @@ def verify_eligibility():
         return jsonify({'error': 'Non authentifié'}), 401
     
     electeur_id = session.get('electeur_id')
-    electeur = Electeur.query.get(electeur_id)
+    electeur = get_session_cache().get_voter(electeur_id)
     
     if not electeur:
         return jsonify({'error': 'Électeur non trouvé'}), 404
     
     return jsonify({
-        'eligible': not electeur.a_vote,
-        'a_deja_vote': electeur.a_vote,
-        'electeur': electeur.to_dict()
+        'eligible': not electeur['a_vote'],
+        'a_deja_vote': electeur['a_vote'],
+        'electeur': electeur
     }), 200
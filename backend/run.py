@@ -5,13 +5,19 @@ Script de lancement pour le serveur Flask du système de vote électronique
 
 import os
 import sys
+import click
 from flask_migrate import Migrate
 
 # Ajouter le répertoire courant au path Python
 sys.path.insert(0, os.path.dirname(__file__))
 
+# python run.py (et flask --app run.py) : développement sauf FLASK_ENV=production
+os.environ.setdefault('FLASK_ENV', 'development')
+
 from app import app, db
+# L'import de models enregistre toutes les tables (training_jobs, compteurs, ...) pour db.create_all()
 from models import Electeur, Vote, Candidat, OTP, SessionAuthentification
+from utils import enrollment_counters, tally
 
 # Configuration pour les migrations
 migrate = Migrate(app, db)
@@ -57,6 +63,16 @@ def init_database():
             db.session.commit()
             print("Candidats de test créés")
         
+        # Décompte matérialisé des votes (initialisé depuis les votes existants)
+        if tally.ensure_tally():
+            db.session.commit()
+            print("Décompte des votes initialisé")
+        
+        # Compteurs d'enrôlement (/model-status, /stats), initialisés depuis faces_data
+        if enrollment_counters.ensure_counters():
+            db.session.commit()
+            print("Compteurs d'enrôlement initialisés")
+        
         print("Base de données initialisée")
 
 
@@ -84,6 +100,49 @@ def create_directories():
             os.makedirs(directory)
             print(f" Répertoire créé: {directory}")
 
+@app.cli.command('rebuild-models')
+@click.option('--workers', type=int, default=None, help="Processus de calcul (MODEL_REBUILD_WORKERS, un par cœur par défaut)")
+@click.option('--checkpoint', default=None, help="Point de reprise (models/store/rebuild.checkpoint par défaut)")
+@click.option('--restart', is_flag=True, help="Ignorer le point de reprise et tout reconstruire")
+@click.option('--electeur', 'electeur_ids', type=int, multiple=True, help="Limiter à un électeur (option répétable)")
+def rebuild_models_command(workers, checkpoint, restart, electeur_ids):
+    """Reconstruire les modèles LBPH des électeurs enrôlés depuis faces_data"""
+    from utils.face_engine import get_face_engine
+    from utils.model_rebuild import rebuild_models
+
+    # Seuls les électeurs déjà enrôlés : un dossier refusé comme doublon ne doit pas devenir un modèle
+    query = db.session.query(Electeur.id).filter_by(modele_facial_entraine=True)
+    if electeur_ids:
+        query = query.filter(Electeur.id.in_(electeur_ids))
+    enrolled = {electeur_id for (electeur_id,) in query}
+
+    def progress(report):
+        print(f"\r {report['rebuilt'] + report['failed']}/{report['total'] - report['skipped']} électeurs, "
+              f"{report['images']} images ({report['images_par_s']:,.1f} images/s)", end='', flush=True)
+
+    try:
+        report = rebuild_models(
+            get_face_engine(),
+            electeur_ids=enrolled,
+            workers=workers or app.config.get('MODEL_REBUILD_WORKERS', 0) or None,
+            checkpoint_path=checkpoint,
+            restart=restart,
+            batch_size=app.config.get('MODEL_REBUILD_BATCH_SIZE', 64),
+            progress=progress
+        )
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    print()
+
+    for error in report['errors']:
+        print(f" Électeur {error['electeur_id']} : {error['message']}")
+    print(f" {report['rebuilt']} modèles reconstruits, {report['failed']} en échec, "
+          f"{report['skipped']} déjà faits (point de reprise)")
+    print(f" {report['images']} images en {report['duree']:.2f}s ({report['images_par_s']:,.1f} images/s)")
+    if report['failed']:
+        sys.exit(1)
+
+
 def main():
     """Fonction principale de lancement"""
     print("🗳️  Système de Vote Électronique - Serveur Flask")
@@ -111,6 +170,7 @@ def main():
     print("   • POST /api/auth/register - Inscription électeur")
     print("   • POST /api/auth/login - Connexion électeur")
     print("   • POST /api/face/capture - Capture facial")
+    print("   • GET  /api/face/training-jobs/<id> - Statut d'entraînement")
     print("   • POST /api/face/recognize - Reconnaissance faciale")
     print("   • POST /api/vote/submit - Soumission vote")
     print("   • GET  /api/vote/results - Résultats")
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Indexer dans l'index de doublons les électeurs du stockage de modèles qui n'y sont pas encore
+
+À lancer une fois après la mise en place de l'index (les enrôlements suivants
+sont indexés par /api/face/capture), ou après scripts/migrate_models.py.
+--rebuild repart d'un index vide dont le centre est recalculé sur les électeurs
+stockés (serveur arrêté : les workers lisent le journal de façon incrémentale).
+
+Usage:
+    python scripts/build_dedup_index.py [--store models/store] [--batch 1024] [--rebuild]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from utils.dedup_index import DuplicateIndex
+from utils.model_store import DEFAULT_STORE_PATH, ModelStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compléter l'index de doublons depuis le stockage de modèles")
+    parser.add_argument('--store', default=DEFAULT_STORE_PATH, help="Dossier du stockage binaire")
+    parser.add_argument('--batch', type=int, default=1024, help="Électeurs indexés par écriture")
+    parser.add_argument('--rebuild', action='store_true', help="Supprimer l'index et recalculer son centre")
+    args = parser.parse_args()
+
+    store = ModelStore(args.store)
+    if args.rebuild:
+        for filename in ('lsh.bin', 'lsh_center.f32'):
+            path = os.path.join(store.root, filename)
+            if os.path.exists(path):
+                os.remove(path)
+    index = DuplicateIndex(store.root, store.dim, store=store)
+
+    entries, matrix, _ = store.entries()
+    indexed = index.indexed_ids()
+    missing = sorted(electeur_id for electeur_id in entries if electeur_id not in indexed)
+    print(f" {len(entries)} modèles, {len(indexed)} déjà indexés, {len(missing)} à indexer")
+
+    start = time.perf_counter()
+    for i in range(0, len(missing), args.batch):
+        batch = missing[i:i + args.batch]
+        descriptors = np.vstack([
+            index.descriptor(matrix[offset:offset + count])
+            for offset, count in (entries[electeur_id] for electeur_id in batch)
+        ])
+        index.add_many(batch, descriptors)
+        print(f"   {i + len(batch)}/{len(missing)}", end='\r')
+
+    print(f"\n Terminé en {time.perf_counter() - start:.1f}s : {index.stats()}")
+
+
+if __name__ == '__main__':
+    main()
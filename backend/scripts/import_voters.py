@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Importer une liste électorale (CSV ou NDJSON) dans la table electeurs
+
+Colonnes / clés : identifiant_electeur, identifiant_aadhar, numero_telephone.
+Le fichier est lu en flux et inséré par paquets (une transaction par paquet) ;
+les lignes rejetées (téléphone invalide, doublon, champ manquant) sont
+écrites dans --rejects avec leur numéro de ligne. Les électeurs importés
+n'ont pas de modèle facial : ils terminent leur inscription par
+POST /api/auth/register avec les trois identifiants de la liste (OTP envoyé
+au numéro enregistré, puis capture faciale) avant de pouvoir se connecter.
+
+Usage:
+    python scripts/import_voters.py liste.csv [--format csv|ndjson] [--chunk 5000] [--rejects rejets.csv]
+"""
+
+import argparse
+import csv
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ.setdefault('FLASK_ENV', 'development')
+
+from app import app
+from utils.results_cache import invalidate_results
+from utils.voter_import import FORMATS, detect_format, import_voters
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import en masse d'une liste électorale")
+    parser.add_argument('path', help="Fichier CSV ou NDJSON ('-' : entrée standard)")
+    parser.add_argument('--format', choices=FORMATS, help="Format du fichier (déduit de l'extension par défaut)")
+    parser.add_argument('--chunk', type=int, default=5000, help="Lignes insérées par transaction")
+    parser.add_argument('--rejects', help="Fichier CSV des lignes rejetées (ligne, motif, identifiant_electeur)")
+    args = parser.parse_args()
+
+    fmt = args.format or detect_format(args.path)
+
+    def progress(report):
+        rate = report['lus'] / report['duree'] if report['duree'] else 0.0
+        print(f"\r {report['lus']} lues, {report['importes']} importées, {report['rejetes']} rejetées "
+              f"({rate:,.0f} lignes/s)", end='', flush=True)
+
+    stream = sys.stdin if args.path == '-' else open(args.path, encoding='utf-8', newline='')
+    try:
+        with app.app_context():
+            report = import_voters(stream, fmt, chunk_size=args.chunk,
+                                   max_rejects=sys.maxsize if args.rejects else 1000, progress=progress)
+            invalidate_results()
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    print()
+
+    for reason, count in sorted(report['motifs'].items()):
+        print(f" Rejet {reason} : {count}")
+    if args.rejects:
+        with open(args.rejects, 'w', encoding='utf-8', newline='') as output:
+            writer = csv.DictWriter(output, fieldnames=['ligne', 'motif', 'identifiant_electeur'])
+            writer.writeheader()
+            writer.writerows(report['rejets'])
+        print(f" Rejets écrits dans {args.rejects}")
+    print(f" {report['importes']} électeurs importés sur {report['lus']} lignes en {report['duree']:.2f}s")
+    sys.exit(1 if report['rejetes'] else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Migration des anciens modèles models/user_<id>/trainer.yml vers le stockage binaire
+
+Usage:
+    python scripts/migrate_models.py [--models models] [--store models/store] [--delete]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from utils.lbph import load_yaml_histograms
+from utils.model_store import DEFAULT_STORE_PATH, ModelStore
+
+
+def iter_yaml_models(models_folder):
+    """Énumérer les couples (electeur_id, chemin du trainer.yml)"""
+    if not os.path.isdir(models_folder):
+        return
+    for user_folder in sorted(os.listdir(models_folder)):
+        if not user_folder.startswith('user_'):
+            continue
+        try:
+            electeur_id = int(user_folder[len('user_'):])
+        except ValueError:
+            continue  # Dossier non conforme
+        model_path = os.path.join(models_folder, user_folder, 'trainer.yml')
+        if os.path.isfile(model_path):
+            yield electeur_id, model_path
+
+
+def migrate(models_folder, store, delete=False, force=False):
+    """
+    Importer les trainer.yml dans le stockage binaire
+
+    Returns:
+        dict: Compteurs (imported, skipped, failed)
+    """
+    counts = {'imported': 0, 'skipped': 0, 'failed': 0}
+
+    for electeur_id, model_path in iter_yaml_models(models_folder):
+        if not force and electeur_id in store:
+            counts['skipped'] += 1
+            continue
+        try:
+            histograms, _ = load_yaml_histograms(model_path)
+            # Toutes les lignes d'un modèle par électeur portent son identifiant
+            store.put(electeur_id, histograms)
+        except Exception as e:
+            print(f" Échec pour l'électeur {electeur_id} ({model_path}): {e}")
+            counts['failed'] += 1
+            continue
+
+        counts['imported'] += 1
+        if delete:
+            os.remove(model_path)
+            try:
+                os.rmdir(os.path.dirname(model_path))
+            except OSError:
+                pass  # Dossier non vide : on le laisse
+
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importer les trainer.yml dans le stockage binaire des modèles")
+    parser.add_argument('--models', default='models', help="Dossier contenant les user_<id>/trainer.yml")
+    parser.add_argument('--store', default=DEFAULT_STORE_PATH, help="Dossier du stockage binaire")
+    parser.add_argument('--delete', action='store_true', help="Supprimer les trainer.yml importés")
+    parser.add_argument('--force', action='store_true', help="Réimporter les électeurs déjà présents")
+    args = parser.parse_args()
+
+    store = ModelStore(args.store)
+    start = time.perf_counter()
+    counts = migrate(args.models, store, delete=args.delete, force=args.force)
+    elapsed = time.perf_counter() - start
+
+    print(f" {counts['imported']} modèles importés, {counts['skipped']} ignorés, "
+          f"{counts['failed']} échecs en {elapsed:.2f}s")
+    print(f" Stockage: {store.stats()}")
+    return 1 if counts['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Purger la table otps des codes utilisés ou expirés
+
+Le serveur purge déjà par lots toutes les OTP_PURGE_INTERVAL secondes lors
+de l'émission des codes ; ce script sert après un arrêt prolongé ou depuis un
+cron, avec le même découpage en lots (une transaction par lot).
+
+Usage:
+    python scripts/purge_otps.py [--batch 5000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ.setdefault('FLASK_ENV', 'development')
+
+from app import app, db
+from models import OTP
+from utils.otp_store import OtpStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Supprimer les OTP utilisés ou expirés")
+    parser.add_argument('--batch', type=int, default=5000, help="Lignes supprimées par transaction")
+    args = parser.parse_args()
+
+    with app.app_context():
+        before = db.session.query(OTP).count()
+        start = time.perf_counter()
+        deleted = OtpStore(purge_batch_size=args.batch).purge()
+        elapsed = time.perf_counter() - start
+        after = db.session.query(OTP).count()
+
+    print(f" {deleted} OTP supprimés en {elapsed:.2f}s ({before} -> {after} lignes)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Vérifier les compteurs d'enrôlement contre faces_data et la table electeurs
+
+Compare les compteurs images_entrainement et electeurs_captures à un parcours
+complet de faces_data, et modeles_entraines au nombre d'électeurs dont le
+modèle est activé. Le même contrôle peut tourner en arrière-plan
+(ENROLLMENT_RECONCILE_INTERVAL) ; --fix corrige les écarts trouvés. Code de
+sortie 1 si des écarts subsistent.
+
+Usage:
+    python scripts/reconcile_enrollment.py [--fix]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ.setdefault('FLASK_ENV', 'development')
+
+from app import app
+from utils import enrollment_counters
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Réconcilier les compteurs d'enrôlement avec faces_data")
+    parser.add_argument('--fix', action='store_true', help="Corriger les écarts trouvés")
+    args = parser.parse_args()
+
+    with app.app_context():
+        start = time.perf_counter()
+        report = enrollment_counters.reconcile(fix=args.fix)
+        elapsed = time.perf_counter() - start
+
+    for row in report['compteurs']:
+        print(f" Compteur {row['nom']} : décompte {row['decompte']}, réel {row['reel']}")
+
+    status = "corrigés" if args.fix else "trouvés"
+    print(f" {len(report['compteurs'])} écarts {status} en {elapsed:.2f}s")
+    sys.exit(1 if report['compteurs'] and not args.fix else 0)
+
+
+if __name__ == '__main__':
+    main()
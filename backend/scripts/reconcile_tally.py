@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Vérifier le décompte matérialisé des votes contre les tables brutes
+
+Compare chaque ligne de decompte_votes au COUNT des votes du candidat, les
+compteurs globaux (votes, électeurs) aux tables votes et electeurs, et le total
+de l'histogramme (par minute, par heure) au nombre de votes. À lancer
+périodiquement (cron) ; --fix corrige les écarts trouvés. Code de sortie 1 si
+des écarts subsistent.
+
+Usage:
+    python scripts/reconcile_tally.py [--fix]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ.setdefault('FLASK_ENV', 'development')
+
+from app import app
+from utils import tally
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Réconcilier le décompte des votes avec les votes bruts")
+    parser.add_argument('--fix', action='store_true', help="Corriger les écarts trouvés")
+    args = parser.parse_args()
+
+    with app.app_context():
+        start = time.perf_counter()
+        report = tally.reconcile(fix=args.fix)
+        elapsed = time.perf_counter() - start
+
+    for row in report['candidats']:
+        print(f" Candidat {row['id_candidat']} : décompte {row['decompte']}, réel {row['reel']}")
+    for row in report['compteurs']:
+        print(f" Compteur {row['nom']} : décompte {row['decompte']}, réel {row['reel']}")
+    for row in report['histogramme']:
+        print(f" Histogramme par {row['granularite']} : total {row['decompte']}, réel {row['reel']}")
+
+    mismatches = len(report['candidats']) + len(report['compteurs']) + len(report['histogramme'])
+    status = "corrigés" if args.fix else "trouvés"
+    print(f" {mismatches} écarts {status} en {elapsed:.2f}s")
+    sys.exit(1 if mismatches and not args.fix else 0)
+
+
+if __name__ == '__main__':
+    main()
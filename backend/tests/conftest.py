@@ -0,0 +1,38 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Configuration de test (config.py) sur une base SQLite fichier : les threads
+# d'écriture (vote groupé) et la requête partagent la même base
+_tmpdir = tempfile.mkdtemp(prefix='vote_tests_')
+os.environ['FLASK_ENV'] = 'testing'
+os.environ['TEST_DATABASE_URL'] = f"sqlite:///{os.path.join(_tmpdir, 'test.db')}"
+# Stockage des modèles et index de doublons hors de l'arbre (models/store)
+os.environ['FACE_MODEL_STORE_PATH'] = os.path.join(_tmpdir, 'store')
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+# models importe db depuis app : l'application est chargée avant les modules de test
+from app import app as flask_app, create_tables, db  # noqa: E402
+from utils import ballot, otp_store, results_cache, session_cache, session_tokens  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    with flask_app.app_context():
+        db.drop_all()
+        create_tables()
+    # Caches du processus construits sur la base précédente
+    ballot._registry = None
+    session_cache._session_cache = None
+    results_cache._results_cache = None
+    session_tokens._token_service = None
+    otp_store._otp_store = None
+    yield flask_app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
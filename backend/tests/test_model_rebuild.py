@@ -0,0 +1,83 @@
+import os
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+import pytest
+
+from utils.dedup_index import DuplicateIndex
+from utils.model_cache import ModelCache
+from utils.model_rebuild import CHECKPOINT_FILENAME, RebuildCheckpoint, rebuild_models
+from utils.model_store import ModelStore
+
+VOTERS = [1, 2, 3, 4, 5]
+
+
+class Interrupted(Exception):
+    pass
+
+
+@pytest.fixture
+def engine(tmp_path):
+    rng = np.random.default_rng(0)
+    faces_data = tmp_path / 'faces_data'
+    for electeur_id in VOTERS:
+        folder = faces_data / f'user_{electeur_id}'
+        folder.mkdir(parents=True)
+        for number in range(2):
+            face = rng.integers(0, 256, (60, 60), dtype=np.uint8)
+            cv2.imwrite(str(folder / f'user.{electeur_id}.{number}.jpg'), face)
+
+    store = ModelStore(str(tmp_path / 'store'))
+    # Même interface que FaceEngine pour rebuild_models
+    return SimpleNamespace(
+        model_store=store,
+        duplicate_index=DuplicateIndex(store.root, store.dim, store=store),
+        model_cache=ModelCache(),
+        faces_data_path=str(faces_data),
+        face_size=(50, 50),
+        equalize=False
+    )
+
+
+def test_checkpoint_ignores_partial_line(tmp_path):
+    path = str(tmp_path / CHECKPOINT_FILENAME)
+    checkpoint = RebuildCheckpoint(path, {'equalize': False}).open()
+    checkpoint.mark([1, 2])
+    checkpoint.close()
+    with open(path, 'a') as f:
+        f.write('3')  # arrêt pendant l'écriture
+
+    assert RebuildCheckpoint(path, {'equalize': False}).open().done == {1, 2}
+    with pytest.raises(ValueError):
+        RebuildCheckpoint(path, {'equalize': True}).open()
+    assert RebuildCheckpoint(path, {'equalize': True}).open(restart=True).done == set()
+
+
+def test_rebuild_resumes_from_checkpoint(engine):
+    def interrupt(report):
+        raise Interrupted()
+
+    with pytest.raises(Interrupted):
+        rebuild_models(engine, workers=1, batch_size=2, progress=interrupt)
+
+    with open(os.path.join(engine.model_store.root, CHECKPOINT_FILENAME)) as f:
+        done = {int(line) for line in f.readlines()[1:]}
+    assert 2 <= len(done) < len(VOTERS)
+
+    report = rebuild_models(engine, workers=1, batch_size=2)
+    # Les électeurs du point de reprise ne sont pas recalculés
+    assert report['skipped'] == len(done)
+    assert report['rebuilt'] == len(VOTERS) - len(done)
+    assert report['failed'] == 0
+    assert all(engine.model_store.get(electeur_id) is not None for electeur_id in VOTERS)
+
+    assert rebuild_models(engine, workers=1)['rebuilt'] == 0
+    assert rebuild_models(engine, workers=1, restart=True)['rebuilt'] == len(VOTERS)
+
+
+def test_rebuild_refuses_other_settings(engine):
+    rebuild_models(engine, workers=1, electeur_ids={1})
+    engine.equalize = True
+    with pytest.raises(ValueError):
+        rebuild_models(engine, workers=1)
@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta
+
+from app import db
+from models import OTP
+from utils import otp_store as otp_store_module
+from utils.otp_store import OTP_EXPIRED, OTP_INVALID, OTP_OK, OTP_TOO_MANY_ATTEMPTS, OtpStore
+
+PHONE = '+33612345678'
+LIFETIME = timedelta(minutes=5)
+
+
+def issue(store, code, type_otp='login'):
+    otp = store.issue(PHONE, type_otp, code, LIFETIME)
+    db.session.commit()
+    return otp
+
+
+def test_verify_consumes_once(app):
+    store = OtpStore()
+    with app.app_context():
+        issue(store, '123456')
+        assert store.verify(PHONE, '123456') == (OTP_OK, 'login')
+        db.session.commit()
+        assert store.verify(PHONE, '123456') == (OTP_INVALID, None)
+        assert OTP.query.filter_by(numero_telephone=PHONE, utilise=False).count() == 0
+
+
+def test_new_code_replaces_previous(app):
+    store = OtpStore()
+    with app.app_context():
+        issue(store, '111111')
+        issue(store, '222222')
+        assert store.verify(PHONE, '111111') == (OTP_INVALID, None)
+        assert store.verify(PHONE, '222222') == (OTP_OK, 'login')
+
+
+def test_consumed_once_across_processes(app):
+    # Deux processus : l'un trouve le code en base, l'autre l'avait en mémoire
+    first, second = OtpStore(), OtpStore()
+    with app.app_context():
+        issue(first, '123456', 'registration')
+        assert second.verify(PHONE, '123456') == (OTP_OK, 'registration')
+        db.session.commit()
+        assert first.verify(PHONE, '123456') == (OTP_INVALID, None)
+    assert second.stats()['db_lookups'] == 1
+
+
+def test_expired(app):
+    now = [datetime.utcnow()]
+    store = OtpStore(clock=lambda: now[0])
+    with app.app_context():
+        issue(store, '123456')
+        now[0] += LIFETIME + timedelta(seconds=1)
+        assert store.verify(PHONE, '123456') == (OTP_EXPIRED, None)
+
+
+def test_lockout_after_max_attempts(app, monkeypatch):
+    monotonic = [1000.0]
+    monkeypatch.setattr(otp_store_module.time, 'monotonic', lambda: monotonic[0])
+    store = OtpStore(max_attempts=3, attempt_window=60.0)
+    with app.app_context():
+        issue(store, '123456')
+        for _ in range(3):
+            assert store.verify(PHONE, '000000') == (OTP_INVALID, None)
+        # Même le bon code est refusé jusqu'à la fin de la fenêtre, sans être consommé
+        assert store.verify(PHONE, '123456') == (OTP_TOO_MANY_ATTEMPTS, None)
+        assert store.verify('+33600000000', '000000') == (OTP_INVALID, None)
+
+        monotonic[0] += 60.0
+        assert store.verify(PHONE, '123456') == (OTP_OK, 'login')
+
+
+def test_success_resets_attempts(app):
+    store = OtpStore(max_attempts=3)
+    with app.app_context():
+        issue(store, '123456')
+        for _ in range(2):
+            store.verify(PHONE, '000000')
+        assert store.verify(PHONE, '123456') == (OTP_OK, 'login')
+        issue(store, '654321')
+        for _ in range(2):
+            store.verify(PHONE, '000000')
+        assert store.verify(PHONE, '654321') == (OTP_OK, 'login')
+
+
+def test_verify_otp_route_lockout(app, client, monkeypatch):
+    monkeypatch.setitem(app.config, 'OTP_MAX_ATTEMPTS', 2)
+    with app.app_context():
+        issue(otp_store_module.get_otp_store(), '123456', 'registration')
+
+    for _ in range(2):
+        response = client.post('/api/auth/verify-otp', json={'numero_telephone': PHONE, 'otp_code': '000000'})
+        assert response.status_code == 400
+    response = client.post('/api/auth/verify-otp', json={'numero_telephone': PHONE, 'otp_code': '123456'})
+    assert response.status_code == 429
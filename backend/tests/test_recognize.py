@@ -0,0 +1,21 @@
+import cv2
+import numpy as np
+
+
+def jpeg():
+    ok, encoded = cv2.imencode('.jpg', np.zeros((64, 64, 3), np.uint8))
+    assert ok
+    return encoded.tobytes()
+
+
+def test_recognize_raw_body_ignores_token_in_url(client):
+    response = client.post('/api/face/recognize?session_token=tok', data=jpeg(), content_type='image/jpeg')
+    assert response.status_code == 400
+
+
+def test_recognize_raw_body_bearer_token(client):
+    response = client.post('/api/face/recognize', data=jpeg(), content_type='image/jpeg',
+                           headers={'Authorization': 'Bearer inconnu'})
+    # Jeton lu depuis l'en-tête, puis refusé (aucune session)
+    assert response.status_code == 401
+    assert response.get_json()['message'] == 'Session invalide.'
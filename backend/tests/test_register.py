@@ -0,0 +1,80 @@
+import io
+
+import pytest
+
+from app import db
+from models import Electeur
+from routes import auth
+from utils.voter_import import import_voters
+
+
+@pytest.fixture
+def otp_code(monkeypatch):
+    monkeypatch.setattr(auth, 'generate_otp', lambda: '123456')
+    return '123456'
+
+
+def import_list(app, *rows):
+    lines = ['identifiant_electeur,identifiant_aadhar,numero_telephone', *(','.join(row) for row in rows)]
+    with app.app_context():
+        report = import_voters(io.StringIO('\n'.join(lines) + '\n'), 'csv')
+    assert report['importes'] == len(rows)
+
+
+def test_register_new_voter(app, client, otp_code):
+    response = client.post('/api/auth/register', json={
+        'identifiant_electeur': 'E000001', 'identifiant_aadhar': 'A000001', 'numero_telephone': '+33612345601'
+    })
+    assert response.status_code == 201
+    assert client.post('/api/auth/verify-otp', json={
+        'numero_telephone': '+33612345601', 'otp_code': otp_code
+    }).get_json()['next_step'] == 'face_capture'
+
+
+def test_register_completes_imported_voter(app, client, otp_code):
+    import_list(app, ('E000002', 'A000002', '06 12 34 56 02'))
+
+    response = client.post('/api/auth/register', json={
+        'identifiant_electeur': 'E000002', 'identifiant_aadhar': 'A000002', 'numero_telephone': '0612345602'
+    })
+    assert response.status_code == 200, response.get_json()
+    body = response.get_json()
+    assert body['next_step'] == 'verify_otp'
+
+    with app.app_context():
+        electeur = Electeur.query.filter_by(identifiant_electeur='E000002').one()
+        assert body['electeur_id'] == electeur.id
+        assert body['numero_telephone'] == electeur.numero_telephone
+        assert Electeur.query.count() == 1
+
+    # OTP envoyé au numéro enregistré par l'import, puis capture faciale
+    response = client.post('/api/auth/verify-otp', json={
+        'numero_telephone': body['numero_telephone'], 'otp_code': otp_code
+    })
+    assert response.status_code == 200
+    assert response.get_json()['next_step'] == 'face_capture'
+
+
+def test_register_imported_voter_identifiers_must_match(app, client, otp_code):
+    import_list(app, ('E000003', 'A000003', '0612345603'))
+
+    response = client.post('/api/auth/register', json={
+        'identifiant_electeur': 'E000003', 'identifiant_aadhar': 'A999999', 'numero_telephone': '0612345603'
+    })
+    assert response.status_code == 409
+    response = client.post('/api/auth/register', json={
+        'identifiant_electeur': 'E000003', 'identifiant_aadhar': 'A000003', 'numero_telephone': '0699999999'
+    })
+    assert response.status_code == 409
+
+
+def test_register_enrolled_voter(app, client, otp_code):
+    import_list(app, ('E000004', 'A000004', '0612345604'))
+    with app.app_context():
+        Electeur.query.filter_by(identifiant_electeur='E000004').one().modele_facial_entraine = True
+        db.session.commit()
+
+    response = client.post('/api/auth/register', json={
+        'identifiant_electeur': 'E000004', 'identifiant_aadhar': 'A000004', 'numero_telephone': '0612345604'
+    })
+    assert response.status_code == 409
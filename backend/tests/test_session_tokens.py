@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+from utils.session_tokens import ALL_STEPS, STEP_CREDENTIALS, SessionTokenService, new_session_id
+
+
+def issue(service, electeur_id, steps=ALL_STEPS, sid=None):
+    return service.issue(electeur_id, steps, datetime.utcnow() + timedelta(minutes=30), sid or new_session_id())
+
+
+def test_validate(app):
+    service = SessionTokenService('secret')
+    with app.app_context():
+        token = issue(service, 7)
+        assert service.validate(token)['electeur_id'] == 7
+        # Étapes manquantes, signature modifiée, autre clé, jeton non ASCII
+        assert service.validate(issue(service, 7, steps=STEP_CREDENTIALS)) is None
+        assert service.validate(token[:-1] + ('A' if token[-1] != 'A' else 'B')) is None
+        assert SessionTokenService('autre').validate(token) is None
+        assert service.validate(token[:-1] + 'é') is None
+    assert service.stats()['rejected'] == {'steps': 1, 'signature': 1, 'format': 1}
+
+
+def test_expired(app):
+    service = SessionTokenService('secret')
+    token = service.issue(7, ALL_STEPS, datetime.utcnow() - timedelta(seconds=1), new_session_id())
+    with app.app_context():
+        assert service.validate(token) is None
+
+
+def test_revoke_session(app):
+    service = SessionTokenService('secret')
+    with app.app_context():
+        token, other = issue(service, 7), issue(service, 7)
+        service.revoke_session(service.validate(token))
+        assert service.validate(token) is None
+        # Seule la session du jeton est révoquée
+        assert service.validate(other) is not None
+
+
+def test_revoke_voter(app):
+    service = SessionTokenService('secret')
+    with app.app_context():
+        tokens = [issue(service, 7) for _ in range(3)]
+        service.revoke_voter(7)
+        assert all(service.validate(token) is None for token in tokens)
+        assert service.validate(issue(service, 8)) is not None
+
+
+def test_revocation_shared_through_database(app):
+    # Deux processus : la révocation écrite par l'un est relue par l'autre
+    writer = SessionTokenService('secret', refresh_interval=0)
+    reader = SessionTokenService('secret', refresh_interval=0)
+    with app.app_context():
+        token = issue(writer, 7)
+        assert reader.validate(token) is not None
+        writer.revoke_session(writer.validate(token))
+        assert reader.validate(token) is None
+
+
+def test_logout_revokes_bearer_token(app):
+    from utils.session_tokens import get_token_service
+
+    with app.app_context():
+        token = issue(get_token_service(), 7)
+
+    headers = {'Authorization': f'Bearer {token}'}
+    assert app.test_client().get('/api/vote/candidates', headers=headers).status_code == 200
+    assert app.test_client().post('/api/auth/logout', headers=headers).status_code == 200
+    assert app.test_client().get('/api/vote/candidates', headers=headers).status_code == 401
@@ -0,0 +1,25 @@
+from models import Electeur
+from utils import sms_dispatch
+
+
+def test_queue_sms_provider_failure(app, monkeypatch):
+    # Hors DEBUG/TESTING : twilio, absent ou sans identifiants ici
+    monkeypatch.setitem(app.config, 'SMS_PROVIDER', 'twilio')
+    monkeypatch.setattr(sms_dispatch, '_sms_dispatcher', None)
+
+    with app.app_context():
+        assert sms_dispatch.queue_sms('+33612345678', 'code') is False
+    assert sms_dispatch._sms_dispatcher is None
+
+
+def test_register_provider_failure(app, client, monkeypatch):
+    monkeypatch.setitem(app.config, 'SMS_PROVIDER', 'twilio')
+    monkeypatch.setattr(sms_dispatch, '_sms_dispatcher', None)
+
+    response = client.post('/api/auth/register', json={
+        'identifiant_electeur': 'E000001', 'identifiant_aadhar': 'A000001', 'numero_telephone': '+33612345601'
+    })
+    # L'inscription est validée : la réponse ne la présente pas comme un échec
+    assert response.status_code == 201, response.get_json()
+    with app.app_context():
+        assert Electeur.query.filter_by(identifiant_electeur='E000001').count() == 1
@@ -0,0 +1,107 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from models import Electeur, TrainingJob
+from utils.training_queue import DONE, FAILED, PENDING, RUNNING, QueueFullError, TrainingQueue
+
+
+def add_voters(app, count):
+    with app.app_context():
+        electeurs = [Electeur(identifiant_electeur=f'E{n:06d}', identifiant_aadhar=f'A{n:06d}',
+                              numero_telephone=f'+2376{n:08d}') for n in range(count)]
+        db.session.add_all(electeurs)
+        db.session.commit()
+        return [electeur.id for electeur in electeurs]
+
+
+def test_claim_fifo(app):
+    ids = add_voters(app, 2)
+    queue = TrainingQueue(app, handler=None, workers=0)
+    with app.app_context():
+        first, second = (queue.enqueue(electeur_id).id for electeur_id in ids)
+
+        job = queue._claim()
+        assert (job.id, job.statut, job.tentatives) == (first, RUNNING, 1)
+        assert job.date_debut is not None
+        # Une tâche réservée n'est plus proposée, y compris à un autre processus
+        assert TrainingQueue(app, handler=None, workers=0)._claim().id == second
+        assert queue._claim() is None
+
+
+def test_capacity(app):
+    ids = add_voters(app, 2)
+    queue = TrainingQueue(app, handler=None, workers=0, max_pending=1)
+    with app.app_context():
+        queue.enqueue(ids[0])
+        with pytest.raises(QueueFullError):
+            queue.enqueue(ids[1])
+        assert TrainingJob.query.count() == 1
+    assert queue.rejected == 1
+
+
+def test_recover_stale(app):
+    ids = add_voters(app, 2)
+    queue = TrainingQueue(app, handler=None, workers=0, job_timeout=600)
+    with app.app_context():
+        stale, recent = (queue.enqueue(electeur_id).id for electeur_id in ids)
+        queue._claim()
+        queue._claim()
+        db.session.get(TrainingJob, stale).date_debut = datetime.utcnow() - timedelta(seconds=601)
+        db.session.commit()
+
+        queue._recover_stale()
+        assert db.session.get(TrainingJob, stale).statut == PENDING
+        assert db.session.get(TrainingJob, recent).statut == RUNNING
+        assert queue.recovered == 1
+
+        # Reprise : nouvelle tentative sur la tâche abandonnée
+        job = queue._claim()
+        assert (job.id, job.tentatives) == (stale, 2)
+
+
+def test_run_outcomes(app):
+    ids = add_voters(app, 2)
+    outcomes = {ids[0]: (True, 'ok')}
+
+    def handler(electeur_id):
+        if electeur_id not in outcomes:
+            raise RuntimeError('modèle illisible')
+        return outcomes[electeur_id]
+
+    queue = TrainingQueue(app, handler, workers=0)
+    with app.app_context():
+        done, failed = (queue.enqueue(electeur_id).id for electeur_id in ids)
+        queue._run(queue._claim())
+        queue._run(queue._claim())
+
+        assert db.session.get(TrainingJob, done).statut == DONE
+        job = db.session.get(TrainingJob, failed)
+        assert job.statut == FAILED
+        assert 'modèle illisible' in job.message
+        assert job.date_fin is not None
+    assert (queue.completed, queue.failed) == (1, 1)
+
+
+def test_worker_processes_jobs(app):
+    ids = add_voters(app, 3)
+    trained = []
+    queue = TrainingQueue(app, lambda electeur_id: (trained.append(electeur_id) or True, 'ok'),
+                          workers=2, poll_interval=0.05)
+    queue.start()
+    try:
+        with app.app_context():
+            for electeur_id in ids:
+                queue.enqueue(electeur_id)
+            deadline = time.monotonic() + 10
+            while TrainingJob.query.filter_by(statut=DONE).count() < len(ids) and time.monotonic() < deadline:
+                db.session.rollback()
+                time.sleep(0.02)
+            assert TrainingJob.query.filter_by(statut=DONE).count() == len(ids)
+    finally:
+        queue.stop()
+
+    # Chaque tâche exécutée une seule fois
+    assert sorted(trained) == ids
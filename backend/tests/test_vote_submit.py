@@ -0,0 +1,83 @@
+from datetime import datetime
+
+import pytest
+
+from app import db
+from models import Compteur, DecompteVotes, Electeur, Vote
+from utils import tally, vote_writer
+
+
+def add_voter(app, n):
+    with app.app_context():
+        electeur = Electeur(
+            identifiant_electeur=f'E{n:06d}',
+            identifiant_aadhar=f'A{n:06d}',
+            numero_telephone=f'+2376{n:08d}',
+            date_inscription=datetime.utcnow(),
+            modele_facial_entraine=True
+        )
+        db.session.add(electeur)
+        db.session.commit()
+        return electeur.id
+
+
+def login(client, electeur_id):
+    with client.session_transaction() as session:
+        session['logged_in'] = True
+        session['electeur_id'] = electeur_id
+
+
+@pytest.fixture(params=[False, True], ids=['direct', 'group_commit'])
+def group_commit(request, app, monkeypatch):
+    monkeypatch.setitem(app.config, 'VOTE_GROUP_COMMIT', request.param)
+    return request.param
+
+
+def test_submit_vote(app, client, group_commit):
+    batches = vote_writer._vote_writer.stats()['batches'] if vote_writer._vote_writer else 0
+    electeur_id = add_voter(app, 1)
+
+    login(client, electeur_id)
+    response = client.post('/api/vote/submit', json={'candidat_id': 2})
+    assert response.status_code == 201, response.get_json()
+    assert response.get_json()['success'] is True
+
+    with app.app_context():
+        assert Vote.query.filter_by(id_electeur=electeur_id, id_candidat=2).count() == 1
+        assert db.session.get(Electeur, electeur_id).a_vote is True
+        assert db.session.get(DecompteVotes, 2).votes == 1
+        assert db.session.get(Compteur, tally.TOTAL_VOTES).valeur == 1
+
+    # Le vote est passé par le thread d'écriture groupée si et seulement si l'option est active
+    writer = vote_writer._vote_writer
+    assert (writer is not None and writer.stats()['batches'] > batches) == group_commit
+
+
+def test_submit_vote_twice(app, client, group_commit):
+    electeur_id = add_voter(app, 2)
+
+    login(client, electeur_id)
+    assert client.post('/api/vote/submit', json={'candidat_id': 1}).status_code == 201
+    login(client, electeur_id)
+    response = client.post('/api/vote/submit', json={'candidat_id': 3})
+    assert response.status_code == 403
+
+    with app.app_context():
+        assert Vote.query.filter_by(id_electeur=electeur_id).count() == 1
+        assert db.session.get(Compteur, tally.TOTAL_VOTES).valeur == 1
+
+
+def test_submit_vote_unknown_candidate(app, client, group_commit):
+    electeur_id = add_voter(app, 3)
+
+    login(client, electeur_id)
+    response = client.post('/api/vote/submit', json={'candidat_id': 999})
+    assert response.status_code == 404
+
+    with app.app_context():
+        assert Vote.query.count() == 0
+        assert db.session.get(Electeur, electeur_id).a_vote is False
+
+
+def test_submit_vote_unauthenticated(client):
+    assert client.post('/api/vote/submit', json={'candidat_id': 1}).status_code == 401
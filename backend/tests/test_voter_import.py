@@ -0,0 +1,78 @@
+import io
+import json
+
+from app import db
+from models import Compteur, Electeur
+from utils import tally
+from utils.voter_import import (REJECT_DUPLICATE_AADHAR, REJECT_DUPLICATE_ELECTEUR, REJECT_MALFORMED,
+                                REJECT_MISSING, REJECT_PHONE, import_voters)
+
+
+def csv_stream(*rows):
+    lines = ['identifiant_electeur,identifiant_aadhar,numero_telephone', *(','.join(row) for row in rows)]
+    return io.StringIO('\n'.join(lines) + '\n')
+
+
+def total_electeurs():
+    return db.session.get(Compteur, tally.TOTAL_ELECTEURS).valeur
+
+
+def test_import_rejects(app):
+    stream = io.StringIO('\n'.join([
+        json.dumps({'identifiant_electeur': 'E1', 'identifiant_aadhar': 'A1', 'numero_telephone': '0612345601'}),
+        json.dumps({'identifiant_electeur': 'E1', 'identifiant_aadhar': 'A2', 'numero_telephone': '0612345602'}),
+        json.dumps({'identifiant_electeur': 'E3', 'identifiant_aadhar': 'A1', 'numero_telephone': '0612345603'}),
+        json.dumps({'identifiant_electeur': 'E4', 'identifiant_aadhar': 'A4', 'numero_telephone': '12'}),
+        json.dumps({'identifiant_electeur': 'E5', 'identifiant_aadhar': 'A5'}),
+        '{pas du json',
+    ]) + '\n')
+    with app.app_context():
+        report = import_voters(stream, 'ndjson', chunk_size=2)
+        assert Electeur.query.count() == 1
+        assert total_electeurs() == 1
+
+    assert (report['lus'], report['importes'], report['rejetes']) == (6, 1, 5)
+    assert report['motifs'] == {REJECT_DUPLICATE_ELECTEUR: 1, REJECT_DUPLICATE_AADHAR: 1, REJECT_PHONE: 1,
+                                REJECT_MISSING: 1, REJECT_MALFORMED: 1}
+    assert [row['ligne'] for row in report['rejets']] == [2, 3, 4, 5, 6]
+
+
+def test_import_retries_chunk_after_concurrent_registration(app):
+    client = app.test_client()
+
+    def register_during_import(report):
+        # Inscriptions concurrentes après le chargement des identifiants existants :
+        # le second paquet entre en conflit (identifiant électeur, puis Aadhar)
+        if report['lus'] == 3:
+            for identifiant, aadhar, phone in (('E4', 'X4', '+33612345694'), ('X5', 'A5', '+33612345695')):
+                response = client.post('/api/auth/register', json={
+                    'identifiant_electeur': identifiant, 'identifiant_aadhar': aadhar, 'numero_telephone': phone
+                })
+                assert response.status_code == 201
+
+    stream = csv_stream(*((f'E{n}', f'A{n}', f'061234560{n}') for n in range(1, 7)))
+    with app.app_context():
+        report = import_voters(stream, 'csv', chunk_size=3, progress=register_during_import)
+
+        # Le paquet est rejoué sans les deux lignes devenues doublons
+        assert {e.identifiant_electeur for e in Electeur.query.all()} == {'E1', 'E2', 'E3', 'E4', 'E6', 'X5'}
+        assert db.session.query(Electeur.identifiant_aadhar).filter_by(identifiant_electeur='E4').scalar() == 'X4'
+        assert total_electeurs() == 6
+
+    assert (report['importes'], report['rejetes']) == (4, 2)
+    assert report['motifs'] == {REJECT_DUPLICATE_ELECTEUR: 1, REJECT_DUPLICATE_AADHAR: 1}
+    assert [row['ligne'] for row in report['rejets']] == [5, 6]
+
+
+def test_import_route_requires_token(app, client, monkeypatch):
+    body = csv_stream(('E1', 'A1', '0612345601')).getvalue()
+    monkeypatch.setitem(app.config, 'VOTER_IMPORT_TOKEN', None)
+    assert client.post('/api/auth/import-voters', data=body, content_type='text/csv').status_code == 403
+
+    monkeypatch.setitem(app.config, 'VOTER_IMPORT_TOKEN', 'jeton')
+    assert client.post('/api/auth/import-voters', data=body, content_type='text/csv',
+                       headers={'X-Import-Token': 'autre'}).status_code == 403
+    response = client.post('/api/auth/import-voters', data=body, content_type='text/csv',
+                           headers={'X-Import-Token': 'jeton'})
+    assert response.status_code == 200
+    assert response.get_json()['importes'] == 1
@@ -0,0 +1,258 @@
+import threading
+import time
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+
+from models import db, Candidat, Electeur, Vote
+from utils import metrics, tally
+
+# Issues de cast_vote()
+VOTE_OK = 'ok'
+VOTE_ALREADY_CAST = 'already_voted'
+VOTE_UNKNOWN_VOTER = 'unknown_voter'
+VOTE_UNKNOWN_CANDIDATE = 'unknown_candidate'
+
+
+class CandidateRegistry:
+    """
+    Candidats gardés en mémoire (id -> to_dict()).
+
+    La liste des candidats ne change qu'à l'initialisation de la base : le vote
+    vérifie l'existence du candidat sans requête. Un identifiant inconnu
+    déclenche au plus un rechargement par `refresh_interval` secondes (candidat
+    ajouté par un autre processus) sans permettre de marteler la base avec des
+    identifiants invalides.
+    """
+
+    def __init__(self, refresh_interval=30.0):
+        self.refresh_interval = refresh_interval
+
+        self._candidates = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+
+    def _load(self):
+        candidates = {c.id: c.to_dict() for c in Candidat.query.all()}
+        self._candidates = candidates
+        self._loaded_at = time.monotonic()
+        self.reloads += 1
+        return candidates
+
+    def _snapshot(self):
+        candidates = self._candidates
+        if candidates is None:
+            with self._lock:
+                candidates = self._candidates if self._candidates is not None else self._load()
+        return candidates
+
+    def get(self, candidat_id):
+        """
+        Candidat sérialisé, ou None s'il n'existe pas
+
+        Args:
+            candidat_id (int): Identifiant du candidat
+        """
+        candidat = self._snapshot().get(candidat_id)
+        if candidat is not None:
+            self.hits += 1
+            return candidat
+
+        with self._lock:
+            if time.monotonic() - self._loaded_at >= self.refresh_interval:
+                candidat = self._load().get(candidat_id)
+        if candidat is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return candidat
+
+    def all(self):
+        """Tous les candidats sérialisés, par identifiant croissant"""
+        candidates = self._snapshot()
+        return [candidates[candidat_id] for candidat_id in sorted(candidates)]
+
+    def invalidate(self):
+        """Forcer le rechargement au prochain accès (après ajout de candidats)"""
+        with self._lock:
+            self._candidates = None
+
+    def stats(self):
+        candidates = self._candidates
+        return {
+            'candidates': len(candidates) if candidates is not None else 0,
+            'hits': self.hits,
+            'misses': self.misses,
+            'reloads': self.reloads
+        }
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+_lock = threading.Lock()
+_stats = {
+    VOTE_OK: 0,
+    VOTE_ALREADY_CAST: 0,
+    VOTE_UNKNOWN_VOTER: 0,
+    VOTE_UNKNOWN_CANDIDATE: 0,
+    'unique_conflicts': 0
+}
+
+
+def _bump(key):
+    with _lock:
+        _stats[key] += 1
+
+
+def get_candidate_registry():
+    """Obtenir le registre des candidats du processus"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = CandidateRegistry(
+                    refresh_interval=current_app.config.get('VOTE_CANDIDATES_REFRESH', 30.0)
+                )
+    return _registry
+
+
+def invalidate_candidates():
+    """Recharger la liste des candidats au prochain vote (sans effet si elle n'a pas été chargée)"""
+    if _registry is not None:
+        _registry.invalidate()
+
+
+def _resolve_candidate(candidat_id):
+    """Candidat sérialisé depuis le registre, None si inconnu ou identifiant invalide"""
+    try:
+        return get_candidate_registry().get(int(candidat_id))
+    except (TypeError, ValueError):
+        return None
+
+
+def _claim(electeur_id):
+    """Consommer le droit de vote : 1 si la ligne passe de « n'a pas voté » à « a voté »"""
+    return db.session.execute(
+        db.update(Electeur)
+        .where(Electeur.id == electeur_id, Electeur.a_vote.is_not(True))
+        .values(a_vote=True)
+    ).rowcount
+
+
+def _insert_vote(electeur_id, candidat_id, heure_vote):
+    return db.session.execute(
+        db.insert(Vote).values(id_electeur=electeur_id, id_candidat=candidat_id, heure_vote=heure_vote)
+    ).inserted_primary_key[0]
+
+
+def _refusal(electeur_id):
+    """Chemin rare : distinguer l'électeur inconnu du double vote"""
+    return VOTE_ALREADY_CAST if db.session.get(Electeur, electeur_id) else VOTE_UNKNOWN_VOTER
+
+
+def cast_vote(electeur_id, candidat_id):
+    """
+    Enregistrer le vote d'un électeur en une transaction courte
+
+    Le droit de vote est consommé par un UPDATE conditionnel
+    (a_vote passe à vrai seulement s'il ne l'était pas) : de deux requêtes
+    concurrentes, une seule modifie la ligne, sans lecture préalable ni
+    verrou applicatif. Le vote et le décompte sont insérés dans la même
+    transaction ; l'index unique votes.id_electeur rejette en dernier recours
+    un second vote (base partagée avec un chemin d'écriture plus ancien).
+
+    Args:
+        electeur_id (int): Électeur authentifié
+        candidat_id: Identifiant du candidat (entier ou chaîne numérique)
+
+    Returns:
+        tuple: (issue VOTE_*, dict du vote {'id', 'heure_vote', 'candidat'} ou None)
+    """
+    candidat = _resolve_candidate(candidat_id)
+    if candidat is None:
+        _bump(VOTE_UNKNOWN_CANDIDATE)
+        return VOTE_UNKNOWN_CANDIDATE, None
+
+    heure_vote = datetime.utcnow()
+    try:
+        if not _claim(electeur_id):
+            db.session.rollback()
+            outcome = _refusal(electeur_id)
+            _bump(outcome)
+            return outcome, None
+
+        vote_id = _insert_vote(electeur_id, candidat['id'], heure_vote)
+        # Décompte matérialisé mis à jour dans la même transaction que le vote
+        tally.record_vote(candidat['id'], heure_vote)
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        _bump('unique_conflicts')
+        _bump(VOTE_ALREADY_CAST)
+        return VOTE_ALREADY_CAST, None
+
+    _bump(VOTE_OK)
+    return VOTE_OK, {'id': vote_id, 'heure_vote': heure_vote, 'candidat': candidat}
+
+
+def cast_votes(intents):
+    """
+    Enregistrer un lot de votes en une seule transaction (écriture groupée)
+
+    Même garantie que cast_vote pour chaque vote (UPDATE conditionnel par
+    électeur), mais un seul commit pour tout le lot et un UPDATE du décompte
+    par candidat. Si le lot viole l'index unique (vote écrit par un autre
+    chemin), il est annulé et rejoué vote par vote.
+
+    Args:
+        intents (list): Couples (electeur_id, candidat_id)
+
+    Returns:
+        list: (issue VOTE_*, dict du vote ou None), dans l'ordre des intentions
+    """
+    results = [None] * len(intents)
+    refused = []
+    counts = {}
+    seen = set()
+    heure_vote = datetime.utcnow()
+    try:
+        for i, (electeur_id, candidat_id) in enumerate(intents):
+            candidat = _resolve_candidate(candidat_id)
+            if candidat is None:
+                results[i] = (VOTE_UNKNOWN_CANDIDATE, None)
+            elif electeur_id in seen or not _claim(electeur_id):
+                refused.append(i)
+            else:
+                seen.add(electeur_id)
+                vote_id = _insert_vote(electeur_id, candidat['id'], heure_vote)
+                counts[candidat['id']] = counts.get(candidat['id'], 0) + 1
+                results[i] = (VOTE_OK, {'id': vote_id, 'heure_vote': heure_vote, 'candidat': candidat})
+        tally.record_votes(counts, heure_vote)
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        _bump('unique_conflicts')
+        return [cast_vote(electeur_id, candidat_id) for electeur_id, candidat_id in intents]
+
+    for i in refused:
+        results[i] = (_refusal(intents[i][0]), None)
+    for outcome, _ in results:
+        _bump(outcome)
+    return results
+
+
+def stats():
+    """Issues des votes et état du registre des candidats"""
+    with _lock:
+        result = dict(_stats)
+    result['candidates'] = _registry.stats() if _registry is not None else {'candidates': 0}
+    return result
+
+
+metrics.register('ballot', stats)
@@ -0,0 +1,133 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+from flask import current_app
+
+from utils import metrics
+
+STAGES = ('decode', 'detect', 'encode', 'write')
+
+
+class CapturePipeline:
+    """
+    Traitement par lots des images de capture faciale.
+
+    Le décodage, la détection et l'encodage JPEG de chaque image s'exécutent
+    sur un pool de threads borné (OpenCV relâche le GIL pendant ces appels) ;
+    les fichiers sont ensuite écrits en une seule passe. Le résultat de chaque
+    image est conservé, dans l'ordre de la requête.
+    """
+
+    def __init__(self, max_workers=4):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='capture')
+        self._lock = threading.Lock()
+
+        self.batches = 0
+        self.images = 0
+        self.rejected = 0
+        self._stage_totals = dict.fromkeys(STAGES, 0.0)
+
+    def _process_one(self, image, decode, extract):
+        """Décoder, extraire le visage et l'encoder (exécuté dans le pool)"""
+        timings = dict.fromkeys(STAGES, 0.0)
+
+        start = time.perf_counter()
+        img = decode(image)
+        timings['decode'] = time.perf_counter() - start
+        if img is None:
+            return None, "Image invalide.", timings
+
+        start = time.perf_counter()
+        face, error = extract(img)
+        timings['detect'] = time.perf_counter() - start
+        if face is None:
+            return None, error, timings
+
+        start = time.perf_counter()
+        ok, encoded = cv2.imencode('.jpg', face)
+        timings['encode'] = time.perf_counter() - start
+        if not ok:
+            return None, "Échec de l'encodage JPEG.", timings
+        return encoded, None, timings
+
+    def run(self, images, decode, extract, folder, filename):
+        """
+        Traiter un lot d'images et écrire les visages retenus
+
+        Args:
+            images (list): Images brutes de la requête
+            decode (callable): image brute -> image BGR ou None
+            extract (callable): image BGR -> (visage prétraité, message d'erreur)
+            folder (str): Dossier de destination
+            filename (callable): numéro (1..n) du visage retenu -> nom de fichier
+
+        Returns:
+            tuple: (nb de visages écrits, erreurs [(index, message)], durées par étape en ms)
+        """
+        start = time.perf_counter()
+        results = list(self._executor.map(lambda image: self._process_one(image, decode, extract), images))
+        wall = time.perf_counter() - start
+
+        stage_totals = dict.fromkeys(STAGES, 0.0)
+        errors = []
+        accepted = []
+        for i, (encoded, error, timings) in enumerate(results):
+            for stage, elapsed in timings.items():
+                stage_totals[stage] += elapsed
+            if encoded is None:
+                errors.append((i, error))
+            else:
+                accepted.append(encoded)
+
+        # Écriture groupée : une passe séquentielle après le traitement parallèle
+        start = time.perf_counter()
+        os.makedirs(folder, exist_ok=True)
+        for number, encoded in enumerate(accepted, start=1):
+            with open(os.path.join(folder, filename(number)), 'wb') as f:
+                f.write(encoded.tobytes())
+        stage_totals['write'] = time.perf_counter() - start
+
+        with self._lock:
+            self.batches += 1
+            self.images += len(images)
+            self.rejected += len(errors)
+            for stage, elapsed in stage_totals.items():
+                self._stage_totals[stage] += elapsed
+
+        timings_ms = {stage: round(elapsed * 1000, 3) for stage, elapsed in stage_totals.items()}
+        timings_ms['process_wall'] = round(wall * 1000, 3)
+        return len(accepted), errors, timings_ms
+
+    def stats(self):
+        """Volumes traités et temps cumulé par étape"""
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'batches': self.batches,
+                'images': self.images,
+                'rejected': self.rejected,
+                'stage_time_total_ms': {stage: round(total * 1000, 3) for stage, total in self._stage_totals.items()}
+            }
+
+
+_capture_pipeline = None
+_capture_pipeline_lock = threading.Lock()
+
+
+def get_capture_pipeline():
+    """Obtenir le pipeline de capture du processus (taille du pool depuis la configuration)"""
+    global _capture_pipeline
+    if _capture_pipeline is None:
+        with _capture_pipeline_lock:
+            if _capture_pipeline is None:
+                _capture_pipeline = CapturePipeline(
+                    max_workers=current_app.config.get('FACE_CAPTURE_WORKERS', min(8, os.cpu_count() or 1))
+                )
+    return _capture_pipeline
+
+
+metrics.register('capture_pipeline', lambda: _capture_pipeline.stats() if _capture_pipeline is not None else {'batches': 0})
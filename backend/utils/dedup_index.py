@@ -0,0 +1,336 @@
+import json
+import os
+import threading
+import time
+
+import numpy as np
+from flask import current_app
+
+from utils import metrics
+from utils.lbph import LBPH_PARAMS, chi_square_distances
+from utils.model_store import get_model_store
+
+try:
+    import fcntl
+except ImportError:  # Windows : verrou inter-processus indisponible
+    fcntl = None
+
+DEFAULT_LSH_PARAMS = {
+    'tables': 16,
+    'bits': 16,
+    'seed': 20240601
+}
+
+
+def default_center(dim, bins=256):
+    """
+    Centre indépendant des données : descripteur d'un histogramme LBPH plat
+    (chaque code de chaque cellule également probable)
+
+    Contrairement au descripteur d'un électeur, il ne coïncide avec aucun
+    visage enrôlé ; une image uniforme (un seul code par cellule) écarterait
+    tous les visages dans la même direction et surchargerait quelques seaux.
+    """
+    return np.full(dim, np.sqrt(1.0 / bins), dtype=np.float32)
+
+
+class DuplicateIndex:
+    """
+    Index LSH des visages enrôlés pour détecter les doubles inscriptions.
+
+    Chaque électeur est résumé par un descripteur : moyenne des racines carrées
+    de ses histogrammes LBPH (la distance euclidienne entre racines approche la
+    distance chi-carré), centrée. Le descripteur est haché par `tables`
+    familles de `bits` hyperplans aléatoires.
+
+    - lsh.bin        : journal (electeur_id, clé de chaque table) en ajout seul
+    - lsh_center.f32 : centre des descripteurs, fixé une fois pour toutes (moyenne
+                       des électeurs déjà stockés, sinon default_center)
+    - lsh_meta.json  : paramètres (tables, bits, graine) partagés par les processus
+
+    En mémoire, chaque table est un tableau de clés trié (recherche dichotomique)
+    complété d'un tampon d'ajouts récents fusionné par lots : une requête coûte
+    O(tables * log N + candidats) au lieu d'une comparaison à chaque électeur.
+    """
+
+    def __init__(self, root, dim, params=None, store=None, merge_threshold=4096):
+        self.root = root
+        self.dim = dim
+        self.store = store
+        self.merge_threshold = merge_threshold
+        os.makedirs(root, exist_ok=True)
+
+        self.log_path = os.path.join(root, 'lsh.bin')
+        self.center_path = os.path.join(root, 'lsh_center.f32')
+        self.meta_path = os.path.join(root, 'lsh_meta.json')
+        self.lock_path = os.path.join(root, '.lsh.lock')
+
+        self.params = self._load_or_create_meta(params or DEFAULT_LSH_PARAMS)
+        self.tables = self.params['tables']
+        self.bits = self.params['bits']
+        self.record_dtype = np.dtype([('electeur_id', '<i8'), ('keys', '<u4', (self.tables,))])
+
+        rng = np.random.default_rng(self.params['seed'])
+        self._planes = rng.standard_normal((dim, self.tables * self.bits), dtype=np.float32)
+        self._weights = (1 << np.arange(self.bits, dtype=np.uint32)).astype(np.uint32)
+        self._center = None
+
+        self._lock = threading.Lock()
+        self._log_bytes_read = 0
+        # Tables triées : clés (tables, n) et électeurs correspondants
+        self._keys = np.empty((self.tables, 0), dtype=np.uint32)
+        self._ids = np.empty((self.tables, 0), dtype=np.int64)
+        # Ajouts récents pas encore fusionnés
+        self._pending_ids = []
+        self._pending_keys = []
+        self.enrollments = 0
+
+        self.queries = 0
+        self.candidates_total = 0
+        self.duplicates_flagged = 0
+        self._query_time_total = 0.0
+
+        self.fit_center()
+
+    def _load_or_create_meta(self, params):
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path) as f:
+                return json.load(f)['params']
+
+        tmp_path = self.meta_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'params': dict(params), 'dim': self.dim}, f)
+        os.replace(tmp_path, self.meta_path)
+        return dict(params)
+
+    # --- Descripteurs et clés ---
+
+    def _get_center(self, center=None):
+        """Lire le centre partagé, ou le fixer (centre ajusté donné, sinon default_center)"""
+        if self._center is not None:
+            return self._center
+        if not os.path.exists(self.center_path):
+            if center is None:
+                neighbors = (self.store.params if self.store is not None else LBPH_PARAMS)['neighbors']
+                center = default_center(self.dim, 1 << neighbors)
+            tmp_path = f"{self.center_path}.{os.getpid()}.tmp"
+            np.asarray(center, dtype=np.float32).tofile(tmp_path)
+            try:
+                os.link(tmp_path, self.center_path)  # Échoue si un autre processus l'a fixé avant
+            except OSError:
+                pass
+            finally:
+                os.remove(tmp_path)
+        self._center = np.fromfile(self.center_path, dtype=np.float32)
+        return self._center
+
+    def fit_center(self, sample=1000):
+        """
+        Fixer le centre sur la moyenne des descripteurs d'électeurs du stockage
+
+        Appelé à la création de l'index si le stockage contient déjà des
+        électeurs ; sur un stockage vide, le centre par défaut est fixé au
+        premier enrôlement et scripts/build_dedup_index.py --rebuild le
+        réajuste une fois assez d'électeurs enrôlés.
+        """
+        if self.store is None or os.path.exists(self.center_path):
+            return
+        entries, matrix, _ = self.store.entries()
+        if not entries:
+            return
+        segments = list(entries.values())[:sample]
+        descriptors = np.vstack([self.descriptor(matrix[offset:offset + count]) for offset, count in segments])
+        self._get_center(descriptors.mean(axis=0))
+
+    def descriptor(self, histograms):
+        """Descripteur non centré d'un électeur (moyenne des racines de ses histogrammes)"""
+        histograms = np.asarray(histograms, dtype=np.float32).reshape(-1, self.dim)
+        return np.sqrt(histograms).mean(axis=0)
+
+    def keys(self, descriptors):
+        """
+        Clé de chaque table pour un descripteur (dim,) ou un lot (n, dim)
+
+        Returns:
+            np.ndarray: Clés uint32 de forme (tables,) ou (n, tables)
+        """
+        descriptors = np.asarray(descriptors, dtype=np.float32)
+        center = self._get_center()
+        projected = (descriptors - center) @ self._planes > 0
+        projected = projected.reshape(descriptors.shape[:-1] + (self.tables, self.bits))
+        return projected.astype(np.uint32) @ self._weights
+
+    # --- Index ---
+
+    def _add_records(self, records):
+        if not len(records):
+            return
+        self._pending_ids.extend(records['electeur_id'].tolist())
+        self._pending_keys.extend(records['keys'])
+        self.enrollments += len(records)
+        if len(self._pending_ids) >= self.merge_threshold:
+            self._merge()
+
+    def _merge(self):
+        """Fusionner le tampon d'ajouts dans les tables triées"""
+        if not self._pending_ids:
+            return
+        ids = np.concatenate([self._ids, np.tile(np.asarray(self._pending_ids, dtype=np.int64), (self.tables, 1))], axis=1)
+        keys = np.concatenate([self._keys, np.asarray(self._pending_keys, dtype=np.uint32).T], axis=1)
+        order = np.argsort(keys, axis=1, kind='stable')
+        self._keys = np.take_along_axis(keys, order, axis=1)
+        self._ids = np.take_along_axis(ids, order, axis=1)
+        self._pending_ids = []
+        self._pending_keys = []
+
+    def _refresh(self):
+        """Lire les enregistrements ajoutés au journal (y compris par d'autres processus)"""
+        try:
+            size = os.path.getsize(self.log_path)
+        except OSError:
+            return
+        size -= size % self.record_dtype.itemsize
+        if size <= self._log_bytes_read:
+            return
+        with open(self.log_path, 'rb') as f:
+            f.seek(self._log_bytes_read)
+            records = np.frombuffer(f.read(size - self._log_bytes_read), dtype=self.record_dtype)
+        self._add_records(records)
+        self._log_bytes_read = size
+
+    def add(self, electeur_id, histograms):
+        """Indexer les histogrammes d'un électeur nouvellement enrôlé"""
+        self.add_many([electeur_id], self.descriptor(histograms).reshape(1, -1))
+
+    def add_many(self, electeur_ids, descriptors):
+        """Indexer un lot de descripteurs en un seul ajout au journal"""
+        records = np.zeros(len(electeur_ids), dtype=self.record_dtype)
+        records['electeur_id'] = np.asarray(electeur_ids, dtype=np.int64)
+        records['keys'] = self.keys(np.asarray(descriptors, dtype=np.float32).reshape(len(electeur_ids), self.dim))
+
+        with self._lock, open(self.lock_path, 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                with open(self.log_path, 'ab') as log:
+                    log.write(records.tobytes())
+                    log.flush()
+                    os.fsync(log.fileno())
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+            self._refresh()
+
+    def indexed_ids(self):
+        """Ensemble des électeurs présents dans l'index"""
+        with self._lock:
+            self._refresh()
+            return set(self._ids[0].tolist()) | set(self._pending_ids)
+
+    def __len__(self):
+        with self._lock:
+            self._refresh()
+            return self.enrollments
+
+    # --- Requêtes ---
+
+    def candidates(self, histograms, exclude=None, limit=32):
+        """
+        Électeurs partageant au moins un seau avec les histogrammes donnés
+
+        Returns:
+            np.ndarray: Identifiants triés par nombre de tables en collision décroissant
+        """
+        descriptor = self.descriptor(histograms)
+        with self._lock:
+            self._refresh()
+            if not self.enrollments:
+                return np.empty(0, dtype=np.int64)
+            keys = self.keys(descriptor)
+
+            found = []
+            for table in range(self.tables):
+                lo = np.searchsorted(self._keys[table], keys[table], side='left')
+                hi = np.searchsorted(self._keys[table], keys[table], side='right')
+                found.append(self._ids[table, lo:hi])
+            if self._pending_ids:
+                pending_keys = np.asarray(self._pending_keys, dtype=np.uint32)
+                pending_ids = np.asarray(self._pending_ids, dtype=np.int64)
+                found.append(pending_ids[(pending_keys == keys).any(axis=1)])
+
+        found = np.concatenate(found)
+        if exclude is not None:
+            found = found[found != int(exclude)]
+        if found.size == 0:
+            return found
+        ids, counts = np.unique(found, return_counts=True)
+        order = np.argsort(-counts, kind='stable')[:limit]
+        return ids[order]
+
+    def find_duplicates(self, histograms, exclude=None, threshold=60.0, limit=32):
+        """
+        Rechercher les électeurs déjà enrôlés avec le même visage
+
+        Les candidats LSH sont vérifiés par distance chi-carré exacte sur leurs
+        histogrammes du stockage : score = médiane, sur les nouvelles images,
+        de la distance au plus proche histogramme du candidat.
+
+        Returns:
+            list: [(electeur_id, score)] sous le seuil, par score croissant
+        """
+        start = time.perf_counter()
+        histograms = np.asarray(histograms, dtype=np.float32).reshape(-1, self.dim)
+        candidates = self.candidates(histograms, exclude=exclude, limit=limit)
+
+        duplicates = []
+        for electeur_id in candidates.tolist():
+            rows = self.store.get(electeur_id) if self.store is not None else None
+            if rows is None:
+                continue  # Modèle supprimé depuis l'indexation
+            score = float(np.median([chi_square_distances(rows, probe).min() for probe in histograms]))
+            if score <= threshold:
+                duplicates.append((electeur_id, score))
+        duplicates.sort(key=lambda d: d[1])
+
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.queries += 1
+            self.candidates_total += len(candidates)
+            self.duplicates_flagged += bool(duplicates)
+            self._query_time_total += elapsed
+        return duplicates
+
+    def stats(self):
+        """Taille de l'index et coût des requêtes"""
+        with self._lock:
+            return {
+                'enrollments': self.enrollments,
+                'tables': self.tables,
+                'bits': self.bits,
+                'pending': len(self._pending_ids),
+                'queries': self.queries,
+                'duplicates_flagged': self.duplicates_flagged,
+                'avg_candidates': round(self.candidates_total / self.queries, 2) if self.queries else None,
+                'avg_query_time_ms': round(self._query_time_total / self.queries * 1000, 3) if self.queries else None
+            }
+
+
+_duplicate_index = None
+_duplicate_index_lock = threading.Lock()
+
+
+def get_duplicate_index():
+    """Obtenir l'index de doublons du processus (fichiers à côté du stockage de modèles)"""
+    global _duplicate_index
+    if _duplicate_index is None:
+        with _duplicate_index_lock:
+            if _duplicate_index is None:
+                store = get_model_store()
+                params = dict(DEFAULT_LSH_PARAMS,
+                              tables=current_app.config.get('FACE_DEDUP_TABLES', DEFAULT_LSH_PARAMS['tables']),
+                              bits=current_app.config.get('FACE_DEDUP_BITS', DEFAULT_LSH_PARAMS['bits']))
+                _duplicate_index = DuplicateIndex(store.root, store.dim, params=params, store=store)
+    return _duplicate_index
+
+
+metrics.register('duplicate_index', lambda: _duplicate_index.stats() if _duplicate_index is not None else {'enrollments': 0})
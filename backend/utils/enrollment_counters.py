@@ -0,0 +1,235 @@
+import os
+import threading
+import time
+from datetime import datetime
+
+from flask import current_app
+
+from models import db, Compteur, Electeur
+from utils import metrics, tally
+
+# Compteurs d'enrôlement (table compteurs), maintenus à la capture et à l'entraînement
+IMAGES = 'images_entrainement'
+CAPTURED = 'electeurs_captures'
+TRAINED = 'modeles_entraines'
+
+
+def count_images(folder):
+    """Nombre d'images .jpg d'un dossier d'électeur (0 s'il n'existe pas)"""
+    try:
+        with os.scandir(folder) as entries:
+            return sum(1 for entry in entries if entry.name.endswith('.jpg'))
+    except FileNotFoundError:
+        return 0
+
+
+def scan_faces_data(faces_data_path):
+    """
+    Parcours complet de faces_data (réconciliation uniquement)
+
+    Returns:
+        tuple: (nb d'images .jpg, nb de dossiers d'électeurs contenant au moins une image)
+    """
+    images = users = 0
+    try:
+        with os.scandir(faces_data_path) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    count = count_images(entry.path)
+                    images += count
+                    users += bool(count)
+    except FileNotFoundError:
+        pass
+    return images, users
+
+
+def _faces_data_path():
+    # Même réglage que FaceEngine.faces_data_path
+    return current_app.config.get('UPLOAD_FOLDER', 'faces_data')
+
+
+# Valeur de référence de chaque compteur, recalculée depuis le disque ou la table electeurs
+COUNTER_SOURCES = {
+    IMAGES: lambda: scan_faces_data(_faces_data_path())[0],
+    CAPTURED: lambda: scan_faces_data(_faces_data_path())[1],
+    TRAINED: lambda: Electeur.query.filter_by(modele_facial_entraine=True).count()
+}
+
+_lock = threading.Lock()
+_stats = {
+    'initialized_counters': 0,
+    'reconciliations': 0,
+    'last_reconciliation': None,
+    'last_mismatches': 0,
+    'last_scan_ms': None
+}
+
+
+def _bump(key, delta=1):
+    with _lock:
+        _stats[key] += delta
+
+
+def _actual_counts():
+    """Valeurs réelles des trois compteurs (un seul parcours de faces_data)"""
+    start = time.perf_counter()
+    images, users = scan_faces_data(_faces_data_path())
+    with _lock:
+        _stats['last_scan_ms'] = round((time.perf_counter() - start) * 1000, 3)
+    return {IMAGES: images, CAPTURED: users, TRAINED: COUNTER_SOURCES[TRAINED]()}
+
+
+def ensure_counters():
+    """
+    Créer les compteurs d'enrôlement manquants (un parcours de faces_data au besoin)
+
+    La transaction est validée par l'appelant.
+
+    Returns:
+        int: Nombre de compteurs créés
+    """
+    existing = {nom for (nom,) in db.session.query(Compteur.nom).filter(Compteur.nom.in_(COUNTER_SOURCES))}
+    missing = [name for name in COUNTER_SOURCES if name not in existing]
+    if not missing:
+        return 0
+    actual = _actual_counts()
+    for name in missing:
+        db.session.add(Compteur(nom=name, valeur=actual[name]))
+    _bump('initialized_counters', len(missing))
+    return len(missing)
+
+
+def record_capture(images_before, images_after):
+    """
+    Comptabiliser une capture dans la transaction en cours
+
+    Args:
+        images_before (int): Images du dossier de l'électeur avant la capture
+        images_after (int): Images du dossier après la capture (une capture
+            répétée réécrit les mêmes fichiers : seules les nouvelles comptent)
+    """
+    added = images_after - images_before
+    if added:
+        tally.increment_counter(IMAGES, added, source=COUNTER_SOURCES[IMAGES])
+    if not images_before and images_after:
+        tally.increment_counter(CAPTURED, source=COUNTER_SOURCES[CAPTURED])
+
+
+def record_training():
+    """Comptabiliser un modèle activé (modele_facial_entraine passé à True) dans la transaction en cours"""
+    tally.increment_counter(TRAINED, source=COUNTER_SOURCES[TRAINED])
+
+
+def read_counters(session=None):
+    """
+    Lire les compteurs d'enrôlement (une requête sur la clé primaire)
+
+    Args:
+        session: Session de lecture (sqlite_profile.read_session), db.session par défaut
+
+    Returns:
+        dict: {IMAGES, CAPTURED, TRAINED}
+    """
+    session = session or db.session
+    counters = dict(session.query(Compteur.nom, Compteur.valeur).filter(Compteur.nom.in_(COUNTER_SOURCES)).all())
+    if len(counters) < len(COUNTER_SOURCES):
+        # Base existante : initialiser une fois depuis le disque et la table electeurs
+        ensure_counters()
+        db.session.commit()
+        session.rollback()
+        return read_counters(session)
+    return counters
+
+
+def reconcile(fix=False):
+    """
+    Comparer les compteurs d'enrôlement au disque et à la table electeurs
+
+    Args:
+        fix (bool): Corriger les écarts trouvés (et valider la transaction)
+
+    Returns:
+        dict: {'compteurs': [{'nom', 'decompte', 'reel'}], 'corrige'}
+    """
+    ensure_counters()
+    actual = _actual_counts()
+
+    counters = []
+    for row in Compteur.query.filter(Compteur.nom.in_(COUNTER_SOURCES)).all():
+        if row.valeur != actual[row.nom]:
+            counters.append({'nom': row.nom, 'decompte': row.valeur, 'reel': actual[row.nom]})
+            if fix:
+                row.valeur = actual[row.nom]
+                row.date_maj = datetime.utcnow()
+
+    if fix:
+        db.session.commit()
+    else:
+        db.session.rollback()
+
+    with _lock:
+        _stats['reconciliations'] += 1
+        _stats['last_reconciliation'] = datetime.utcnow().isoformat()
+        _stats['last_mismatches'] = len(counters)
+
+    return {'compteurs': counters, 'corrige': fix}
+
+
+class EnrollmentReconciler:
+    """
+    Réconciliation périodique des compteurs d'enrôlement en arrière-plan.
+
+    Les compteurs sont maintenus par la capture et l'entraînement ; ce thread
+    corrige les dérives (fichiers supprimés à la main, processus arrêté entre
+    l'écriture des images et le commit) par un parcours complet de faces_data
+    toutes les `interval` secondes.
+    """
+
+    def __init__(self, app, interval):
+        self.app = app
+        self.interval = interval
+
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._worker, name='enrollment-reconciler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._wakeup.set()
+
+    def _worker(self):
+        while not self._wakeup.wait(self.interval):
+            try:
+                with self.app.app_context():
+                    report = reconcile(fix=True)
+                    if report['compteurs']:
+                        self.app.logger.warning(f"Compteurs d'enrôlement corrigés : {report['compteurs']}")
+            except Exception as e:
+                self.app.logger.error(f"Erreur de réconciliation des compteurs d'enrôlement: {e}")
+
+
+_reconciler = None
+_reconciler_lock = threading.Lock()
+
+
+def start_reconciler():
+    """Démarrer le réconciliateur du processus si ENROLLMENT_RECONCILE_INTERVAL > 0 (désactivé par défaut)"""
+    global _reconciler
+    interval = current_app.config.get('ENROLLMENT_RECONCILE_INTERVAL', 0)
+    if _reconciler is None and interval > 0:
+        with _reconciler_lock:
+            if _reconciler is None:
+                reconciler = EnrollmentReconciler(current_app._get_current_object(), interval)
+                reconciler.start()
+                _reconciler = reconciler
+    return _reconciler
+
+
+def stats():
+    with _lock:
+        return dict(_stats, reconciler_interval=_reconciler.interval if _reconciler is not None else 0)
+
+
+metrics.register('enrollment_counters', stats)
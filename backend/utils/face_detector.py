@@ -0,0 +1,175 @@
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from utils import metrics
+
+DEFAULT_CASCADE_PATH = os.path.join('models', 'haarcascade_frontalface_default.xml')
+
+
+class CascadeDetector:
+    """
+    Détecteur Haar Cascade partagé par tout le processus.
+
+    Le fichier XML n'est analysé qu'une fois par thread : CascadeClassifier
+    n'étant pas garanti thread-safe, chaque thread possède sa propre instance.
+    Le fichier est rechargé automatiquement lorsque sa date de modification change.
+    """
+
+    def __init__(self, cascade_path, check_interval=2.0):
+        self.cascade_path = cascade_path
+        self.check_interval = check_interval
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+        # Génération du fichier : incrémentée à chaque modification détectée
+        self._generation = 0
+        self._mtime = None
+        self._last_check = 0.0
+
+        # Statistiques
+        self._loads = 0
+        self._reuses = 0
+        self._load_time_total = 0.0
+        self._last_load_time = None
+
+    def _check_file(self):
+        """Vérifier (au plus toutes les check_interval secondes) si le fichier a changé"""
+        now = time.monotonic()
+        if self._mtime is not None and now - self._last_check < self.check_interval:
+            return True
+
+        try:
+            mtime = os.path.getmtime(self.cascade_path)
+        except OSError:
+            return False
+
+        with self._lock:
+            self._last_check = now
+            if mtime != self._mtime:
+                self._mtime = mtime
+                self._generation += 1
+        return True
+
+    def available(self):
+        """Indiquer si le fichier Haar Cascade est présent"""
+        return os.path.exists(self.cascade_path)
+
+    def get_classifier(self):
+        """
+        Obtenir le classificateur du thread courant
+
+        Returns:
+            cv2.CascadeClassifier ou None si le fichier est absent ou invalide
+        """
+        if not self._check_file():
+            return None
+
+        classifier = getattr(self._local, 'classifier', None)
+        if classifier is not None and self._local.generation == self._generation:
+            with self._lock:
+                self._reuses += 1
+            return classifier
+
+        generation = self._generation
+        start = time.perf_counter()
+        classifier = cv2.CascadeClassifier(self.cascade_path)
+        elapsed = time.perf_counter() - start
+
+        if classifier.empty():
+            return None
+
+        self._local.classifier = classifier
+        self._local.generation = generation
+        with self._lock:
+            self._loads += 1
+            self._load_time_total += elapsed
+            self._last_load_time = elapsed
+        return classifier
+
+    def detect(self, gray, **params):
+        """
+        Détecter les visages dans une image en niveaux de gris
+
+        Returns:
+            Rectangles (x, y, w, h) détectés, ou None si le détecteur est indisponible
+        """
+        classifier = self.get_classifier()
+        if classifier is None:
+            return None
+        return classifier.detectMultiScale(gray, **params)
+
+    def detect_scaled(self, gray, detect_width=None, min_size=(30, 30), max_size=None, **params):
+        """
+        Détecter sur une copie réduite de l'image puis ramener les rectangles à la pleine résolution
+
+        Args:
+            gray (np.ndarray): Image en niveaux de gris pleine résolution
+            detect_width (int): Largeur de l'image de détection (None : pas de réduction)
+            min_size, max_size: Taille de visage min/max en pixels de l'image d'origine
+
+        Returns:
+            Rectangles (x, y, w, h) en coordonnées de l'image d'origine, ou None si indisponible
+        """
+        height, width = gray.shape[:2]
+        scale = detect_width / width if detect_width and width > detect_width else 1.0
+
+        small = gray
+        if scale < 1.0:
+            small = cv2.resize(gray, (detect_width, max(1, round(height * scale))), interpolation=cv2.INTER_AREA)
+        params['minSize'] = tuple(max(1, round(v * scale)) for v in min_size)
+        if max_size:
+            params['maxSize'] = tuple(max(1, round(v * scale)) for v in max_size)
+
+        faces = self.detect(small, **params)
+        if faces is None or len(faces) == 0 or scale == 1.0:
+            return faces
+
+        # Retour en pleine résolution, borné aux dimensions de l'image
+        boxes = np.round(np.asarray(faces, dtype=np.float64) / scale).astype(np.int32)
+        boxes[:, 0] = np.clip(boxes[:, 0], 0, width - 1)
+        boxes[:, 1] = np.clip(boxes[:, 1], 0, height - 1)
+        boxes[:, 2] = np.minimum(boxes[:, 2], width - boxes[:, 0])
+        boxes[:, 3] = np.minimum(boxes[:, 3], height - boxes[:, 1])
+        return boxes
+
+    def stats(self):
+        """Statistiques de chargement et de réutilisation"""
+        with self._lock:
+            return {
+                'cascade_path': self.cascade_path,
+                'available': self._mtime is not None,
+                'generation': self._generation,
+                'loads': self._loads,
+                'reuses': self._reuses,
+                'load_time_total_ms': round(self._load_time_total * 1000, 3),
+                'last_load_time_ms': round(self._last_load_time * 1000, 3) if self._last_load_time is not None else None
+            }
+
+
+_detectors = {}
+_detectors_lock = threading.Lock()
+
+
+def get_face_detector(cascade_path=DEFAULT_CASCADE_PATH):
+    """Obtenir le détecteur partagé associé à un fichier cascade"""
+    detector = _detectors.get(cascade_path)
+    if detector is None:
+        with _detectors_lock:
+            detector = _detectors.get(cascade_path)
+            if detector is None:
+                detector = CascadeDetector(cascade_path)
+                _detectors[cascade_path] = detector
+    return detector
+
+
+def detectors_stats():
+    """Statistiques de tous les détecteurs du processus"""
+    return [detector.stats() for detector in list(_detectors.values())]
+
+
+metrics.register('face_detector', lambda: {'detectors': detectors_stats()})
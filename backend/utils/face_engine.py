@@ -0,0 +1,241 @@
+import os
+import traceback
+
+import cv2
+from flask import current_app
+
+from utils import lbph
+from utils.capture_pipeline import get_capture_pipeline
+from utils.dedup_index import get_duplicate_index
+from utils.face_detector import get_face_detector
+from utils.image_input import decode_image
+from utils.matcher import get_matcher
+from utils.model_cache import get_model_cache
+from utils.model_store import get_model_store
+
+
+class FaceEngine:
+    """
+    Moteur unique de reconnaissance faciale.
+
+    Créé une fois au démarrage de l'application, il possède le détecteur Haar
+    partagé, la chaîne de prétraitement, le stockage de modèles, le cache des
+    anciens trainer.yml, le moteur d'identification 1:N, l'index de doublons
+    et le pipeline de capture. Les routes et FaceRecognitionSystem passent
+    tous par lui.
+
+    Les paramètres sont lus une fois depuis la configuration : les méthodes
+    peuvent donc être appelées hors contexte Flask (threads du pipeline, file
+    d'entraînement, scripts).
+    """
+
+    def __init__(self, config):
+        self.cascade_path = config.get('HAAR_CASCADE_PATH', os.path.join('models', 'haarcascade_frontalface_default.xml'))
+        self.faces_data_path = config.get('UPLOAD_FOLDER', 'faces_data')
+        self.models_folder = config.get('MODELS_FOLDER', 'models')
+
+        self.face_size = tuple(config.get('FACE_IMAGE_SIZE', (200, 200)))
+        self.equalize = config.get('FACE_EQUALIZE_HIST', False)
+        self.confidence_threshold = config.get('CONFIDENCE_THRESHOLD', 100)
+        self.duplicate_threshold = config.get('FACE_DUPLICATE_THRESHOLD', 60.0)
+        self.detection = {
+            'detect_width': config.get('FACE_DETECTION_WIDTH', 320) if config.get('FACE_FAST_DETECTION', False) else None,
+            'min_size': tuple(config.get('FACE_MIN_SIZE', (30, 30))),
+            'max_size': tuple(config['FACE_MAX_SIZE']) if config.get('FACE_MAX_SIZE') else None,
+            'scaleFactor': 1.1,
+            'minNeighbors': 4
+        }
+
+        self.detector = get_face_detector(self.cascade_path)
+        self.model_store = get_model_store()
+        self.model_cache = get_model_cache()
+        self.matcher = get_matcher()
+        self.duplicate_index = get_duplicate_index()
+        self.capture_pipeline = get_capture_pipeline()
+
+    # --- Chaîne d'image ---
+
+    def decode(self, data):
+        """Image encodée (base64 ou octets bruts) -> image BGR ou None"""
+        return decode_image(data)
+
+    def locate(self, image):
+        """
+        Détecter l'unique visage d'une image BGR
+
+        Returns:
+            tuple: (visage en niveaux de gris pleine résolution, rectangle (x, y, w, h), message d'erreur)
+        """
+        try:
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            faces = self.detector.detect_scaled(gray, **self.detection)
+            if faces is None:
+                return None, None, "Modèle Haar Cascade non trouvé. Veuillez le télécharger via l'API."
+
+            if len(faces) == 0:
+                return None, None, "Aucun visage n'a été détecté. Assurez-vous d'être bien éclairé et de face."
+            if len(faces) > 1:
+                return None, None, "Plusieurs visages détectés. Seul un visage est autorisé par image."
+
+            (x, y, w, h) = faces[0]
+            return gray[y:y+h, x:x+w], (x, y, w, h), None
+        except Exception as e:
+            return None, None, f"Erreur technique lors de la détection: {str(e)}"
+
+    def detect(self, image):
+        """Détecter l'unique visage d'une image BGR : (visage en niveaux de gris, message d'erreur)"""
+        face, _, error = self.locate(image)
+        return face, error
+
+    def preprocess(self, face):
+        """Redimensionner (et égaliser si configuré) un visage détecté"""
+        face = cv2.resize(face, self.face_size)
+        if self.equalize:
+            face = cv2.equalizeHist(face)
+        return face
+
+    def extract(self, image):
+        """Détection puis prétraitement : (visage prêt pour LBPH, message d'erreur)"""
+        face, error = self.detect(image)
+        if face is None:
+            return None, error
+        return self.preprocess(face), None
+
+    # --- Enrôlement ---
+
+    def user_folder(self, electeur_id):
+        return os.path.join(self.faces_data_path, f"user_{electeur_id}")
+
+    def save_training_images(self, electeur_id, images):
+        """
+        Extraire et sauvegarder les visages d'une capture (traitement parallèle)
+
+        Returns:
+            tuple: (nb sauvegardées, erreurs [(index, message)], durées par étape en ms)
+        """
+        return self.capture_pipeline.run(
+            images,
+            self.decode,
+            self.extract,
+            self.user_folder(electeur_id),
+            lambda number: f"user.{electeur_id}.{number}.jpg"
+        )
+
+    def load_training_histograms(self, electeur_id):
+        """Calculer les histogrammes LBPH des images d'entraînement. Retourne (histogrammes, message_erreur)."""
+        user_folder = self.user_folder(electeur_id)
+        if not os.path.exists(user_folder):
+            return None, "Aucune image d'entraînement trouvée"
+
+        faces = []
+        for filename in os.listdir(user_folder):
+            if filename.endswith('.jpg'):
+                img = cv2.imread(os.path.join(user_folder, filename), cv2.IMREAD_GRAYSCALE)
+                if img is not None:
+                    faces.append(img)
+
+        if not faces:
+            return None, "Aucune image valide trouvée dans le dossier d'entraînement."
+
+        return lbph.compute_histograms(faces), None
+
+    def find_duplicates(self, electeur_id, histograms):
+        """Électeurs déjà enrôlés avec le même visage : [(electeur_id, score)]"""
+        return self.duplicate_index.find_duplicates(histograms, exclude=electeur_id, threshold=self.duplicate_threshold)
+
+    def train(self, electeur_id, histograms=None):
+        """Enregistrer le modèle LBPH d'un électeur dans le stockage binaire. Retourne (succès, message)."""
+        try:
+            if histograms is None:
+                histograms, error = self.load_training_histograms(electeur_id)
+                if histograms is None:
+                    return False, error
+
+            electeur_id = int(electeur_id)
+            self.model_store.put(electeur_id, histograms)
+            self.duplicate_index.add(electeur_id, histograms)
+            self.model_cache.invalidate(electeur_id)
+            return True, f"Modèle entraîné avec {len(histograms)} images."
+        except Exception as e:
+            traceback.print_exc()
+            return False, f"Erreur lors de l'entraînement: {str(e)}"
+
+    # --- Reconnaissance ---
+
+    def has_model(self, electeur_id):
+        return electeur_id in self.model_store or os.path.exists(self._legacy_model_path(electeur_id))
+
+    def _legacy_model_path(self, electeur_id):
+        return os.path.join(self.models_folder, f"user_{electeur_id}", 'trainer.yml')
+
+    def verify(self, electeur_id, face):
+        """
+        Comparer un visage prétraité au modèle d'un électeur (vérification 1:1)
+
+        Le modèle est une tranche du stockage binaire, ou un ancien trainer.yml
+        (non migré) servi depuis le cache LRU.
+
+        Returns:
+            tuple: (label prédit, distance) ou None si l'électeur n'a pas de modèle
+        """
+        histograms = self.model_store.get(electeur_id)
+        if histograms is not None:
+            return lbph.predict(histograms, electeur_id, lbph.compute_histogram(face))
+
+        recognizer = self.model_cache.get(electeur_id, self._legacy_model_path(electeur_id))
+        if recognizer is None:
+            return None
+        return recognizer.predict(face)
+
+    def identify(self, face, top_k=1):
+        """Électeurs les plus proches d'un visage prétraité (identification 1:N) : [(electeur_id, distance)]"""
+        return self.matcher.identify(lbph.compute_histogram(face), top_k=top_k)
+
+    def is_recognized(self, confidence):
+        return confidence <= self.confidence_threshold
+
+    # --- Statut ---
+
+    def status(self):
+        """
+        Disponibilité du Haar Cascade, images d'entraînement et modèles entraînés
+
+        Les nombres viennent des compteurs d'enrôlement persistés (une requête,
+        sans parcourir faces_data ni models) : contexte d'application requis.
+        """
+        from utils import enrollment_counters  # modèles SQLAlchemy : le moteur reste importable sans l'application
+
+        haar_exists = os.path.exists(self.cascade_path)
+        counters = enrollment_counters.read_counters()
+        trained_models = counters[enrollment_counters.TRAINED]
+
+        return {
+            'haar_cascade_available': haar_exists,
+            'training_images_count': counters[enrollment_counters.IMAGES],
+            'users_with_images_count': counters[enrollment_counters.CAPTURED],
+            'trained_models_count': trained_models,
+            'models_ready': haar_exists and trained_models > 0
+        }
+
+    def stats(self):
+        """Statistiques de tous les sous-systèmes du moteur"""
+        return {
+            'detector': self.detector.stats(),
+            'model_cache': self.model_cache.stats(),
+            'model_store': self.model_store.stats(),
+            'matcher': self.matcher.stats(),
+            'duplicate_index': self.duplicate_index.stats(),
+            'capture_pipeline': self.capture_pipeline.stats()
+        }
+
+
+def init_face_engine(app):
+    """Créer le moteur facial de l'application (à appeler une fois au démarrage)"""
+    with app.app_context():
+        app.extensions['face_engine'] = FaceEngine(app.config)
+    return app.extensions['face_engine']
+
+
+def get_face_engine():
+    """Obtenir le moteur facial de l'application courante"""
+    return current_app.extensions['face_engine']
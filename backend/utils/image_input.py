@@ -0,0 +1,148 @@
+import base64
+import logging
+
+import cv2
+import numpy as np
+from flask import current_app, has_app_context
+from werkzeug.exceptions import RequestEntityTooLarge
+
+# Types de corps acceptés pour une image brute (une image par requête)
+RAW_IMAGE_TYPES = ('image/jpeg', 'image/png', 'image/webp', 'application/octet-stream')
+
+# Taille maximale d'un corps de requête si MAX_CONTENT_LENGTH n'est pas configuré
+MAX_BODY_BYTES = 16 * 1024 * 1024
+
+
+def max_body_size():
+    """Taille maximale acceptée d'un corps (MAX_CONTENT_LENGTH, MAX_BODY_BYTES par défaut)"""
+    return current_app.config.get('MAX_CONTENT_LENGTH') or MAX_BODY_BYTES
+
+
+def check_body_size(size):
+    """Refuser (413) un corps plus grand que max_body_size(), avant toute allocation"""
+    if size is not None and size > max_body_size():
+        raise RequestEntityTooLarge(f"Corps de {size} octets, maximum {max_body_size()}")
+
+
+def is_multipart(request):
+    return request.mimetype == 'multipart/form-data'
+
+
+def is_raw_image(request):
+    return request.mimetype in RAW_IMAGE_TYPES
+
+
+def file_buffer(storage):
+    """
+    Contenu d'un fichier multipart sans copie supplémentaire
+
+    Werkzeug garde les petits fichiers dans un BytesIO (vue directe sur son
+    tampon) et déverse les gros dans un fichier temporaire (lu directement
+    dans un bytearray à la bonne taille).
+    """
+    stream = storage.stream
+    if hasattr(stream, 'getbuffer'):
+        return stream.getbuffer()
+    stream.seek(0, 2)
+    check_body_size(stream.tell())
+    buffer = bytearray(stream.tell())
+    stream.seek(0)
+    stream.readinto(buffer)
+    return memoryview(buffer)
+
+
+def read_raw_body(request):
+    """
+    Lire un corps d'image brut directement dans un tampon de la taille annoncée
+
+    Returns:
+        memoryview ou None si le corps est vide
+
+    Raises:
+        RequestEntityTooLarge: Corps annoncé ou lu plus grand que max_body_size()
+    """
+    length = request.content_length
+    if not length:
+        # Taille inconnue (transfert par morceaux) : lecture bornée
+        data = request.stream.read(max_body_size() + 1)
+        check_body_size(len(data))
+        return memoryview(data) if data else None
+
+    check_body_size(length)
+
+    buffer = bytearray(length)
+    view = memoryview(buffer)
+    stream = request.stream
+    read = 0
+    while read < length:
+        n = stream.readinto(view[read:])
+        if not n:
+            break
+        read += n
+    return view[:read] if read else None
+
+
+def decode_image(data):
+    """
+    Décoder une image reçue en base64 (API JSON) ou en octets bruts
+
+    Returns:
+        np.ndarray (BGR) ou None si l'image est invalide
+    """
+    if data is None:
+        return None
+    try:
+        if isinstance(data, str):
+            if data.startswith('data:image'):
+                data = data.split(',', 1)[1]
+            data = base64.b64decode(data)
+        buffer = np.frombuffer(data, np.uint8)
+        if buffer.size == 0:
+            return None
+        return cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+    except Exception as e:
+        # Aussi appelée sans contexte d'application (threads du pipeline de capture)
+        logger = current_app.logger if has_app_context() else logging.getLogger(__name__)
+        logger.warning(f"Erreur décodage image: {e}")
+        return None
+
+
+def request_images(request, field='images'):
+    """
+    Images d'une requête de capture : fichiers multipart ou liste base64 JSON
+
+    Returns:
+        tuple: (liste d'images encodées, dict des autres champs)
+
+    Raises:
+        RequestEntityTooLarge: Corps plus grand que max_body_size()
+    """
+    check_body_size(request.content_length)
+    if is_multipart(request):
+        return [file_buffer(f) for f in request.files.getlist(field)], request.form.to_dict()
+    data = request.get_json(silent=True) or {}
+    images = data.get(field)
+    return images if isinstance(images, list) else None, data
+
+
+def request_image(request, field='image'):
+    """
+    Image d'une requête unitaire : corps brut, fichier multipart ou base64 JSON
+
+    Pour un corps brut, les autres champs sont passés en paramètres d'URL
+    (jamais de jeton : les URL sont journalisées).
+
+    Returns:
+        tuple: (image encodée ou None, dict des autres champs)
+
+    Raises:
+        RequestEntityTooLarge: Corps plus grand que max_body_size()
+    """
+    check_body_size(request.content_length)
+    if is_raw_image(request):
+        return read_raw_body(request), request.args.to_dict()
+    if is_multipart(request):
+        storage = request.files.get(field)
+        return (file_buffer(storage) if storage else None), request.form.to_dict()
+    data = request.get_json(silent=True) or {}
+    return data.get(field), data
@@ -0,0 +1,118 @@
+import cv2
+import numpy as np
+
+# Paramètres LBPH par défaut d'OpenCV (LBPHFaceRecognizer_create())
+LBPH_PARAMS = {
+    'radius': 1,
+    'neighbors': 8,
+    'grid_x': 8,
+    'grid_y': 8
+}
+
+
+def histogram_dim(params=None):
+    """Nombre de valeurs d'un histogramme LBPH spatial"""
+    params = params or LBPH_PARAMS
+    return params['grid_x'] * params['grid_y'] * (1 << params['neighbors'])
+
+
+def create_recognizer(params=None):
+    """Créer un LBPHFaceRecognizer avec les paramètres donnés"""
+    params = params or LBPH_PARAMS
+    return cv2.face.LBPHFaceRecognizer_create(
+        radius=params['radius'],
+        neighbors=params['neighbors'],
+        grid_x=params['grid_x'],
+        grid_y=params['grid_y']
+    )
+
+
+def load_yaml_histograms(model_path):
+    """
+    Lire les histogrammes d'un fichier trainer.yml
+
+    Returns:
+        tuple: (histogrammes float32 de forme (n, dim), labels int32 de forme (n,))
+    """
+    recognizer = cv2.face.LBPHFaceRecognizer_create()
+    recognizer.read(model_path)
+    histograms = recognizer.getHistograms()
+    if not histograms:
+        return np.empty((0, 0), dtype=np.float32), np.empty(0, dtype=np.int32)
+    matrix = np.vstack([h.reshape(1, -1) for h in histograms]).astype(np.float32, copy=False)
+    labels = np.asarray(recognizer.getLabels(), dtype=np.int32).reshape(-1)
+    return matrix, labels
+
+
+def compute_histograms(faces, params=None):
+    """
+    Calculer les histogrammes LBPH de visages prétraités
+
+    L'implémentation d'OpenCV est réutilisée (entraînement d'un modèle jetable)
+    afin d'obtenir exactement les mêmes histogrammes que LBPHFaceRecognizer.
+
+    Returns:
+        np.ndarray: Histogrammes float32 de forme (len(faces), dim)
+    """
+    recognizer = create_recognizer(params)
+    recognizer.train(list(faces), np.zeros(len(faces), dtype=np.int32))
+    return np.vstack([h.reshape(1, -1) for h in recognizer.getHistograms()]).astype(np.float32, copy=False)
+
+
+def compute_histogram(face, params=None):
+    """Calculer l'histogramme LBPH d'un seul visage (vecteur de dimension dim)"""
+    return compute_histograms([face], params)[0]
+
+
+def chi_square_distances(histograms, probe, rows=None, chunk_rows=256):
+    """
+    Distances chi-carré (HISTCMP_CHISQR_ALT) entre une sonde et chaque ligne d'une matrice
+
+    Reproduit cv2.compareHist utilisé par LBPHFaceRecognizer.predict :
+    2 * somme((a - b)² / (a + b)) sur les cases où a + b > DBL_EPSILON.
+    Les termes sont calculés en float32 (entrées float32, comme dans le modèle)
+    et sommés en float64, par blocs de lignes pour borner la mémoire.
+
+    Args:
+        rows (np.ndarray): Indices des lignes à comparer (toutes si None)
+
+    Returns:
+        np.ndarray: Distances float64 de forme (n,), une par ligne comparée
+    """
+    probe = np.asarray(probe, dtype=np.float32).reshape(1, -1)
+    n = histograms.shape[0] if rows is None else len(rows)
+    distances = np.empty(n, dtype=np.float64)
+    eps = np.finfo(np.float64).eps
+
+    for start in range(0, n, chunk_rows):
+        selection = slice(start, start + chunk_rows) if rows is None else rows[start:start + chunk_rows]
+        block = np.array(histograms[selection], dtype=np.float32)
+        total = block + probe
+        block -= probe
+        np.square(block, out=block)
+        # Cases vides des deux côtés : terme nul (division par l'infini)
+        total[total <= eps] = np.inf
+        block /= total
+        distances[start:start + block.shape[0]] = block.sum(axis=1, dtype=np.float64) * 2.0
+
+    return distances
+
+
+def predict(histograms, labels, probe):
+    """
+    Équivalent NumPy de LBPHFaceRecognizer.predict sur une matrice d'histogrammes
+
+    Args:
+        histograms (np.ndarray): Histogrammes de forme (n, dim)
+        labels: Label de chaque ligne, ou un label unique pour toutes les lignes
+        probe (np.ndarray): Histogramme de la sonde
+
+    Returns:
+        tuple: (label, distance) ou (-1, inf) si la matrice est vide
+    """
+    if histograms.shape[0] == 0:
+        return -1, float('inf')
+    distances = chi_square_distances(histograms, probe)
+    best = int(np.argmin(distances))
+    label = labels if np.isscalar(labels) else labels[best]
+    return int(label), float(distances[best])
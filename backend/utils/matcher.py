@@ -0,0 +1,128 @@
+import threading
+import time
+
+import numpy as np
+
+from utils import metrics
+from utils.lbph import chi_square_distances
+from utils.model_store import get_model_store
+
+
+class LBPHMatcher:
+    """
+    Identification 1:N sur tous les électeurs enrôlés.
+
+    Les histogrammes de tous les électeurs sont lus dans la matrice mappée du
+    stockage de modèles (partagée entre les workers par le cache de pages) et
+    les distances chi-carré à une sonde sont calculées en une passe NumPy.
+    Le meilleur score d'un électeur est le minimum sur ses lignes, comme
+    LBPHFaceRecognizer.predict sur son modèle.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.Lock()
+
+        # Disposition des lignes vivantes, reconstruite quand l'index du stockage change
+        self._version = None
+        self._matrix = None
+        self._rows = np.empty(0, dtype=np.int64)       # Lignes vivantes de la matrice
+        self._starts = np.empty(0, dtype=np.int64)     # Début de chaque électeur dans self._rows
+        self._labels = np.empty(0, dtype=np.int64)     # Électeur de chaque segment
+
+        self.rebuilds = 0
+        self.identifications = 0
+        self._match_time_total = 0.0
+        self._last_match_time = None
+
+    def _refresh(self):
+        """Reconstruire la disposition des lignes si le stockage a changé"""
+        version = self.store.version()
+        if version == self._version:
+            return
+
+        index, matrix, version = self.store.entries()
+        # Électeurs triés par position pour un accès séquentiel à la matrice
+        segments = sorted((offset, count, electeur_id) for electeur_id, (offset, count) in index.items())
+
+        counts = np.fromiter((count for _, count, _ in segments), dtype=np.int64, count=len(segments))
+        offsets = np.fromiter((offset for offset, _, _ in segments), dtype=np.int64, count=len(segments))
+        starts = np.zeros(len(segments), dtype=np.int64)
+        np.cumsum(counts[:-1], out=starts[1:])
+
+        # Lignes vivantes : offset + position dans le segment
+        rows = np.repeat(offsets - starts, counts) + np.arange(int(counts.sum()), dtype=np.int64)
+
+        self._matrix = matrix
+        self._rows = rows
+        self._starts = starts
+        self._labels = np.fromiter((electeur_id for _, _, electeur_id in segments), dtype=np.int64, count=len(segments))
+        self._version = version
+        self.rebuilds += 1
+
+    def identify(self, probe, top_k=1):
+        """
+        Identifier les électeurs les plus proches d'un histogramme sonde
+
+        Args:
+            probe (np.ndarray): Histogramme LBPH de la sonde
+            top_k (int): Nombre de candidats à retourner
+
+        Returns:
+            list: [(electeur_id, distance)] par distance croissante (vide si aucun enrôlé)
+        """
+        start = time.perf_counter()
+        with self._lock:
+            self._refresh()
+            matrix, rows, starts, labels = self._matrix, self._rows, self._starts, self._labels
+
+        if labels.size == 0:
+            return []
+
+        # Seules les lignes vivantes sont comparées (les modèles remplacés restent dans le fichier)
+        distances = chi_square_distances(matrix, probe, rows=rows)
+        per_voter = np.minimum.reduceat(distances, starts)
+
+        k = min(max(int(top_k), 1), per_voter.size)
+        if k == 1:
+            best = np.array([int(np.argmin(per_voter))])
+        else:
+            best = np.argpartition(per_voter, k - 1)[:k]
+            best = best[np.argsort(per_voter[best], kind='stable')]
+
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.identifications += 1
+            self._match_time_total += elapsed
+            self._last_match_time = elapsed
+
+        return [(int(labels[i]), float(per_voter[i])) for i in best]
+
+    def stats(self):
+        """Taille de la matrice et temps d'identification"""
+        with self._lock:
+            return {
+                'voters': int(self._labels.size),
+                'rows': int(self._rows.size),
+                'rebuilds': self.rebuilds,
+                'identifications': self.identifications,
+                'avg_match_time_ms': round(self._match_time_total / self.identifications * 1000, 3) if self.identifications else None,
+                'last_match_time_ms': round(self._last_match_time * 1000, 3) if self._last_match_time is not None else None
+            }
+
+
+_matcher = None
+_matcher_lock = threading.Lock()
+
+
+def get_matcher():
+    """Obtenir le moteur d'identification du processus"""
+    global _matcher
+    if _matcher is None:
+        with _matcher_lock:
+            if _matcher is None:
+                _matcher = LBPHMatcher(get_model_store())
+    return _matcher
+
+
+metrics.register('matcher', lambda: _matcher.stats() if _matcher is not None else {'voters': 0})
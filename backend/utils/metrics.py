@@ -0,0 +1,36 @@
+import threading
+
+# Registre des fournisseurs de métriques (nom -> fonction sans argument retournant un dict)
+_providers = {}
+_lock = threading.Lock()
+
+
+def register(name, provider):
+    """
+    Enregistrer un fournisseur de métriques
+
+    Args:
+        name (str): Nom de la section dans /api/metrics
+        provider (callable): Fonction retournant un dict sérialisable en JSON
+    """
+    with _lock:
+        _providers[name] = provider
+
+
+def snapshot():
+    """
+    Collecter les métriques de tous les sous-systèmes enregistrés
+
+    Returns:
+        dict: Métriques par sous-système
+    """
+    with _lock:
+        providers = dict(_providers)
+
+    metrics = {}
+    for name, provider in providers.items():
+        try:
+            metrics[name] = provider()
+        except Exception as e:
+            metrics[name] = {'error': str(e)}
+    return metrics
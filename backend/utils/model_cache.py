@@ -0,0 +1,134 @@
+import os
+import threading
+from collections import OrderedDict
+
+import cv2
+from flask import current_app
+
+from utils import metrics
+
+
+class ModelCache:
+    """
+    Cache LRU des modèles LBPH par électeur.
+
+    Les modèles sont évincés dès que le nombre d'entrées ou la taille totale
+    des histogrammes dépasse les limites configurées. Un modèle dont le fichier
+    a été modifié sur disque (réentraînement par un autre worker) est rechargé.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._entries = OrderedDict()  # electeur_id -> (recognizer, taille, mtime)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _model_size(recognizer):
+        """Taille mémoire approximative d'un modèle LBPH (somme des histogrammes)"""
+        return sum(h.nbytes for h in recognizer.getHistograms())
+
+    def get(self, electeur_id, model_path):
+        """
+        Obtenir le modèle d'un électeur, en le chargeant depuis le disque si nécessaire
+
+        Returns:
+            LBPHFaceRecognizer ou None si le fichier n'existe pas
+        """
+        try:
+            mtime = os.path.getmtime(model_path)
+        except OSError:
+            self.invalidate(electeur_id)
+            return None
+
+        with self._lock:
+            entry = self._entries.get(electeur_id)
+            if entry is not None and entry[2] == mtime:
+                self._entries.move_to_end(electeur_id)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        # Chargement hors verrou : les autres électeurs restent servis pendant l'analyse YAML
+        recognizer = cv2.face.LBPHFaceRecognizer_create()
+        recognizer.read(model_path)
+        self.put(electeur_id, recognizer, mtime)
+        return recognizer
+
+    def put(self, electeur_id, recognizer, mtime=None):
+        """Insérer un modèle et évincer les entrées les moins récemment utilisées"""
+        size = self._model_size(recognizer)
+
+        with self._lock:
+            previous = self._entries.pop(electeur_id, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+
+            # Un modèle plus gros que le cache entier n'est pas conservé
+            if size > self.max_bytes:
+                return
+
+            self._entries[electeur_id] = (recognizer, size, mtime)
+            self._bytes += size
+
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def invalidate(self, electeur_id):
+        """Retirer le modèle d'un électeur (après réentraînement)"""
+        with self._lock:
+            entry = self._entries.pop(electeur_id, None)
+            if entry is not None:
+                self._bytes -= entry[1]
+                self.invalidations += 1
+
+    def clear(self):
+        """Vider le cache"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Compteurs du cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else None
+            }
+
+
+_model_cache = None
+_model_cache_lock = threading.Lock()
+
+
+def get_model_cache():
+    """Obtenir le cache de modèles du processus (dimensionné depuis la configuration)"""
+    global _model_cache
+    if _model_cache is None:
+        with _model_cache_lock:
+            if _model_cache is None:
+                _model_cache = ModelCache(
+                    max_entries=current_app.config.get('FACE_MODEL_CACHE_MAX_ENTRIES', 1024),
+                    max_bytes=current_app.config.get('FACE_MODEL_CACHE_MAX_BYTES', 256 * 1024 * 1024)
+                )
+    return _model_cache
+
+
+metrics.register('model_cache', lambda: _model_cache.stats() if _model_cache is not None else {'entries': 0})
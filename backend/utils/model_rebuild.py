@@ -0,0 +1,215 @@
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import cv2
+
+from utils import lbph
+
+CHECKPOINT_FILENAME = 'rebuild.checkpoint'
+
+
+def _init_worker():
+    # Un processus par cœur : pas de threads OpenCV en plus
+    cv2.setNumThreads(1)
+
+
+def compute_user_histograms(task):
+    """
+    Processus de travail : relire les images d'un électeur, les prétraiter et calculer ses histogrammes
+
+    Args:
+        task (tuple): (electeur_id, dossier, taille des visages, égalisation, paramètres LBPH)
+
+    Returns:
+        tuple: (electeur_id, histogrammes ou None, nb d'images, message d'erreur)
+    """
+    electeur_id, folder, face_size, equalize, params = task
+    faces = []
+    try:
+        for filename in sorted(os.listdir(folder)):
+            if not filename.endswith('.jpg'):
+                continue
+            face = cv2.imread(os.path.join(folder, filename), cv2.IMREAD_GRAYSCALE)
+            if face is None:
+                continue
+            # Même chaîne que FaceEngine.preprocess, appliquée aux visages déjà extraits
+            face = cv2.resize(face, face_size)
+            if equalize:
+                face = cv2.equalizeHist(face)
+            faces.append(face)
+        if not faces:
+            return electeur_id, None, 0, "Aucune image valide trouvée dans le dossier d'entraînement."
+        return electeur_id, lbph.compute_histograms(faces, params), len(faces), None
+    except Exception as e:
+        return electeur_id, None, len(faces), str(e)
+
+
+def list_user_folders(faces_data_path, electeur_ids=None):
+    """
+    Dossiers faces_data/user_<id> à reconstruire
+
+    Returns:
+        list: [(electeur_id, dossier)] triés par identifiant
+    """
+    if not os.path.isdir(faces_data_path):
+        return []
+    folders = []
+    for name in os.listdir(faces_data_path):
+        if not name.startswith('user_'):
+            continue
+        try:
+            electeur_id = int(name[len('user_'):])
+        except ValueError:
+            continue  # Dossier non conforme
+        if electeur_ids is None or electeur_id in electeur_ids:
+            folders.append((electeur_id, os.path.join(faces_data_path, name)))
+    return sorted(folders)
+
+
+class RebuildCheckpoint:
+    """
+    Journal des électeurs reconstruits, pour reprendre une reconstruction interrompue.
+
+    Première ligne : signature JSON des réglages (paramètres LBPH, taille,
+    égalisation) ; puis un identifiant par ligne, écrit après l'enregistrement
+    du modèle dans le stockage. Une reprise avec d'autres réglages est refusée.
+    """
+
+    def __init__(self, path, signature):
+        self.path = path
+        self.signature = signature
+        self.done = set()
+        self._file = None
+
+    def open(self, restart=False):
+        if restart and os.path.exists(self.path):
+            os.remove(self.path)
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                header = f.readline()
+                if header and json.loads(header) != self.signature:
+                    raise ValueError(f"Le point de reprise {self.path} a été créé avec d'autres réglages (utiliser --restart)")
+                # Une dernière ligne incomplète (arrêt pendant l'écriture) est ignorée
+                self.done = {int(line) for line in f if line.endswith('\n') and line.strip()}
+            self._file = open(self.path, 'a')
+        else:
+            self._file = open(self.path, 'w')
+            self._file.write(json.dumps(self.signature, sort_keys=True) + '\n')
+            self._file.flush()
+        return self
+
+    def mark(self, electeur_ids):
+        self._file.write(''.join(f'{electeur_id}\n' for electeur_id in electeur_ids))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.done.update(electeur_ids)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def rebuild_models(engine, electeur_ids=None, workers=None, checkpoint_path=None, restart=False,
+                   batch_size=64, progress=None):
+    """
+    Reconstruire les modèles des électeurs depuis faces_data avec un pool de processus
+
+    Les processus calculent les histogrammes ; le processus principal est le
+    seul à écrire : chaque modèle est ajouté au stockage (données puis
+    enregistrement d'index, sous verrou : un lecteur voit l'ancien ou le
+    nouveau modèle, jamais un modèle partiel), l'index de doublons est
+    complété par lots puis le point de reprise est mis à jour.
+
+    Args:
+        engine (FaceEngine): Moteur facial (dossiers, prétraitement, stockage)
+        electeur_ids (set): Électeurs à reconstruire (None : tous les dossiers)
+        workers (int): Processus de calcul (nombre de cœurs par défaut)
+        checkpoint_path (str): Point de reprise (dans le stockage par défaut)
+        restart (bool): Ignorer le point de reprise existant
+        batch_size (int): Modèles par écriture du point de reprise et de l'index de doublons
+        progress (callable): Appelée avec le rapport après chaque lot
+
+    Returns:
+        dict: {'total', 'skipped', 'rebuilt', 'failed', 'errors', 'images', 'duree', 'images_par_s'}
+    """
+    store = engine.model_store
+    signature = {'params': store.params, 'face_size': list(engine.face_size), 'equalize': bool(engine.equalize)}
+    checkpoint = RebuildCheckpoint(checkpoint_path or os.path.join(store.root, CHECKPOINT_FILENAME), signature)
+    checkpoint.open(restart=restart)
+
+    folders = list_user_folders(engine.faces_data_path, electeur_ids)
+    todo = [(electeur_id, folder) for electeur_id, folder in folders if electeur_id not in checkpoint.done]
+    report = {
+        'total': len(folders),
+        'skipped': len(folders) - len(todo),
+        'rebuilt': 0,
+        'failed': 0,
+        'errors': [],
+        'images': 0,
+        'duree': 0.0,
+        'images_par_s': 0.0
+    }
+
+    start = time.perf_counter()
+    batch = []
+
+    def flush():
+        if not batch:
+            return
+        engine.duplicate_index.add_many(
+            [electeur_id for electeur_id, _ in batch],
+            [engine.duplicate_index.descriptor(histograms) for _, histograms in batch]
+        )
+        for electeur_id, _ in batch:
+            engine.model_cache.invalidate(electeur_id)
+        checkpoint.mark([electeur_id for electeur_id, _ in batch])
+        batch.clear()
+        report['duree'] = round(time.perf_counter() - start, 3)
+        report['images_par_s'] = round(report['images'] / report['duree'], 1) if report['duree'] else 0.0
+        if progress is not None:
+            progress(report)
+
+    tasks = iter([(electeur_id, folder, engine.face_size, engine.equalize, store.params) for electeur_id, folder in todo])
+    workers = workers or os.cpu_count() or 1
+    try:
+        # 'spawn' : l'application a pu démarrer des threads (pipeline de capture, envoi des SMS) avant le fork
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker) as executor:
+            # Au plus 4 tâches en vol par processus : mémoire bornée quel que soit le nombre d'électeurs
+            pending = set()
+            for task in tasks:
+                pending.add(executor.submit(compute_user_histograms, task))
+                if len(pending) < workers * 4:
+                    continue
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    _collect(future.result(), store, batch, report)
+                if len(batch) >= batch_size:
+                    flush()
+            for future in pending:
+                _collect(future.result(), store, batch, report)
+                if len(batch) >= batch_size:
+                    flush()
+        flush()
+    finally:
+        checkpoint.close()
+
+    report['duree'] = round(time.perf_counter() - start, 3)
+    report['images_par_s'] = round(report['images'] / report['duree'], 1) if report['duree'] else 0.0
+    return report
+
+
+def _collect(result, store, batch, report):
+    electeur_id, histograms, images, error = result
+    if histograms is None:
+        report['failed'] += 1
+        report['errors'].append({'electeur_id': electeur_id, 'message': error})
+        return
+    store.put(electeur_id, histograms)
+    report['rebuilt'] += 1
+    report['images'] += images
+    batch.append((electeur_id, histograms))
@@ -0,0 +1,232 @@
+import json
+import os
+import threading
+
+import numpy as np
+from flask import current_app
+
+from utils import metrics
+from utils.lbph import LBPH_PARAMS, histogram_dim
+
+try:
+    import fcntl
+except ImportError:  # Windows : verrou inter-processus indisponible
+    fcntl = None
+
+# Enregistrement de l'index : électeur -> position (en lignes) de ses histogrammes
+INDEX_DTYPE = np.dtype([
+    ('electeur_id', '<i8'),
+    ('offset', '<i8'),
+    ('count', '<i4')
+])
+
+DEFAULT_STORE_PATH = os.path.join('models', 'store')
+
+
+class ModelStore:
+    """
+    Stockage binaire compact des histogrammes LBPH de tous les électeurs.
+
+    - histograms.f32 : matrice float32 (lignes de dimension `dim`) en ajout seul
+    - index.bin      : journal d'enregistrements (electeur_id, offset, count) en ajout seul,
+                       le dernier enregistrement d'un électeur fait foi (count=0 : supprimé)
+    - meta.json      : paramètres LBPH et dimension des histogrammes
+
+    La lecture d'un modèle est une tranche sans copie d'un np.memmap. L'index est
+    relu de façon incrémentale pour voir les écritures des autres processus.
+    """
+
+    def __init__(self, root, params=None):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+        self.data_path = os.path.join(root, 'histograms.f32')
+        self.index_path = os.path.join(root, 'index.bin')
+        self.meta_path = os.path.join(root, 'meta.json')
+        self.lock_path = os.path.join(root, '.lock')
+
+        self.params = self._load_or_create_meta(params or LBPH_PARAMS)
+        self.dim = histogram_dim(self.params)
+        self.row_bytes = self.dim * 4
+
+        self._lock = threading.RLock()
+        self._index = {}  # electeur_id -> (offset, count)
+        self._index_bytes_read = 0
+        self._mmap = None
+        self._mmap_rows = 0
+        self.live_rows = 0
+
+    def _load_or_create_meta(self, params):
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path) as f:
+                return json.load(f)['params']
+
+        meta = {'params': dict(params), 'dim': histogram_dim(params), 'dtype': 'float32'}
+        tmp_path = self.meta_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self.meta_path)
+        return dict(params)
+
+    # --- Index ---
+
+    def _refresh_index(self):
+        """Lire les enregistrements ajoutés à l'index depuis la dernière lecture"""
+        try:
+            size = os.path.getsize(self.index_path)
+        except OSError:
+            return
+
+        # Ignorer un enregistrement partiellement écrit par un autre processus
+        size -= size % INDEX_DTYPE.itemsize
+        if size <= self._index_bytes_read:
+            return
+
+        with open(self.index_path, 'rb') as f:
+            f.seek(self._index_bytes_read)
+            records = np.frombuffer(f.read(size - self._index_bytes_read), dtype=INDEX_DTYPE)
+
+        for electeur_id, offset, count in records.tolist():
+            previous = self._index.pop(electeur_id, None)
+            if previous is not None:
+                self.live_rows -= previous[1]
+            if count > 0:
+                self._index[electeur_id] = (offset, count)
+                self.live_rows += count
+        self._index_bytes_read = size
+
+    def _matrix(self, min_rows):
+        """Mapper le fichier de données en mémoire (remappé s'il a grandi)"""
+        if self._mmap is None or self._mmap_rows < min_rows:
+            rows = os.path.getsize(self.data_path) // self.row_bytes
+            self._mmap = np.memmap(self.data_path, dtype=np.float32, mode='r', shape=(rows, self.dim))
+            self._mmap_rows = rows
+        return self._mmap
+
+    # --- Lecture ---
+
+    def get(self, electeur_id):
+        """
+        Obtenir les histogrammes d'un électeur
+
+        Returns:
+            np.ndarray: Vue (count, dim) sur le fichier mappé, ou None si absent
+        """
+        with self._lock:
+            self._refresh_index()
+            entry = self._index.get(int(electeur_id))
+            if entry is None:
+                return None
+            offset, count = entry
+            return self._matrix(offset + count)[offset:offset + count]
+
+    def __contains__(self, electeur_id):
+        with self._lock:
+            self._refresh_index()
+            return int(electeur_id) in self._index
+
+    def __len__(self):
+        with self._lock:
+            self._refresh_index()
+            return len(self._index)
+
+    def version(self):
+        """Version de l'index (octets lus), croissante à chaque écriture de n'importe quel processus"""
+        with self._lock:
+            self._refresh_index()
+            return self._index_bytes_read
+
+    def entries(self):
+        """
+        Instantané de l'index et de la matrice complète
+
+        Returns:
+            tuple: (dict electeur_id -> (offset, count), matrice mappée de toutes les lignes, version)
+        """
+        with self._lock:
+            self._refresh_index()
+            rows = max((offset + count for offset, count in self._index.values()), default=0)
+            if rows == 0:
+                return {}, np.empty((0, self.dim), dtype=np.float32), self._index_bytes_read
+            return dict(self._index), self._matrix(rows), self._index_bytes_read
+
+    # --- Écriture ---
+
+    def _append(self, electeur_id, histograms):
+        """Ajouter des lignes et leur enregistrement d'index sous verrou inter-processus"""
+        with self._lock, open(self.lock_path, 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                with open(self.data_path, 'ab') as data:
+                    size = os.fstat(data.fileno()).st_size
+                    if size % self.row_bytes:
+                        # Ligne partielle laissée par une écriture interrompue
+                        size -= size % self.row_bytes
+                        data.truncate(size)
+                    offset = size // self.row_bytes
+                    if histograms.size:
+                        data.write(histograms.tobytes())
+                        data.flush()
+                        os.fsync(data.fileno())
+
+                # L'enregistrement d'index n'est écrit qu'une fois les données durables
+                record = np.array([(int(electeur_id), offset, histograms.shape[0])], dtype=INDEX_DTYPE)
+                with open(self.index_path, 'ab') as index:
+                    index.write(record.tobytes())
+                    index.flush()
+                    os.fsync(index.fileno())
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+            self._refresh_index()
+
+    def put(self, electeur_id, histograms):
+        """
+        Enregistrer (ou remplacer) les histogrammes d'un électeur
+
+        Args:
+            electeur_id (int): Identifiant de l'électeur
+            histograms: Histogrammes LBPH de forme (n, dim)
+        """
+        histograms = np.ascontiguousarray(histograms, dtype=np.float32)
+        if histograms.ndim != 2 or histograms.shape[1] != self.dim:
+            raise ValueError(f"Histogrammes de forme {histograms.shape}, attendu (n, {self.dim})")
+        if histograms.shape[0] == 0:
+            raise ValueError("Aucun histogramme à enregistrer")
+        self._append(electeur_id, histograms)
+
+    def delete(self, electeur_id):
+        """Supprimer le modèle d'un électeur (enregistrement d'index à count=0)"""
+        self._append(electeur_id, np.empty((0, self.dim), dtype=np.float32))
+
+    def stats(self):
+        """Taille de l'index et du fichier de données"""
+        with self._lock:
+            self._refresh_index()
+            data_rows = os.path.getsize(self.data_path) // self.row_bytes if os.path.exists(self.data_path) else 0
+            return {
+                'models': len(self._index),
+                'live_rows': self.live_rows,
+                'data_rows': data_rows,
+                'data_bytes': data_rows * self.row_bytes,
+                'dim': self.dim
+            }
+
+
+_model_store = None
+_model_store_lock = threading.Lock()
+
+
+def get_model_store():
+    """Obtenir le stockage de modèles du processus"""
+    global _model_store
+    if _model_store is None:
+        with _model_store_lock:
+            if _model_store is None:
+                _model_store = ModelStore(current_app.config.get('FACE_MODEL_STORE_PATH', DEFAULT_STORE_PATH))
+    return _model_store
+
+
+metrics.register('model_store', lambda: _model_store.stats() if _model_store is not None else {'models': 0})
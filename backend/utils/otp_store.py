@@ -0,0 +1,266 @@
+import hmac
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from models import db, OTP
+from utils import metrics
+
+# Résultats d'une vérification
+OTP_OK = 'ok'
+OTP_INVALID = 'invalid'
+OTP_EXPIRED = 'expired'
+OTP_TOO_MANY_ATTEMPTS = 'too_many_attempts'
+
+
+class OtpStore:
+    """
+    Codes OTP vivants en mémoire, adossés à la table otps.
+
+    - Un emplacement par (téléphone, type d'OTP) : un nouveau code remplace le
+      précédent, en mémoire comme en base (lignes précédentes marquées utilisées).
+    - Vérification : comparaison en mémoire puis consommation par un UPDATE
+      conditionnel sur la clé primaire (utilise passe de False à True une seule
+      fois, même entre processus). Si le code n'est pas en mémoire (autre
+      processus, redémarrage), recherche indexée dans otps.
+    - Échecs de vérification bornés par téléphone : compteur à fenêtre fixe
+      (OTP_MAX_ATTEMPTS par OTP_ATTEMPT_WINDOW secondes), O(1) par tentative.
+      Le compteur est propre au processus : la limite vaut pour chaque worker.
+    - Purge par lots des lignes utilisées ou expirées, au plus une fois par
+      `purge_interval` secondes (maybe_purge) ou à la demande (scripts/purge_otps.py).
+
+    `clock` (datetime UTC naïve) est injectable pour les simulations.
+    """
+
+    def __init__(self, max_attempts=5, attempt_window=900.0, purge_interval=300.0,
+                 purge_batch_size=5000, clock=datetime.utcnow):
+        self.max_attempts = max_attempts
+        self.attempt_window = attempt_window
+        self.purge_interval = purge_interval
+        self.purge_batch_size = purge_batch_size
+        self.clock = clock
+
+        self._slots = {}       # téléphone -> {type: (id, code, expire_at)}
+        self._attempts = {}    # téléphone -> [début de fenêtre (monotonic), échecs]
+        self._lock = threading.Lock()
+        self._purge_lock = threading.Lock()
+        self._purged_at = None
+
+        self._stats = {
+            'issued': 0,
+            'verified': 0,
+            'memory_hits': 0,
+            'db_lookups': 0,
+            'invalid': 0,
+            'expired': 0,
+            'throttled': 0,
+            'purges': 0,
+            'purged_rows': 0
+        }
+
+    def _bump(self, key, delta=1):
+        with self._lock:
+            self._stats[key] += delta
+
+    def issue(self, numero_telephone, type_otp, code, lifetime):
+        """
+        Enregistrer un nouveau code (transaction validée par l'appelant)
+
+        Args:
+            numero_telephone (str): Destinataire
+            type_otp (str): 'registration' ou 'login'
+            code (str): Code généré
+            lifetime (timedelta): Durée de validité
+
+        Returns:
+            OTP: Ligne insérée (id attribué)
+        """
+        expire_at = self.clock() + lifetime
+        # Les codes précédents du même emplacement ne sont plus acceptés
+        db.session.execute(
+            db.update(OTP)
+            .where(OTP.numero_telephone == numero_telephone, OTP.type_otp == type_otp, OTP.utilise.is_not(True))
+            .values(utilise=True)
+        )
+        otp = OTP(numero_telephone=numero_telephone, code=code, expire_at=expire_at, type_otp=type_otp, utilise=False)
+        db.session.add(otp)
+        db.session.flush()
+
+        # Si la transaction est annulée, l'UPDATE conditionnel de verify ne trouve pas la ligne
+        with self._lock:
+            self._slots.setdefault(numero_telephone, {})[type_otp] = (otp.id, code, expire_at)
+            self._stats['issued'] += 1
+        return otp
+
+    def _throttled(self, numero_telephone, now):
+        with self._lock:
+            window = self._attempts.get(numero_telephone)
+            if window is None or now - window[0] >= self.attempt_window:
+                return False
+            return window[1] >= self.max_attempts
+
+    def _record_failure(self, numero_telephone, now):
+        with self._lock:
+            window = self._attempts.get(numero_telephone)
+            if window is None or now - window[0] >= self.attempt_window:
+                self._attempts[numero_telephone] = [now, 1]
+            else:
+                window[1] += 1
+
+    def _find_in_memory(self, numero_telephone, code):
+        with self._lock:
+            for type_otp, (otp_id, slot_code, expire_at) in self._slots.get(numero_telephone, {}).items():
+                if hmac.compare_digest(slot_code, code):
+                    return otp_id, type_otp, expire_at
+        return None
+
+    def _find_in_db(self, numero_telephone, code):
+        # Index ix_otps_telephone_code_utilise ; le plus récent d'abord
+        row = db.session.query(OTP.id, OTP.type_otp, OTP.expire_at).filter(
+            OTP.numero_telephone == numero_telephone,
+            OTP.code == code,
+            OTP.utilise.is_not(True)
+        ).order_by(OTP.id.desc()).first()
+        return tuple(row) if row else None
+
+    def _forget(self, numero_telephone, otp_id):
+        with self._lock:
+            slots = self._slots.get(numero_telephone)
+            if not slots:
+                return
+            for type_otp, slot in list(slots.items()):
+                if slot[0] == otp_id:
+                    del slots[type_otp]
+            if not slots:
+                del self._slots[numero_telephone]
+
+    def verify(self, numero_telephone, code):
+        """
+        Vérifier et consommer un code (transaction validée par l'appelant)
+
+        Returns:
+            tuple: (OTP_OK | OTP_INVALID | OTP_EXPIRED | OTP_TOO_MANY_ATTEMPTS, type d'OTP ou None)
+        """
+        now = time.monotonic()
+        if self._throttled(numero_telephone, now):
+            self._bump('throttled')
+            return OTP_TOO_MANY_ATTEMPTS, None
+
+        found = self._find_in_memory(numero_telephone, code)
+        if found is not None:
+            self._bump('memory_hits')
+        else:
+            self._bump('db_lookups')
+            found = self._find_in_db(numero_telephone, code)
+
+        if found is None:
+            self._record_failure(numero_telephone, now)
+            self._bump('invalid')
+            return OTP_INVALID, None
+
+        otp_id, type_otp, expire_at = found
+        if self.clock() > expire_at:
+            self._forget(numero_telephone, otp_id)
+            self._bump('expired')
+            return OTP_EXPIRED, None
+
+        # Consommation unique : False -> True sur la clé primaire
+        consumed = db.session.execute(
+            db.update(OTP).where(OTP.id == otp_id, OTP.utilise.is_not(True)).values(utilise=True)
+        ).rowcount
+        self._forget(numero_telephone, otp_id)
+        if not consumed:
+            self._record_failure(numero_telephone, now)
+            self._bump('invalid')
+            return OTP_INVALID, None
+
+        with self._lock:
+            self._attempts.pop(numero_telephone, None)
+            self._stats['verified'] += 1
+        return OTP_OK, type_otp
+
+    def purge(self):
+        """
+        Supprimer par lots les lignes utilisées ou expirées (chaque lot est validé)
+
+        Returns:
+            int: Nombre de lignes supprimées
+        """
+        now = self.clock()
+        deleted = 0
+        while True:
+            ids = [row_id for (row_id,) in db.session.query(OTP.id).filter(
+                (OTP.utilise.is_(True)) | (OTP.expire_at < now)
+            ).limit(self.purge_batch_size).all()]
+            if not ids:
+                break
+            db.session.execute(db.delete(OTP).where(OTP.id.in_(ids)))
+            db.session.commit()
+            deleted += len(ids)
+            if len(ids) < self.purge_batch_size:
+                break
+        db.session.rollback()
+
+        # Emplacements expirés et fenêtres de tentatives terminées
+        monotonic = time.monotonic()
+        with self._lock:
+            for numero_telephone in list(self._slots):
+                slots = self._slots[numero_telephone]
+                for type_otp in [t for t, slot in slots.items() if slot[2] < now]:
+                    del slots[type_otp]
+                if not slots:
+                    del self._slots[numero_telephone]
+            for numero_telephone in [p for p, w in self._attempts.items() if monotonic - w[0] >= self.attempt_window]:
+                del self._attempts[numero_telephone]
+            self._stats['purges'] += 1
+            self._stats['purged_rows'] += deleted
+        return deleted
+
+    def maybe_purge(self):
+        """Purger si la dernière purge date de plus de `purge_interval` secondes (à appeler hors transaction)"""
+        if self._purged_at is not None and time.monotonic() - self._purged_at < self.purge_interval:
+            return 0
+        if not self._purge_lock.acquire(blocking=False):
+            return 0
+        try:
+            self._purged_at = time.monotonic()
+            return self.purge()
+        finally:
+            self._purge_lock.release()
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self._stats,
+                'live_slots': sum(len(slots) for slots in self._slots.values()),
+                'throttle_windows': len(self._attempts)
+            }
+
+
+_otp_store = None
+_otp_store_lock = threading.Lock()
+
+
+def get_otp_store():
+    """Obtenir le magasin d'OTP du processus (limites et purge depuis la configuration)"""
+    global _otp_store
+    if _otp_store is None:
+        with _otp_store_lock:
+            if _otp_store is None:
+                _otp_store = OtpStore(
+                    max_attempts=current_app.config.get('OTP_MAX_ATTEMPTS', 5),
+                    attempt_window=current_app.config.get('OTP_ATTEMPT_WINDOW', 900.0),
+                    purge_interval=current_app.config.get('OTP_PURGE_INTERVAL', 300.0),
+                    purge_batch_size=current_app.config.get('OTP_PURGE_BATCH_SIZE', 5000)
+                )
+    return _otp_store
+
+
+def otp_lifetime():
+    """Durée de validité d'un code (OTP_EXPIRY_MINUTES)"""
+    return timedelta(minutes=current_app.config.get('OTP_EXPIRY_MINUTES', 5))
+
+
+metrics.register('otp', lambda: _otp_store.stats() if _otp_store is not None else {'issued': 0})
@@ -0,0 +1,187 @@
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime, timezone
+
+from flask import Response, current_app, request
+
+from utils import metrics
+
+
+class ResultsCache:
+    """
+    Cache des réponses JSON publiques (résultats, statistiques).
+
+    Chaque entrée garde le corps sérialisé, son ETag (empreinte du contenu) et
+    sa date de dernière modification. Une entrée est servie tant qu'elle a
+    moins de `ttl` secondes et qu'aucun vote n'a été validé depuis son calcul
+    (invalidate() est appelé après chaque commit de vote). Les votes validés
+    par d'autres processus ne sont vus qu'à l'expiration du TTL.
+
+    Un client qui renvoie l'ETag courant (If-None-Match) reçoit un 304 sans
+    requête en base ; une seule requête recalcule une entrée expirée à la fois.
+    """
+
+    def __init__(self, ttl=5.0):
+        self.ttl = ttl
+
+        self._entries = {}   # clé -> (corps, etag, last_modified, calculé à (monotonic), génération)
+        self._key_locks = {}
+        self._generation = 0
+        self._invalidated_at = None
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.invalidations = 0
+        self._served_age_total = 0.0
+        self._served_age_max = 0.0
+        self._served = 0
+
+    def invalidate(self):
+        """Marquer toutes les entrées comme périmées (après un vote validé)"""
+        with self._lock:
+            self._generation += 1
+            self._invalidated_at = time.monotonic()
+            self.invalidations += 1
+
+    def _valid_entry(self, key):
+        """Entrée fraîche pour cette clé, ou None (à appeler sous verrou)"""
+        entry = self._entries.get(key)
+        if entry is None or entry[4] != self._generation or time.monotonic() - entry[3] > self.ttl:
+            return None
+        return entry
+
+    def _record_served(self, entry):
+        age = time.monotonic() - entry[3]
+        self._served += 1
+        self._served_age_total += age
+        self._served_age_max = max(self._served_age_max, age)
+
+    def get(self, key, compute):
+        """
+        Obtenir l'entrée d'une clé, en la recalculant si nécessaire
+
+        Args:
+            key (str): Nom de la réponse en cache
+            compute (callable): Fonction sans argument retournant le dict à sérialiser
+
+        Returns:
+            tuple: (corps JSON, etag, last_modified)
+        """
+        with self._lock:
+            entry = self._valid_entry(key)
+            if entry is not None:
+                self.hits += 1
+                self._record_served(entry)
+                return entry[:3]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Un seul recalcul par clé ; les requêtes concurrentes attendent son résultat
+        with key_lock:
+            with self._lock:
+                entry = self._valid_entry(key)
+                if entry is not None:
+                    self.hits += 1
+                    self._record_served(entry)
+                    return entry[:3]
+                self.misses += 1
+                generation = self._generation
+                previous = self._entries.get(key)
+
+            body = json.dumps(compute(), ensure_ascii=False, sort_keys=True).encode('utf-8')
+            etag = hashlib.sha1(body).hexdigest()
+            # Contenu inchangé : conserver la date de modification (If-Modified-Since reste valide)
+            if previous is not None and previous[1] == etag:
+                last_modified = previous[2]
+            else:
+                last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+
+            entry = (body, etag, last_modified, time.monotonic(), generation)
+            with self._lock:
+                self._entries[key] = entry
+                self._record_served(entry)
+            return entry[:3]
+
+    def _is_not_modified(self, key):
+        """Vrai si l'entrée en cache correspond aux en-têtes conditionnels de la requête"""
+        with self._lock:
+            entry = self._valid_entry(key)
+            if entry is None:
+                return False, None
+
+            if request.if_none_match:
+                match = request.if_none_match.contains(entry[1])
+            elif request.if_modified_since:
+                match = entry[2] <= request.if_modified_since
+            else:
+                match = False
+
+            if match:
+                self.not_modified += 1
+                self._record_served(entry)
+            return match, entry
+
+    def response(self, key, compute):
+        """
+        Réponse HTTP d'une clé : 304 si le client a déjà la version courante, sinon le JSON en cache
+
+        Le 304 est décidé avant tout calcul : il ne touche pas la base.
+        """
+        match, entry = self._is_not_modified(key)
+        if match:
+            etag, last_modified = entry[1], entry[2]
+            response = Response(status=304)
+        else:
+            body, etag, last_modified = self.get(key, compute)
+            response = Response(body, status=200, mimetype='application/json')
+
+        response.set_etag(etag)
+        response.last_modified = last_modified
+        # Toujours revalider : les votes doivent apparaître dès l'invalidation
+        response.headers['Cache-Control'] = 'public, no-cache'
+        return response
+
+    def stats(self):
+        """Taux de succès et fraîcheur des réponses servies"""
+        with self._lock:
+            lookups = self.hits + self.misses + self.not_modified
+            now = time.monotonic()
+            return {
+                'ttl_seconds': self.ttl,
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'not_modified': self.not_modified,
+                'hit_ratio': round((self.hits + self.not_modified) / lookups, 4) if lookups else 0.0,
+                'invalidations': self.invalidations,
+                'served_age_avg_seconds': round(self._served_age_total / self._served, 4) if self._served else 0.0,
+                'served_age_max_seconds': round(self._served_age_max, 4),
+                'entry_age_seconds': {key: round(now - entry[3], 3) for key, entry in self._entries.items()},
+                'since_invalidation_seconds': round(now - self._invalidated_at, 3) if self._invalidated_at else None
+            }
+
+
+_results_cache = None
+_results_cache_lock = threading.Lock()
+
+
+def get_results_cache():
+    """Obtenir le cache de résultats du processus (TTL depuis la configuration)"""
+    global _results_cache
+    if _results_cache is None:
+        with _results_cache_lock:
+            if _results_cache is None:
+                _results_cache = ResultsCache(ttl=current_app.config.get('RESULTS_CACHE_TTL', 5.0))
+    return _results_cache
+
+
+def invalidate_results():
+    """Invalider les réponses en cache (sans effet si le cache n'a pas encore servi)"""
+    if _results_cache is not None:
+        _results_cache.invalidate()
+
+
+metrics.register('results_cache', lambda: _results_cache.stats() if _results_cache is not None else {'entries': 0})
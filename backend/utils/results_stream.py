@@ -0,0 +1,230 @@
+import json
+import threading
+import time
+from collections import deque
+
+from flask import current_app
+
+from utils import metrics
+
+RETRY_MS = 3000  # délai de reconnexion suggéré aux clients EventSource
+
+
+def format_event(name, data, event_id=None):
+    """Sérialiser un événement Server-Sent Events"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {name}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False, separators=(',', ':'))}")
+    return ('\n'.join(lines) + '\n\n').encode('utf-8')
+
+
+def results_delta(previous, current):
+    """
+    Différence entre deux états de résultats (format de compute_results)
+
+    Returns:
+        dict ou None si rien n'a changé : lignes de candidats modifiées et totaux
+    """
+    before = {row['id']: row for row in previous['results']}
+    changed = [row for row in current['results'] if before.get(row['id']) != row]
+    removed = [candidat_id for candidat_id in before if candidat_id not in {row['id'] for row in current['results']}]
+    totals = {key: value for key, value in current.items() if key != 'results' and previous.get(key) != value}
+    if not changed and not removed and not totals:
+        return None
+    return {'results': changed, 'removed': removed, **totals}
+
+
+class Subscriber:
+    """Client connecté au flux : position de lecture dans la fenêtre d'événements"""
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self.connected_at = time.monotonic()
+
+
+class ResultsBroadcaster:
+    """
+    Diffusion des résultats en direct (Server-Sent Events).
+
+    Un seul thread par processus calcule les résultats à chaque tick, en déduit
+    un delta et sérialise l'événement une fois. Les événements sont gardés dans
+    une fenêtre circulaire de `buffer_size` éléments, partagée par tous les
+    clients : la diffusion est un ajout plus un notify_all, quel que soit le
+    nombre de spectateurs, et la charge en base dépend du rythme des ticks.
+
+    Chaque client lit la fenêtre à partir de sa position ; le retard d'un client
+    est donc borné à `buffer_size` événements. Un client plus lent (événements
+    déjà sortis de la fenêtre) est déconnecté : EventSource se reconnecte et
+    reçoit l'instantané complet, lui aussi construit une seule fois par tick.
+    """
+
+    def __init__(self, app, compute, tick=1.0, buffer_size=32, heartbeat=15.0):
+        self.app = app
+        self.compute = compute
+        self.tick = tick
+        self.buffer_size = buffer_size
+        self.heartbeat = heartbeat
+
+        self._lock = threading.Lock()
+        self._published = threading.Condition(self._lock)
+        self._events = deque(maxlen=buffer_size)  # (seq, événement sérialisé)
+        self._subscribers = set()
+        self._state = None
+        self._snapshot_event = None
+        self._seq = 0
+        self._thread = None
+        self._stopped = threading.Event()
+
+        self.ticks = 0
+        self.computes = 0
+        self.events = 0
+        self.dropped = 0
+        self.peak_subscribers = 0
+        self._publish_time_total = 0.0
+
+    def start(self):
+        """Démarrer le thread de diffusion"""
+        self._thread = threading.Thread(target=self._run, name='results-stream', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Arrêter la diffusion et terminer le flux de tous les clients"""
+        self._stopped.set()
+        with self._published:
+            self._published.notify_all()
+
+    def _set_state(self, state):
+        """Enregistrer un nouvel état et son instantané (sous verrou)"""
+        self._seq += 1
+        self._state = state
+        self._snapshot_event = b'retry: %d\n' % RETRY_MS + format_event('snapshot', state, self._seq)
+
+    def _refresh(self):
+        """Recalculer les résultats et publier le delta s'il y en a un (thread de diffusion)"""
+        with self.app.app_context():
+            state = self.compute()
+
+        delta = results_delta(self._state, state)
+        start = time.perf_counter()
+        with self._published:
+            self.computes += 1
+            if delta is None:
+                return
+            self._set_state(state)
+            self._events.append((self._seq, format_event('delta', delta, self._seq)))
+            self.events += 1
+            self._published.notify_all()
+        self._publish_time_total += time.perf_counter() - start
+
+    def _run(self):
+        while not self._stopped.wait(self.tick):
+            with self._lock:
+                if not self._subscribers:
+                    continue
+            self.ticks += 1
+            try:
+                self._refresh()
+            except Exception:
+                self.app.logger.exception("Erreur diffusion des résultats")
+
+    def subscribe(self):
+        """
+        Inscrire un client ; son premier événement est l'instantané courant
+
+        Returns:
+            Subscriber
+        """
+        with self._lock:
+            needs_state = self._state is None
+        if needs_state:
+            # Premier client du processus : calcul initial dans la requête
+            state = self.compute()
+            with self._lock:
+                self.computes += 1
+                if self._state is None:
+                    self._set_state(state)
+
+        with self._lock:
+            subscriber = Subscriber(self._seq)
+            self._subscribers.add(subscriber)
+            self.peak_subscribers = max(self.peak_subscribers, len(self._subscribers))
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def stream(self, subscriber):
+        """Générateur des octets envoyés à un client (commentaire de maintien si aucun événement)"""
+        try:
+            with self._lock:
+                snapshot = self._snapshot_event
+                subscriber.cursor = self._seq
+            yield snapshot
+
+            while True:
+                with self._published:
+                    if self._seq <= subscriber.cursor and not self._stopped.is_set():
+                        self._published.wait(self.heartbeat)
+                    if self._stopped.is_set():
+                        return
+                    if self._seq <= subscriber.cursor:
+                        pending = None
+                    elif not self._events or self._events[0][0] > subscriber.cursor + 1:
+                        # Événements manqués sortis de la fenêtre : consommateur trop lent
+                        self.dropped += 1
+                        return
+                    else:
+                        pending = [event for seq, event in self._events if seq > subscriber.cursor]
+                        subscriber.cursor = self._seq
+
+                yield b''.join(pending) if pending else b': keepalive\n\n'
+        finally:
+            self.unsubscribe(subscriber)
+
+    def stats(self):
+        """Clients connectés, événements diffusés et coût de la publication"""
+        with self._lock:
+            return {
+                'tick_seconds': self.tick,
+                'buffer_size': self.buffer_size,
+                'subscribers': len(self._subscribers),
+                'peak_subscribers': self.peak_subscribers,
+                'ticks': self.ticks,
+                'computes': self.computes,
+                'events': self.events,
+                'dropped_slow_consumers': self.dropped,
+                'publish_avg_ms': round(self._publish_time_total / self.events * 1000, 3) if self.events else 0.0
+            }
+
+
+_broadcaster = None
+_broadcaster_lock = threading.Lock()
+
+
+def get_results_broadcaster(compute):
+    """
+    Obtenir le diffuseur de résultats du processus (démarre le thread au premier appel)
+
+    Args:
+        compute (callable): Fonction sans argument retournant les résultats (dict)
+    """
+    global _broadcaster
+    if _broadcaster is None:
+        with _broadcaster_lock:
+            if _broadcaster is None:
+                broadcaster = ResultsBroadcaster(
+                    current_app._get_current_object(),
+                    compute,
+                    tick=current_app.config.get('RESULTS_STREAM_TICK', 1.0),
+                    buffer_size=current_app.config.get('RESULTS_STREAM_BUFFER', 32),
+                    heartbeat=current_app.config.get('RESULTS_STREAM_HEARTBEAT', 15.0)
+                )
+                broadcaster.start()
+                _broadcaster = broadcaster
+    return _broadcaster
+
+
+metrics.register('results_stream', lambda: _broadcaster.stats() if _broadcaster is not None else {'subscribers': 0})
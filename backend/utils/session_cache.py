@@ -0,0 +1,155 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from flask import current_app
+
+from models import db, Electeur, SessionAuthentification
+from utils import metrics
+
+
+def is_fully_authenticated(entry):
+    """Équivalent de SessionAuthentification.is_fully_authenticated pour une entrée du cache"""
+    return (entry['etape_1_complete'] and
+            entry['etape_2_complete'] and
+            entry['etape_3_complete'] and
+            datetime.utcnow() <= entry['expire_at'])
+
+
+class SessionCache:
+    """
+    Cache en mémoire des sessions d'authentification et des électeurs.
+
+    - sessions : jeton -> id de l'électeur, étapes validées, expiration
+    - électeurs : id -> to_dict() (dont a_vote)
+
+    Les routes qui modifient ces données (vérification OTP, reconnaissance
+    faciale, vote, déconnexion) invalident l'entrée concernée ; le TTL borne
+    l'écart avec les modifications faites par un autre processus. L'expiration
+    de la session est comparée à l'heure courante à chaque lecture. Les jetons
+    inconnus ne sont pas mis en cache.
+    """
+
+    def __init__(self, ttl=10.0, max_entries=100000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self._sessions = OrderedDict()   # jeton -> (entrée, mis en cache à (monotonic))
+        self._voters = OrderedDict()     # id électeur -> (to_dict(), mis en cache à)
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _get(self, entries, key):
+        with self._lock:
+            cached = entries.get(key)
+            if cached is not None and time.monotonic() - cached[1] < self.ttl:
+                self.hits += 1
+                return cached[0]
+            self.misses += 1
+            return None
+
+    def _put(self, entries, key, value):
+        with self._lock:
+            entries[key] = (value, time.monotonic())
+            entries.move_to_end(key)
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+
+    def get_session(self, token):
+        """
+        Session d'authentification d'un jeton (une requête jointe à l'électeur en cas d'absence)
+
+        Returns:
+            dict: {'id_electeur', 'etape_1_complete', 'etape_2_complete',
+                'etape_3_complete', 'expire_at', 'a_vote'} ou None si le jeton est inconnu
+        """
+        entry = self._get(self._sessions, token)
+        if entry is None:
+            row = db.session.query(SessionAuthentification, Electeur).join(
+                Electeur, Electeur.id == SessionAuthentification.id_electeur
+            ).filter(SessionAuthentification.session_token == token).first()
+            if row is None:
+                return None
+            auth_session, electeur = row
+            entry = {
+                'id_electeur': auth_session.id_electeur,
+                'etape_1_complete': bool(auth_session.etape_1_complete),
+                'etape_2_complete': bool(auth_session.etape_2_complete),
+                'etape_3_complete': bool(auth_session.etape_3_complete),
+                'expire_at': auth_session.expire_at
+            }
+            self._put(self._sessions, token, entry)
+            self._put(self._voters, electeur.id, electeur.to_dict())
+
+        voter = self.get_voter(entry['id_electeur'])
+        return {**entry, 'a_vote': bool(voter and voter['a_vote'])}
+
+    def get_voter(self, electeur_id):
+        """Électeur sérialisé (to_dict()), ou None s'il n'existe pas"""
+        voter = self._get(self._voters, electeur_id)
+        if voter is None:
+            electeur = db.session.get(Electeur, electeur_id)
+            if electeur is None:
+                return None
+            voter = electeur.to_dict()
+            self._put(self._voters, electeur_id, voter)
+        return voter
+
+    def invalidate_session(self, token):
+        with self._lock:
+            if self._sessions.pop(token, None) is not None:
+                self.invalidations += 1
+
+    def invalidate_voter(self, electeur_id):
+        with self._lock:
+            if self._voters.pop(electeur_id, None) is not None:
+                self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'ttl': self.ttl,
+                'sessions': len(self._sessions),
+                'voters': len(self._voters),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else None,
+                'invalidations': self.invalidations
+            }
+
+
+_session_cache = None
+_session_cache_lock = threading.Lock()
+
+
+def get_session_cache():
+    """Obtenir le cache de sessions du processus (TTL depuis la configuration)"""
+    global _session_cache
+    if _session_cache is None:
+        with _session_cache_lock:
+            if _session_cache is None:
+                _session_cache = SessionCache(
+                    ttl=current_app.config.get('SESSION_CACHE_TTL', 10.0),
+                    max_entries=current_app.config.get('SESSION_CACHE_MAX_ENTRIES', 100000)
+                )
+    return _session_cache
+
+
+def invalidate_session(token):
+    """Oublier la session d'un jeton (après modification de ses étapes ou déconnexion)"""
+    if _session_cache is not None and token:
+        _session_cache.invalidate_session(token)
+
+
+def invalidate_voter(electeur_id):
+    """Oublier un électeur (après son vote)"""
+    if _session_cache is not None and electeur_id:
+        _session_cache.invalidate_voter(electeur_id)
+
+
+metrics.register('session_cache', lambda: _session_cache.stats() if _session_cache is not None else {'sessions': 0})
@@ -0,0 +1,278 @@
+import base64
+import calendar
+import hashlib
+import hmac
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from models import db, RevocationJeton
+from utils import metrics
+
+# Étapes d'authentification (masque de bits porté par le jeton)
+STEP_CREDENTIALS, STEP_OTP, STEP_FACE = 1, 2, 4
+ALL_STEPS = STEP_CREDENTIALS | STEP_OTP | STEP_FACE
+
+TOKEN_VERSION = 'v1'
+REVOKED_SESSION, REVOKED_VOTER = 'session', 'electeur'
+
+# Jetons UUID émis avant les jetons signés (sessions_auth.session_token)
+_LEGACY_TOKEN = re.compile(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$')
+
+
+def _b64encode(raw):
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def _epoch(moment):
+    return calendar.timegm(moment.utctimetuple())
+
+
+def new_session_id():
+    """Identifiant de session porté par le jeton et stocké dans sessions_auth.session_token"""
+    return uuid.uuid4().hex
+
+
+def is_legacy_token(token):
+    """Ancien jeton UUID, à vérifier en base (si SESSION_TOKEN_ACCEPT_LEGACY, activé par défaut)"""
+    return (bool(token) and _LEGACY_TOKEN.match(token) is not None and
+            current_app.config.get('SESSION_TOKEN_ACCEPT_LEGACY', True))
+
+
+class TokenSigner:
+    """
+    Jetons de session compacts signés par HMAC-SHA256.
+
+    Format : v1.<id électeur>.<étapes>.<expiration epoch>.<sid>.<signature base64url>
+    La vérification (signature, format, expiration) ne touche pas la base :
+    n'importe quel processus partageant la clé valide le jeton.
+    """
+
+    def __init__(self, secret):
+        self._key = hashlib.sha256(b'session-token:' + secret.encode('utf-8')).digest()
+
+    def _sign(self, payload):
+        return _b64encode(hmac.new(self._key, payload.encode('ascii'), hashlib.sha256).digest())
+
+    def issue(self, electeur_id, steps, expire_at, sid):
+        """
+        Émettre un jeton
+
+        Args:
+            electeur_id (int): Électeur authentifié
+            steps (int): Étapes validées (STEP_*)
+            expire_at (datetime): Expiration (UTC)
+            sid (str): Identifiant de la session (sessions_auth.session_token)
+        """
+        payload = f"{TOKEN_VERSION}.{int(electeur_id)}.{int(steps)}.{_epoch(expire_at)}.{sid}"
+        return f"{payload}.{self._sign(payload)}"
+
+    def decode(self, token, now=None):
+        """
+        Vérifier un jeton
+
+        Returns:
+            tuple: (claims {'electeur_id', 'steps', 'exp', 'sid'} ou None, motif du rejet ou None)
+        """
+        if not isinstance(token, str) or token.count('.') != 5:
+            return None, 'format'
+        payload, _, signature = token.rpartition('.')
+        try:
+            valid = hmac.compare_digest(signature.encode('ascii'), self._sign(payload).encode('ascii'))
+        except UnicodeEncodeError:
+            return None, 'format'  # Jeton non ASCII : jamais émis par ce service
+        if not valid:
+            return None, 'signature'
+        version, electeur_id, steps, exp, sid = payload.split('.')
+        if version != TOKEN_VERSION:
+            return None, 'format'
+        try:
+            claims = {'electeur_id': int(electeur_id), 'steps': int(steps), 'exp': int(exp), 'sid': sid}
+        except ValueError:
+            return None, 'format'
+        if (now or time.time()) > claims['exp']:
+            return None, 'expired'
+        return claims, None
+
+
+class RevocationList:
+    """
+    Liste de révocation des jetons signés, partagée par la base.
+
+    Les révocations (déconnexion : une session ; vote : tous les jetons d'un
+    électeur) sont écrites dans revocations_jetons et ajoutées immédiatement
+    à la liste du processus. Les autres processus les chargent de façon
+    incrémentale (id > dernier vu) au plus une fois par `refresh_interval`
+    secondes. Une révocation disparaît après l'expiration des jetons qu'elle
+    vise : la liste reste petite.
+    """
+
+    def __init__(self, refresh_interval=2.0, purge_interval=300.0):
+        self.refresh_interval = refresh_interval
+        self.purge_interval = purge_interval
+
+        self._revoked = {}        # (type, clé) -> expiration epoch
+        self._last_id = 0
+        self._refreshed_at = 0.0
+        self._purged_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+        self.revocations = 0
+        self.refreshes = 0
+
+    def revoke(self, key_type, key, expire_at):
+        """Révoquer (type, clé) jusqu'à `expire_at` (UTC) ; la transaction est validée ici"""
+        db.session.add(RevocationJeton(type_cle=key_type, cle=str(key), expire_at=expire_at))
+        db.session.commit()
+        with self._lock:
+            self._revoked[(key_type, str(key))] = _epoch(expire_at)
+            self.revocations += 1
+
+    def is_revoked(self, claims):
+        self._maybe_refresh()
+        with self._lock:
+            return ((REVOKED_SESSION, claims['sid']) in self._revoked or
+                    (REVOKED_VOTER, str(claims['electeur_id'])) in self._revoked)
+
+    def _maybe_refresh(self):
+        if time.monotonic() - self._refreshed_at < self.refresh_interval:
+            return
+        # Un seul thread recharge ; les autres utilisent la liste courante
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            self.refresh()
+        finally:
+            self._refresh_lock.release()
+
+    def refresh(self):
+        """Charger les révocations écrites par les autres processus et oublier les expirées"""
+        now = datetime.utcnow()
+        rows = db.session.query(
+            RevocationJeton.id, RevocationJeton.type_cle, RevocationJeton.cle, RevocationJeton.expire_at
+        ).filter(RevocationJeton.id > self._last_id, RevocationJeton.expire_at > now).order_by(RevocationJeton.id).all()
+
+        if time.monotonic() - self._purged_at >= self.purge_interval:
+            db.session.execute(db.delete(RevocationJeton).where(RevocationJeton.expire_at <= now))
+            db.session.commit()
+            self._purged_at = time.monotonic()
+        else:
+            db.session.rollback()
+
+        cutoff = _epoch(now)
+        with self._lock:
+            for row_id, key_type, key, expire_at in rows:
+                self._revoked[(key_type, key)] = _epoch(expire_at)
+                self._last_id = max(self._last_id, row_id)
+            for key in [key for key, exp in self._revoked.items() if exp <= cutoff]:
+                del self._revoked[key]
+            self._refreshed_at = time.monotonic()
+            self.refreshes += 1
+
+    def __len__(self):
+        with self._lock:
+            return len(self._revoked)
+
+
+class SessionTokenService:
+    """Émission, validation et révocation des jetons de session signés"""
+
+    def __init__(self, secret, lifetime=timedelta(minutes=30), refresh_interval=2.0):
+        self.signer = TokenSigner(secret)
+        self.revocations = RevocationList(refresh_interval=refresh_interval)
+        self.lifetime = lifetime
+
+        self._lock = threading.Lock()
+        self.issued = 0
+        self.validated = 0
+        self.rejected = {}
+
+    def issue(self, electeur_id, steps, expire_at, sid):
+        with self._lock:
+            self.issued += 1
+        return self.signer.issue(electeur_id, steps, expire_at, sid)
+
+    def _reject(self, reason):
+        with self._lock:
+            self.rejected[reason] = self.rejected.get(reason, 0) + 1
+        return None
+
+    def validate(self, token, required_steps=ALL_STEPS):
+        """
+        Valider un jeton signé sans requête en base (hors rafraîchissement périodique de la liste de révocation)
+
+        Returns:
+            dict: claims {'electeur_id', 'steps', 'exp', 'sid'}, ou None si le jeton
+                est invalide, expiré, révoqué ou n'a pas validé `required_steps`
+        """
+        claims, reason = self.signer.decode(token)
+        if claims is None:
+            return self._reject(reason)
+        if claims['steps'] & required_steps != required_steps:
+            return self._reject('steps')
+        if self.revocations.is_revoked(claims):
+            return self._reject('revoked')
+        with self._lock:
+            self.validated += 1
+        return claims
+
+    def revoke_session(self, claims):
+        """Déconnexion : révoquer la session du jeton jusqu'à son expiration"""
+        self.revocations.revoke(REVOKED_SESSION, claims['sid'], datetime.utcfromtimestamp(claims['exp']))
+
+    def revoke_voter(self, electeur_id):
+        """Vote : révoquer tous les jetons de l'électeur (émis au plus `lifetime` avant)"""
+        self.revocations.revoke(REVOKED_VOTER, electeur_id, datetime.utcnow() + self.lifetime)
+
+    def session_key(self, token):
+        """
+        Valeur de sessions_auth.session_token désignée par un jeton client
+
+        Jeton signé valide (quelles que soient les étapes) : son sid ; ancien
+        jeton UUID (si acceptés) : le jeton lui-même ; sinon None.
+        """
+        if is_legacy_token(token):
+            return token
+        claims = self.validate(token, required_steps=0)
+        return claims['sid'] if claims else None
+
+    def stats(self):
+        with self._lock:
+            result = {
+                'issued': self.issued,
+                'validated': self.validated,
+                'rejected': dict(self.rejected)
+            }
+        result['revoked_entries'] = len(self.revocations)
+        result['revocations'] = self.revocations.revocations
+        result['revocation_refreshes'] = self.revocations.refreshes
+        return result
+
+
+_token_service = None
+_token_service_lock = threading.Lock()
+
+
+def get_token_service():
+    """Obtenir le service de jetons du processus (clé dérivée de SESSION_TOKEN_SECRET ou SECRET_KEY)"""
+    global _token_service
+    if _token_service is None:
+        with _token_service_lock:
+            if _token_service is None:
+                secret = current_app.config.get('SESSION_TOKEN_SECRET') or current_app.config.get('SECRET_KEY')
+                if not secret:
+                    raise RuntimeError("Aucune clé de signature des jetons (SESSION_TOKEN_SECRET ou SECRET_KEY)")
+                _token_service = SessionTokenService(
+                    secret,
+                    lifetime=timedelta(minutes=current_app.config.get('SESSION_TOKEN_LIFETIME_MINUTES', 30)),
+                    refresh_interval=current_app.config.get('SESSION_REVOCATION_REFRESH', 2.0)
+                )
+    return _token_service
+
+
+metrics.register('session_tokens', lambda: _token_service.stats() if _token_service is not None else {'issued': 0})
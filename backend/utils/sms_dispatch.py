@@ -0,0 +1,255 @@
+import heapq
+import itertools
+import random
+import threading
+import time
+
+from flask import current_app
+
+from utils import metrics
+from utils.sms_service import create_provider
+
+
+class _Message:
+    __slots__ = ('numero_telephone', 'message', 'attempts', 'queued_at')
+
+    def __init__(self, numero_telephone, message):
+        self.numero_telephone = numero_telephone
+        self.message = message
+        self.attempts = 0
+        self.queued_at = time.monotonic()
+
+
+class RateLimiter:
+    """Seau à jetons : au plus `rate` envois par seconde en régime établi, rafales de `burst`"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, count=1):
+        """Attendre que `count` jetons soient disponibles"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                # Un lot plus grand que la rafale passe quand le seau est plein et le met en dette
+                needed = min(count, self.capacity)
+                if self._tokens >= needed:
+                    self._tokens -= count
+                    return
+                delay = (needed - self._tokens) / self.rate
+            time.sleep(delay)
+
+
+class SmsDispatcher:
+    """
+    File d'envoi des SMS, traitée en arrière-plan.
+
+    Les routes déposent le message (queue_sms) et répondent sans attendre la
+    passerelle. `workers` threads partagent un fournisseur unique (client HTTP
+    persistant), prennent jusqu'à `batch_max` messages prêts par appel et
+    respectent la limite de débit du fournisseur. Un échec temporaire est
+    réessayé après un délai exponentiel avec gigue (`retry_base` x 2^n, au plus
+    `retry_max` secondes), jusqu'à `max_attempts` tentatives.
+
+    La file est en mémoire : les messages en attente sont perdus à l'arrêt du
+    processus (l'électeur redemande un code en se reconnectant).
+    """
+
+    def __init__(self, app, provider, workers=4, max_pending=10000, batch_max=20,
+                 max_attempts=5, retry_base=0.5, retry_max=30.0):
+        self.app = app
+        self.provider = provider
+        self.workers = workers
+        self.max_pending = max_pending
+        self.batch_max = batch_max
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.limiter = RateLimiter(provider.rate_per_second) if provider.rate_per_second else None
+
+        self._heap = []   # (échéance monotonic, ordre, message)
+        self._sequence = itertools.count()
+        self._ready = threading.Condition()
+        self._threads = []
+        self._stopped = False
+
+        self._lock = threading.Lock()
+        self._stats = {
+            'queued': 0,
+            'sent': 0,
+            'retried': 0,
+            'failed': 0,
+            'dropped': 0,
+            'batches': 0
+        }
+        self._delivery_time_total = 0.0
+
+    def start(self):
+        """Démarrer les threads d'envoi"""
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f'sms-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout=None):
+        """Arrêter les threads après l'envoi des messages prêts"""
+        with self._ready:
+            self._stopped = True
+            self._ready.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self.provider.close()
+
+    def _bump(self, key, delta=1):
+        with self._lock:
+            self._stats[key] += delta
+
+    def _schedule(self, item, delay=0.0):
+        with self._ready:
+            heapq.heappush(self._heap, (time.monotonic() + delay, next(self._sequence), item))
+            self._ready.notify()
+
+    def enqueue(self, numero_telephone, message):
+        """
+        Déposer un message
+
+        Returns:
+            bool: False si la file est pleine (message abandonné)
+        """
+        with self._ready:
+            if len(self._heap) >= self.max_pending:
+                full = True
+            else:
+                full = False
+                heapq.heappush(self._heap, (time.monotonic(), next(self._sequence), _Message(numero_telephone, message)))
+                self._ready.notify()
+        if full:
+            self._bump('dropped')
+            self.app.logger.error(f"File SMS pleine ({self.max_pending}) : message pour {numero_telephone} abandonné")
+            return False
+        self._bump('queued')
+        return True
+
+    def _take(self):
+        """Attendre puis retirer jusqu'à batch_max messages arrivés à échéance (None à l'arrêt)"""
+        with self._ready:
+            while True:
+                now = time.monotonic()
+                if self._heap and self._heap[0][0] <= now:
+                    batch = []
+                    while self._heap and self._heap[0][0] <= now and len(batch) < self.batch_max:
+                        batch.append(heapq.heappop(self._heap)[2])
+                    if self._heap and self._heap[0][0] <= now:
+                        self._ready.notify()  # il reste des messages prêts pour un autre thread
+                    return batch
+                if self._stopped:
+                    return None
+                self._ready.wait(self._heap[0][0] - now if self._heap else None)
+
+    def _retry_delay(self, attempts):
+        delay = min(self.retry_max, self.retry_base * 2 ** (attempts - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _deliver(self, batch):
+        if self.limiter is not None:
+            self.limiter.acquire(len(batch))
+        try:
+            errors = self.provider.send_batch([(item.numero_telephone, item.message) for item in batch])
+        except Exception as e:
+            errors = [e] * len(batch)
+        self._bump('batches')
+
+        now = time.monotonic()
+        for item, error in zip(batch, errors):
+            item.attempts += 1
+            if error is None:
+                with self._lock:
+                    self._stats['sent'] += 1
+                    self._delivery_time_total += now - item.queued_at
+            elif getattr(error, 'retryable', True) and item.attempts < self.max_attempts:
+                self._bump('retried')
+                self._schedule(item, self._retry_delay(item.attempts))
+            else:
+                self._bump('failed')
+                self.app.logger.error(
+                    f"SMS pour {item.numero_telephone} abandonné après {item.attempts} tentative(s): {error}"
+                )
+
+    def _worker(self):
+        while True:
+            batch = self._take()
+            if batch is None:
+                return
+            try:
+                self._deliver(batch)
+            except Exception as e:
+                self.app.logger.error(f"Erreur file SMS: {e}")
+
+    def stats(self):
+        with self._ready:
+            pending = len(self._heap)
+        with self._lock:
+            sent = self._stats['sent']
+            return {
+                **self._stats,
+                'provider': self.provider.name,
+                'workers': self.workers,
+                'pending': pending,
+                'avg_delivery_time_ms': round(self._delivery_time_total / sent * 1000, 3) if sent else None
+            }
+
+
+_sms_dispatcher = None
+_sms_dispatcher_lock = threading.Lock()
+
+
+def get_sms_dispatcher():
+    """Obtenir la file SMS du processus (fournisseur et workers démarrés au premier appel)"""
+    global _sms_dispatcher
+    if _sms_dispatcher is None:
+        with _sms_dispatcher_lock:
+            if _sms_dispatcher is None:
+                config = current_app.config
+                dispatcher = SmsDispatcher(
+                    current_app._get_current_object(),
+                    create_provider(config),
+                    workers=config.get('SMS_WORKERS', 4),
+                    max_pending=config.get('SMS_QUEUE_MAX', 10000),
+                    batch_max=config.get('SMS_BATCH_MAX', 20),
+                    max_attempts=config.get('SMS_MAX_ATTEMPTS', 5),
+                    retry_base=config.get('SMS_RETRY_BASE', 0.5),
+                    retry_max=config.get('SMS_RETRY_MAX', 30.0)
+                )
+                dispatcher.start()
+                _sms_dispatcher = dispatcher
+    return _sms_dispatcher
+
+
+def queue_sms(numero_telephone, message):
+    """
+    Envoyer un SMS sans attendre la passerelle (SMS_ASYNC, activé par défaut)
+
+    Returns:
+        bool: True si le message est en file (ou envoyé, en mode synchrone)
+    """
+    try:
+        # Fournisseur construit au premier envoi : une configuration invalide
+        # (module twilio absent, identifiants manquants) ne doit pas faire
+        # échouer la requête après le commit de l'inscription ou de la session
+        dispatcher = get_sms_dispatcher()
+        if current_app.config.get('SMS_ASYNC', True):
+            return dispatcher.enqueue(numero_telephone, message)
+        dispatcher.provider.send(numero_telephone, message)
+        return True
+    except Exception as e:
+        current_app.logger.error(f"Erreur envoi SMS: {str(e)}")
+        return False
+
+
+metrics.register('sms', lambda: _sms_dispatcher.stats() if _sms_dispatcher is not None else {'queued': 0})
@@ -1,9 +1,174 @@
-import os
+import abc
+import random
+import threading
+import time
+
 from flask import current_app
 
+
+class SmsSendError(Exception):
+    """Échec d'envoi ; `retryable` indique si une nouvelle tentative a un sens"""
+
+    def __init__(self, message, retryable=True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class SmsProvider(abc.ABC):
+    """
+    Fournisseur d'envoi de SMS.
+
+    `send` lève SmsSendError en cas d'échec. `send_batch` envoie plusieurs
+    messages en un appel quand la passerelle le permet (par défaut : un
+    `send` par message sur la même connexion) et retourne une erreur ou None
+    par message. `rate_per_second` borne le débit vers la passerelle.
+    """
+
+    name = 'base'
+
+    def __init__(self, rate_per_second=None):
+        self.rate_per_second = rate_per_second
+
+    @abc.abstractmethod
+    def send(self, numero_telephone, message):
+        """Envoyer un message ; lève SmsSendError en cas d'échec"""
+
+    def send_batch(self, messages):
+        errors = []
+        for numero_telephone, message in messages:
+            try:
+                self.send(numero_telephone, message)
+                errors.append(None)
+            except Exception as e:
+                errors.append(e)
+        return errors
+
+    def close(self):
+        pass
+
+
+class ConsoleProvider(SmsProvider):
+    """Développement : affiche le message (comportement historique des routes)"""
+
+    name = 'console'
+
+    def send(self, numero_telephone, message):
+        print(f"SMS à {numero_telephone}: {message}")
+
+
+class FakeGatewayProvider(SmsProvider):
+    """
+    Passerelle locale pour les tests et benchmarks : latence et taux d'échec
+    configurables, messages conservés en mémoire (`sent`). Un lot coûte un
+    seul aller-retour simulé.
+    """
+
+    name = 'fake'
+
+    def __init__(self, latency=0.0, failure_rate=0.0, rate_per_second=None, seed=None):
+        super().__init__(rate_per_second)
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.sent = []
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _deliver(self, numero_telephone, message):
+        with self._lock:
+            if self._random.random() < self.failure_rate:
+                return SmsSendError("Passerelle indisponible (simulé)")
+            self.sent.append((numero_telephone, message))
+        return None
+
+    def send(self, numero_telephone, message):
+        errors = self.send_batch([(numero_telephone, message)])
+        if errors[0] is not None:
+            raise errors[0]
+
+    def send_batch(self, messages):
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return [self._deliver(numero_telephone, message) for numero_telephone, message in messages]
+
+
+class TwilioProvider(SmsProvider):
+    """
+    Twilio avec un client unique par processus : son pool de connexions HTTP
+    (keep-alive) évite une poignée de main TLS par message.
+    """
+
+    name = 'twilio'
+
+    def __init__(self, account_sid, auth_token, from_number, rate_per_second=None, timeout=10.0):
+        super().__init__(rate_per_second)
+        from twilio.http.http_client import TwilioHttpClient
+        from twilio.rest import Client
+
+        if not all([account_sid, auth_token, from_number]):
+            raise ValueError("Configuration Twilio incomplète")
+        self.from_number = from_number
+        self._client = Client(account_sid, auth_token,
+                              http_client=TwilioHttpClient(pool_connections=True, timeout=timeout))
+
+    def send(self, numero_telephone, message):
+        from twilio.base.exceptions import TwilioRestException
+
+        try:
+            self._client.messages.create(body=message, from_=self.from_number, to=numero_telephone)
+        except TwilioRestException as e:
+            # 4xx hors 429 : numéro ou message refusé, inutile de réessayer
+            raise SmsSendError(str(e), retryable=e.status == 429 or e.status >= 500)
+        except Exception as e:
+            raise SmsSendError(str(e))
+
+
+# Fabriques de fournisseurs (nom -> fonction(config) -> SmsProvider)
+_provider_factories = {
+    'console': lambda config: ConsoleProvider(),
+    'fake': lambda config: FakeGatewayProvider(
+        latency=config.get('SMS_FAKE_LATENCY', 0.0),
+        failure_rate=config.get('SMS_FAKE_FAILURE_RATE', 0.0)
+    ),
+    'twilio': lambda config: TwilioProvider(
+        config.get('TWILIO_ACCOUNT_SID'),
+        config.get('TWILIO_AUTH_TOKEN'),
+        config.get('TWILIO_PHONE_NUMBER')
+    )
+}
+
+
+def register_provider(name, factory):
+    """Déclarer un fournisseur : factory(config) -> SmsProvider"""
+    _provider_factories[name] = factory
+
+
+def create_provider(config):
+    """
+    Construire le fournisseur SMS_PROVIDER et lui appliquer sa limite de débit
+    (SMS_RATE_LIMITS)
+
+    Sans SMS_PROVIDER : 'console' en développement et en test (DEBUG,
+    TESTING), 'twilio' sinon, comme l'envoi historique des routes.
+    """
+    name = config.get('SMS_PROVIDER') or ('console' if config.get('DEBUG') or config.get('TESTING') else 'twilio')
+    if name not in _provider_factories:
+        raise ValueError(f"Fournisseur SMS inconnu : {name}")
+    provider = _provider_factories[name](config)
+    rate = (config.get('SMS_RATE_LIMITS') or {}).get(name)
+    if rate is not None:
+        provider.rate_per_second = rate
+    return provider
+
+
 def send_sms(numero_telephone, message):
     """
-    Service d'envoi de SMS
+    Envoi synchrone d'un SMS par le fournisseur partagé du processus
+    
+    Les routes passent par la file (utils.sms_dispatch.queue_sms) ; cette
+    fonction attend la réponse de la passerelle.
     
     Args:
         numero_telephone (str): Numéro de téléphone destinataire
@@ -12,38 +177,11 @@ def send_sms(numero_telephone, message):
     Returns:
         bool: True si envoi réussi, False sinon
     """
-    
-    # Mode développement - simulation
-    if current_app.config.get('DEBUG', True):
-        print(f"📱 SMS SIMULÉ à {numero_telephone}: {message}")
-        return True
-    
-    # Mode production - Twilio
+    from utils.sms_dispatch import get_sms_dispatcher
+
     try:
-        from twilio.rest import Client
-        
-        # Configuration Twilio
-        account_sid = current_app.config.get('TWILIO_ACCOUNT_SID')
-        auth_token = current_app.config.get('TWILIO_AUTH_TOKEN')
-        twilio_number = current_app.config.get('TWILIO_PHONE_NUMBER')
-        
-        if not all([account_sid, auth_token, twilio_number]):
-            current_app.logger.error("Configuration Twilio incomplète")
-            return False
-        
-        # Initialiser le client Twilio
-        client = Client(account_sid, auth_token)
-        
-        # Envoyer le SMS
-        message = client.messages.create(
-            body=message,
-            from_=twilio_number,
-            to=numero_telephone
-        )
-        
-        current_app.logger.info(f"SMS envoyé avec succès. SID: {message.sid}")
+        get_sms_dispatcher().provider.send(numero_telephone, message)
         return True
-        
     except Exception as e:
         current_app.logger.error(f"Erreur envoi SMS: {str(e)}")
         return False
@@ -0,0 +1,130 @@
+import threading
+from contextlib import contextmanager
+
+import sqlalchemy as sa
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from utils import metrics
+
+# Pragmas appliqués à chaque connexion SQLite du pool d'écriture
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',       # les lecteurs ne bloquent plus l'écrivain (et inversement)
+    'synchronous': 'NORMAL',     # fsync au checkpoint et non à chaque commit (sûr en WAL)
+    'busy_timeout': 5000,        # millisecondes d'attente du verrou d'écriture avant erreur
+    'cache_size': -65536,        # en Kio (négatif) : 64 Mio de cache de pages par connexion
+    'mmap_size': 268435456,      # 256 Mio lus par mmap plutôt que par read()
+    'temp_store': 'MEMORY'
+}
+
+_lock = threading.Lock()
+_stats = {
+    'enabled': False,
+    'connections': 0,
+    'read_connections': 0,
+    'read_sessions': 0
+}
+_engines = {}
+
+
+def _bump(key):
+    with _lock:
+        _stats[key] += 1
+
+
+def _pragma_listener(pragmas, read_only=False):
+    """Écouteur 'connect' : appliquer les pragmas à la connexion DBAPI neuve"""
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+            if read_only:
+                # Une connexion du pool de lecture ne peut pas écrire, même par erreur
+                cursor.execute("PRAGMA query_only=ON")
+        finally:
+            cursor.close()
+        _bump('read_connections' if read_only else 'connections')
+    return on_connect
+
+
+def is_file_sqlite(url):
+    """Base SQLite sur fichier (le profil ne s'applique ni aux autres moteurs ni à :memory:)"""
+    url = sa.engine.make_url(url)
+    return url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:')
+
+
+def init_sqlite_profile(app, db):
+    """
+    Appliquer le profil SQLite de production au moteur de Flask-SQLAlchemy
+
+    À appeler juste après SQLAlchemy(app), avant la première connexion : les
+    pragmas (DEFAULT_PRAGMAS surchargés par SQLITE_PRAGMAS) sont posés par un
+    écouteur 'connect' sur chaque connexion du pool. Un second moteur, en
+    lecture seule (query_only), sert les lectures de résultats et de
+    statistiques (read_session) : en WAL, elles lisent un instantané validé
+    sans attendre les écritures de votes ni occuper le pool d'écriture.
+
+    Sans effet (lectures sur le moteur principal) si SQLITE_PROFILE est faux
+    ou si la base n'est pas un fichier SQLite.
+    """
+    with app.app_context():
+        engine = db.engine
+    if not app.config.get('SQLITE_PROFILE', True) or not is_file_sqlite(engine.url):
+        return
+
+    pragmas = {**DEFAULT_PRAGMAS, **app.config.get('SQLITE_PRAGMAS', {})}
+    event.listen(engine, 'connect', _pragma_listener(pragmas))
+
+    # journal_mode est persistant et réservé à l'écrivain : inutile sur les lecteurs
+    read_pragmas = {k: v for k, v in pragmas.items() if k != 'journal_mode'}
+    read_engine = sa.create_engine(
+        engine.url,
+        pool_size=app.config.get('SQLITE_READ_POOL_SIZE', 8),
+        max_overflow=app.config.get('SQLITE_READ_POOL_OVERFLOW', 8),
+        pool_pre_ping=False
+    )
+    event.listen(read_engine, 'connect', _pragma_listener(read_pragmas, read_only=True))
+
+    app.extensions['sqlite_read_engine'] = read_engine
+    _engines['write'], _engines['read'] = engine, read_engine
+    with _lock:
+        _stats['enabled'] = True
+        _stats['pragmas'] = pragmas
+
+
+def get_read_engine():
+    """Moteur des lectures : pool en lecture seule si le profil est actif, sinon le moteur principal"""
+    read_engine = current_app.extensions.get('sqlite_read_engine')
+    if read_engine is not None:
+        return read_engine
+    return current_app.extensions['sqlalchemy'].engine
+
+
+@contextmanager
+def read_session():
+    """
+    Session ORM courte sur le moteur de lecture (résultats, statistiques)
+
+    La session est fermée (connexion rendue au pool) à la sortie du bloc ;
+    les objets lus ne doivent pas en sortir, seulement des valeurs.
+    """
+    session = Session(bind=get_read_engine())
+    _bump('read_sessions')
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def stats():
+    """Pragmas effectifs et état des pools"""
+    with _lock:
+        result = dict(_stats)
+    for name, engine in _engines.items():
+        result[f'{name}_pool'] = engine.pool.status()
+    return result
+
+
+metrics.register('sqlite', stats)
@@ -0,0 +1,212 @@
+import threading
+from datetime import datetime
+
+from models import db, Candidat, Compteur, DecompteVotes, Electeur, Vote
+from utils import metrics, vote_histogram
+
+TOTAL_VOTES, TOTAL_ELECTEURS = 'votes', 'electeurs'
+
+# Valeur de référence de chaque compteur global, recalculée depuis les tables brutes
+COUNTER_SOURCES = {
+    TOTAL_VOTES: lambda: Vote.query.count(),
+    TOTAL_ELECTEURS: lambda: Electeur.query.count()
+}
+
+_lock = threading.Lock()
+_stats = {
+    'initialized_rows': 0,
+    'reconciliations': 0,
+    'last_reconciliation': None,
+    'last_mismatches': 0
+}
+
+
+def _bump(key, delta=1):
+    with _lock:
+        _stats[key] += delta
+
+
+def _raw_candidate_counts():
+    """Votes par candidat comptés sur la table votes (parcours complet)"""
+    rows = db.session.query(Vote.id_candidat, db.func.count(Vote.id)).group_by(Vote.id_candidat).all()
+    return dict(rows)
+
+
+def ensure_tally():
+    """
+    Créer les lignes de décompte manquantes à partir des tables brutes
+
+    À appeler au démarrage (et après l'ajout de candidats) ; ne modifie pas
+    les lignes existantes. La transaction est validée par l'appelant.
+
+    Returns:
+        int: Nombre de lignes créées
+    """
+    created = 0
+    existing = {row.id_candidat for row in DecompteVotes.query.all()}
+    missing = [c.id for c in Candidat.query.all() if c.id not in existing]
+    if missing:
+        raw = _raw_candidate_counts()
+        for candidat_id in missing:
+            db.session.add(DecompteVotes(id_candidat=candidat_id, votes=raw.get(candidat_id, 0)))
+            created += 1
+
+    existing = {row.nom for row in Compteur.query.all()}
+    for name, source in COUNTER_SOURCES.items():
+        if name not in existing:
+            db.session.add(Compteur(nom=name, valeur=source()))
+            created += 1
+
+    # Histogramme par minute et par heure des votes déjà enregistrés
+    created += vote_histogram.ensure()
+
+    if created:
+        _bump('initialized_rows', created)
+    return created
+
+
+def increment_counter(name, delta=1, source=None):
+    """
+    Incrémenter un compteur global dans la transaction en cours
+
+    L'UPDATE est atomique (valeur = valeur + delta) ; un compteur absent est
+    initialisé depuis sa table de référence, qui contient déjà la ligne ajoutée.
+
+    Args:
+        source (callable): Valeur de référence d'un compteur hors COUNTER_SOURCES
+    """
+    updated = db.session.execute(
+        db.update(Compteur)
+        .where(Compteur.nom == name)
+        .values(valeur=Compteur.valeur + delta, date_maj=datetime.utcnow())
+    ).rowcount
+    if not updated:
+        db.session.flush()
+        db.session.add(Compteur(nom=name, valeur=(source or COUNTER_SOURCES[name])()))
+        _bump('initialized_rows')
+
+
+def record_vote(candidat_id, heure_vote=None):
+    """
+    Comptabiliser un vote dans la transaction de submit_vote
+
+    Le vote doit déjà être ajouté à la session : le décompte et le vote sont
+    validés (ou annulés) ensemble.
+    """
+    record_votes({candidat_id: 1}, heure_vote)
+
+
+def record_votes(counts, heure_vote=None):
+    """
+    Comptabiliser un lot de votes (écriture groupée) dans la transaction en cours
+
+    Args:
+        counts (dict): Nombre de votes par identifiant de candidat, votes déjà
+            ajoutés à la session
+        heure_vote (datetime): Horodatage des votes (histogramme), maintenant par défaut
+    """
+    for candidat_id, count in counts.items():
+        updated = db.session.execute(
+            db.update(DecompteVotes)
+            .where(DecompteVotes.id_candidat == candidat_id)
+            .values(votes=DecompteVotes.votes + count, date_maj=datetime.utcnow())
+        ).rowcount
+        if not updated:
+            db.session.flush()
+            raw = Vote.query.filter_by(id_candidat=candidat_id).count()
+            db.session.add(DecompteVotes(id_candidat=candidat_id, votes=raw))
+            _bump('initialized_rows')
+    total = sum(counts.values())
+    if total:
+        increment_counter(TOTAL_VOTES, total)
+        vote_histogram.record(total, heure_vote or datetime.utcnow())
+
+
+def read_results(session=None):
+    """
+    Lire les résultats depuis le décompte matérialisé (une ligne par candidat)
+
+    Args:
+        session: Session de lecture (sqlite_profile.read_session), db.session par défaut
+
+    Returns:
+        tuple: (liste de (id, nom, parti, votes), total des votes, total des électeurs)
+    """
+    session = session or db.session
+    rows = session.query(
+        Candidat.id,
+        Candidat.nom,
+        Candidat.parti,
+        DecompteVotes.votes
+    ).outerjoin(DecompteVotes, Candidat.id == DecompteVotes.id_candidat).all()
+    counters = dict(session.query(Compteur.nom, Compteur.valeur).all())
+
+    # Base existante ou nouveau candidat : initialiser une fois depuis les votes bruts
+    # (écriture toujours par db.session, la session de lecture peut être en lecture seule)
+    if any(row.votes is None for row in rows) or any(name not in counters for name in COUNTER_SOURCES):
+        ensure_tally()
+        db.session.commit()
+        session.rollback()
+        return read_results(session)
+
+    return (
+        [(row.id, row.nom, row.parti, row.votes) for row in rows],
+        counters[TOTAL_VOTES],
+        counters[TOTAL_ELECTEURS]
+    )
+
+
+def reconcile(fix=False):
+    """
+    Comparer le décompte matérialisé aux tables brutes
+
+    Args:
+        fix (bool): Corriger les écarts trouvés (et valider la transaction)
+
+    Returns:
+        dict: Écarts par candidat, par compteur et par granularité d'histogramme ({'decompte', 'reel'})
+    """
+    ensure_tally()
+
+    raw = _raw_candidate_counts()
+    candidates = []
+    for row in DecompteVotes.query.all():
+        actual = raw.get(row.id_candidat, 0)
+        if row.votes != actual:
+            candidates.append({'id_candidat': row.id_candidat, 'decompte': row.votes, 'reel': actual})
+            if fix:
+                row.votes = actual
+                row.date_maj = datetime.utcnow()
+
+    counters = []
+    for row in Compteur.query.filter(Compteur.nom.in_(COUNTER_SOURCES)).all():
+        actual = COUNTER_SOURCES[row.nom]()
+        if row.valeur != actual:
+            counters.append({'nom': row.nom, 'decompte': row.valeur, 'reel': actual})
+            if fix:
+                row.valeur = actual
+                row.date_maj = datetime.utcnow()
+
+    histogram = vote_histogram.check()
+    if histogram and fix:
+        vote_histogram.rebuild()
+
+    if fix:
+        db.session.commit()
+    else:
+        db.session.rollback()
+
+    with _lock:
+        _stats['reconciliations'] += 1
+        _stats['last_reconciliation'] = datetime.utcnow().isoformat()
+        _stats['last_mismatches'] = len(candidates) + len(counters) + len(histogram)
+
+    return {'candidats': candidates, 'compteurs': counters, 'histogramme': histogram, 'corrige': fix}
+
+
+def stats():
+    with _lock:
+        return dict(_stats)
+
+
+metrics.register('vote_tally', stats)
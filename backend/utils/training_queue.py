@@ -0,0 +1,222 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from models import db, TrainingJob
+from utils import metrics
+
+PENDING, RUNNING, DONE, FAILED = 'en_attente', 'en_cours', 'termine', 'echoue'
+
+
+class QueueFullError(Exception):
+    """File d'entraînement saturée : la requête doit être réessayée plus tard"""
+
+
+class TrainingQueue:
+    """
+    File persistante des entraînements de modèles faciaux.
+
+    Les tâches sont des lignes de la table training_jobs : elles survivent aux
+    redémarrages et peuvent être exécutées par n'importe quel processus. Une
+    tâche est réservée par un UPDATE conditionnel (statut en_attente -> en_cours),
+    et une tâche en_cours depuis plus de `job_timeout` secondes (processus
+    arrêté en cours d'entraînement) est remise en attente.
+    """
+
+    def __init__(self, app, handler, workers=2, max_pending=500, job_timeout=600, poll_interval=1.0):
+        self.app = app
+        self.handler = handler
+        self.workers = workers
+        self.max_pending = max_pending
+        self.job_timeout = job_timeout
+        self.poll_interval = poll_interval
+
+        self._wakeup = threading.Condition()
+        self._threads = []
+        self._stopped = False
+
+        self._lock = threading.Lock()
+        self.enqueued = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+        self.recovered = 0
+        self._wait_time_total = 0.0
+        self._run_time_total = 0.0
+
+    def start(self):
+        """Démarrer les threads de traitement"""
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f'training-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        """Arrêter les threads après la tâche en cours"""
+        with self._wakeup:
+            self._stopped = True
+            self._wakeup.notify_all()
+
+    # --- Production ---
+
+    def pending_count(self):
+        return TrainingJob.query.filter_by(statut=PENDING).count()
+
+    def active_job(self, electeur_id):
+        """Tâche en attente ou en cours pour un électeur, s'il y en a une"""
+        return TrainingJob.query.filter(
+            TrainingJob.id_electeur == electeur_id,
+            TrainingJob.statut.in_([PENDING, RUNNING])
+        ).first()
+
+    def check_capacity(self):
+        """Lever QueueFullError si la file a atteint sa profondeur maximale"""
+        if self.pending_count() >= self.max_pending:
+            with self._lock:
+                self.rejected += 1
+            raise QueueFullError(f"File d'entraînement pleine ({self.max_pending} tâches en attente)")
+
+    def enqueue(self, electeur_id, images=0):
+        """
+        Ajouter une tâche d'entraînement (dans la session de la requête)
+
+        Returns:
+            TrainingJob: Tâche créée
+        """
+        self.check_capacity()
+        job = TrainingJob(id_electeur=electeur_id, statut=PENDING, images=images)
+        db.session.add(job)
+        db.session.commit()
+
+        with self._lock:
+            self.enqueued += 1
+        with self._wakeup:
+            self._wakeup.notify()
+        return job
+
+    # --- Consommation ---
+
+    def _recover_stale(self):
+        """Remettre en attente les tâches abandonnées par un processus arrêté"""
+        deadline = datetime.utcnow() - timedelta(seconds=self.job_timeout)
+        count = TrainingJob.query.filter(
+            TrainingJob.statut == RUNNING,
+            TrainingJob.date_debut < deadline
+        ).update({'statut': PENDING}, synchronize_session=False)
+        db.session.commit()
+        if count:
+            with self._lock:
+                self.recovered += count
+
+    def _claim(self):
+        """Réserver la plus ancienne tâche en attente"""
+        while True:
+            job = TrainingJob.query.filter_by(statut=PENDING).order_by(TrainingJob.id).first()
+            if job is None:
+                return None
+            claimed = TrainingJob.query.filter_by(id=job.id, statut=PENDING).update({
+                'statut': RUNNING,
+                'date_debut': datetime.utcnow(),
+                'tentatives': TrainingJob.tentatives + 1
+            }, synchronize_session=False)
+            db.session.commit()
+            if claimed:
+                return db.session.get(TrainingJob, job.id)
+            # Réservée entre-temps par un autre worker : essayer la suivante
+
+    def _run(self, job):
+        wait = (job.date_debut - job.date_creation).total_seconds() if job.date_creation else 0.0
+        start = time.perf_counter()
+        try:
+            success, message = self.handler(job.id_electeur)
+        except Exception as e:
+            db.session.rollback()
+            success, message = False, f"Erreur lors de l'entraînement: {str(e)}"
+        elapsed = time.perf_counter() - start
+
+        # Le handler a modifié l'électeur dans la session : même commit que le statut
+        job.statut = DONE if success else FAILED
+        job.message = message
+        job.date_fin = datetime.utcnow()
+        db.session.commit()
+
+        with self._lock:
+            if success:
+                self.completed += 1
+            else:
+                self.failed += 1
+            self._wait_time_total += wait
+            self._run_time_total += elapsed
+
+    def _worker(self):
+        last_recovery = 0.0
+        while not self._stopped:
+            job = None
+            try:
+                with self.app.app_context():
+                    if time.monotonic() - last_recovery > self.job_timeout / 2:
+                        self._recover_stale()
+                        last_recovery = time.monotonic()
+                    job = self._claim()
+                    if job is not None:
+                        self._run(job)
+            except Exception as e:
+                self.app.logger.error(f"Erreur file d'entraînement: {e}")
+
+            if job is None:
+                with self._wakeup:
+                    if not self._stopped:
+                        self._wakeup.wait(self.poll_interval)
+
+    def stats(self):
+        """Profondeur de la file (base de données) et compteurs du processus"""
+        depth = dict(db.session.query(TrainingJob.statut, db.func.count(TrainingJob.id)).group_by(TrainingJob.statut).all())
+        with self._lock:
+            finished = self.completed + self.failed
+            return {
+                'workers': self.workers,
+                'max_pending': self.max_pending,
+                'pending': depth.get(PENDING, 0),
+                'running': depth.get(RUNNING, 0),
+                'done': depth.get(DONE, 0),
+                'failed': depth.get(FAILED, 0),
+                'enqueued': self.enqueued,
+                'rejected': self.rejected,
+                'recovered': self.recovered,
+                'avg_wait_time_ms': round(self._wait_time_total / finished * 1000, 3) if finished else None,
+                'avg_run_time_ms': round(self._run_time_total / finished * 1000, 3) if finished else None
+            }
+
+
+_handler = None
+_training_queue = None
+_training_queue_lock = threading.Lock()
+
+
+def register_training_handler(handler):
+    """Déclarer la fonction d'entraînement : electeur_id -> (succès, message)"""
+    global _handler
+    _handler = handler
+
+
+def get_training_queue():
+    """Obtenir la file d'entraînement du processus (démarre les workers au premier appel)"""
+    global _training_queue
+    if _training_queue is None:
+        with _training_queue_lock:
+            if _training_queue is None:
+                queue = TrainingQueue(
+                    current_app._get_current_object(),
+                    _handler,
+                    workers=current_app.config.get('FACE_TRAINING_WORKERS', 2),
+                    max_pending=current_app.config.get('FACE_TRAINING_QUEUE_MAX', 500),
+                    job_timeout=current_app.config.get('FACE_TRAINING_JOB_TIMEOUT', 600)
+                )
+                queue.start()
+                _training_queue = queue
+    return _training_queue
+
+
+metrics.register('training_queue', lambda: _training_queue.stats() if _training_queue is not None else {'workers': 0})
@@ -0,0 +1,183 @@
+import re
+import threading
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.exc import IntegrityError
+
+from models import db, HistogrammeVotes, Vote
+from utils import metrics
+
+# Tranches stockées (granularité -> durée en secondes)
+MINUTE, HEURE = 'minute', 'heure'
+BUCKETS = {MINUTE: 60, HEURE: 3600}
+
+EPOCH = datetime(1970, 1, 1)
+_DURATION = re.compile(r'^(\d+)([mhd])$')
+_UNITS = {'m': 60, 'h': 3600, 'd': 86400}
+
+_lock = threading.Lock()
+_stats = {
+    'rebuilds': 0,
+    'reads': 0,
+    'rows_read': 0
+}
+
+
+def _bump(key, delta=1):
+    with _lock:
+        _stats[key] += delta
+
+
+def bucket_start(moment, seconds):
+    """Début de la tranche de `seconds` secondes contenant `moment` (alignée sur l'époque UTC)"""
+    elapsed = int((moment - EPOCH).total_seconds())
+    return EPOCH + timedelta(seconds=elapsed - elapsed % seconds)
+
+
+def parse_duration(text):
+    """
+    Durée d'une fenêtre ou d'une granularité : '15m', '1h', '7d'
+
+    Returns:
+        int: Durée en secondes
+
+    Raises:
+        ValueError: Format invalide ou durée nulle
+    """
+    match = _DURATION.match(str(text).strip())
+    if not match or int(match.group(1)) == 0:
+        raise ValueError(f"Durée invalide : {text!r} (attendu par ex. 15m, 1h, 7d)")
+    return int(match.group(1)) * _UNITS[match.group(2)]
+
+
+def _increment(granularite, debut, count):
+    updated = db.session.execute(
+        db.update(HistogrammeVotes)
+        .where(HistogrammeVotes.granularite == granularite, HistogrammeVotes.debut == debut)
+        .values(votes=HistogrammeVotes.votes + count)
+    ).rowcount
+    if updated:
+        return
+    # Première écriture de la tranche : un INSERT concurrent peut gagner (PostgreSQL),
+    # le point de sauvegarde isole l'échec sans annuler le vote
+    try:
+        with db.session.begin_nested():
+            db.session.execute(db.insert(HistogrammeVotes).values(granularite=granularite, debut=debut, votes=count))
+    except IntegrityError:
+        db.session.execute(
+            db.update(HistogrammeVotes)
+            .where(HistogrammeVotes.granularite == granularite, HistogrammeVotes.debut == debut)
+            .values(votes=HistogrammeVotes.votes + count)
+        )
+
+
+def record(count, heure_vote):
+    """
+    Comptabiliser `count` votes émis à `heure_vote` dans la transaction en cours
+
+    Un UPDATE par granularité stockée (INSERT à la première écriture de la tranche).
+    """
+    for granularite, seconds in BUCKETS.items():
+        _increment(granularite, bucket_start(heure_vote, seconds), count)
+
+
+def rebuild():
+    """
+    Recalculer toutes les tranches depuis la table votes (transaction validée par l'appelant)
+
+    Returns:
+        int: Nombre de tranches écrites
+    """
+    counts = Counter()
+    for (heure_vote,) in db.session.query(Vote.heure_vote).filter(Vote.heure_vote.isnot(None)).yield_per(10000):
+        for granularite, seconds in BUCKETS.items():
+            counts[(granularite, bucket_start(heure_vote, seconds))] += 1
+
+    db.session.execute(db.delete(HistogrammeVotes))
+    if counts:
+        db.session.execute(db.insert(HistogrammeVotes), [
+            {'granularite': granularite, 'debut': debut, 'votes': votes}
+            for (granularite, debut), votes in counts.items()
+        ])
+    _bump('rebuilds')
+    return len(counts)
+
+
+def ensure():
+    """Construire l'histogramme d'une base existante (votes présents, aucune tranche)"""
+    if db.session.query(HistogrammeVotes.granularite).first() is None and db.session.query(Vote.id).first() is not None:
+        return rebuild()
+    return 0
+
+
+def check():
+    """
+    Comparer le total de chaque granularité au nombre de votes horodatés
+
+    Returns:
+        list: Écarts {'granularite', 'decompte', 'reel'}
+    """
+    actual = db.session.query(Vote).filter(Vote.heure_vote.isnot(None)).count()
+    totals = dict(
+        db.session.query(HistogrammeVotes.granularite, db.func.sum(HistogrammeVotes.votes))
+        .group_by(HistogrammeVotes.granularite).all()
+    )
+    return [{'granularite': granularite, 'decompte': totals.get(granularite) or 0, 'reel': actual}
+            for granularite in BUCKETS if (totals.get(granularite) or 0) != actual]
+
+
+def read(window, granularity, end=None, session=None, max_rows=10080):
+    """
+    Votes par tranche sur une fenêtre se terminant à `end`, toutes tranches comprises (zéros inclus)
+
+    La granularité demandée est agrégée depuis la tranche stockée la plus
+    grossière qui la divise (heure si multiple d'une heure, sinon minute) :
+    la lecture est une plage de clé primaire d'au plus `max_rows` lignes,
+    indépendante du nombre de votes.
+
+    Args:
+        window (int): Durée de la fenêtre en secondes
+        granularity (int): Durée d'une tranche en secondes (multiple de 60)
+        end (datetime): Fin de la fenêtre (UTC, maintenant par défaut)
+        session: Session de lecture (sqlite_profile.read_session), db.session par défaut
+        max_rows (int): Nombre maximal de tranches stockées lues
+
+    Returns:
+        list: [{'debut': datetime, 'votes': int}] dans l'ordre chronologique
+
+    Raises:
+        ValueError: Granularité non multiple de la minute ou fenêtre trop longue
+    """
+    if granularity <= 0 or granularity % BUCKETS[MINUTE]:
+        raise ValueError("La granularité doit être un multiple de la minute")
+    base = HEURE if granularity % BUCKETS[HEURE] == 0 else MINUTE
+    buckets = max(1, -(-window // granularity))
+    if buckets * granularity // BUCKETS[base] > max_rows:
+        raise ValueError(f"Fenêtre trop longue pour cette granularité (plus de {max_rows} tranches)")
+
+    if end is not None and end.tzinfo is not None:
+        end = end.astimezone(timezone.utc).replace(tzinfo=None)
+    session = session or db.session
+    stop = bucket_start(end or datetime.utcnow(), granularity) + timedelta(seconds=granularity)
+    start = stop - timedelta(seconds=buckets * granularity)
+    rows = session.query(HistogrammeVotes.debut, HistogrammeVotes.votes).filter(
+        HistogrammeVotes.granularite == base,
+        HistogrammeVotes.debut >= start,
+        HistogrammeVotes.debut < stop
+    ).all()
+
+    totals = [0] * buckets
+    for debut, votes in rows:
+        totals[int((debut - start).total_seconds()) // granularity] += votes
+    _bump('reads')
+    _bump('rows_read', len(rows))
+    return [{'debut': start + timedelta(seconds=i * granularity), 'votes': votes} for i, votes in enumerate(totals)]
+
+
+def stats():
+    with _lock:
+        return dict(_stats)
+
+
+metrics.register('vote_histogram', stats)
@@ -0,0 +1,187 @@
+import queue
+import threading
+import time
+
+from flask import current_app
+
+from models import db
+from utils import ballot, metrics
+
+
+class VoteWriterTimeout(Exception):
+    """Le lot contenant le vote n'a pas été validé dans le délai imparti"""
+
+
+class _Intent:
+    """Vote en attente d'écriture : la requête attend `done` puis lit `result`"""
+
+    __slots__ = ('electeur_id', 'candidat_id', 'submitted_at', 'done', 'result')
+
+    def __init__(self, electeur_id, candidat_id):
+        self.electeur_id = electeur_id
+        self.candidat_id = candidat_id
+        self.submitted_at = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+
+
+class VoteWriter:
+    """
+    Écriture groupée des votes (group commit).
+
+    Les requêtes déposent leur vote dans une file ; un thread dédié les
+    regroupe en lots (au plus `batch_max` votes, ou ce qui est arrivé
+    `batch_window` secondes après le premier) et valide chaque lot en une
+    transaction (ballot.cast_votes). Sous forte charge, un seul fsync et un
+    seul verrou d'écriture SQLite couvrent des dizaines de votes.
+
+    Une requête ne reçoit sa réponse qu'après le commit de son lot : un vote
+    acquitté est durable. File pleine : le vote est écrit directement par la
+    requête (ballot.cast_vote).
+    """
+
+    def __init__(self, app, batch_max=200, batch_window=0.005, max_pending=10000, timeout=10.0):
+        self.app = app
+        self.batch_max = batch_max
+        self.batch_window = batch_window
+        self.timeout = timeout
+
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        self._stopped = False
+
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.votes = 0
+        self.max_batch = 0
+        self.overflows = 0
+        self.batch_errors = 0
+        self.timeouts = 0
+        self._commit_time_total = 0.0
+        self._wait_time_total = 0.0
+
+    def start(self):
+        """Démarrer le thread d'écriture"""
+        self._thread = threading.Thread(target=self._run, name='vote-writer', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Arrêter le thread après avoir écrit les votes déjà en file"""
+        self._stopped = True
+        if self._thread is not None:
+            self._thread.join()
+
+    def submit(self, electeur_id, candidat_id):
+        """
+        Voter via le thread d'écriture et attendre le commit du lot
+
+        Returns:
+            tuple: (issue VOTE_*, dict du vote ou None), comme ballot.cast_vote
+        """
+        intent = _Intent(electeur_id, candidat_id)
+        try:
+            self._queue.put_nowait(intent)
+        except queue.Full:
+            with self._lock:
+                self.overflows += 1
+            return ballot.cast_vote(electeur_id, candidat_id)
+
+        if not intent.done.wait(self.timeout):
+            with self._lock:
+                self.timeouts += 1
+            raise VoteWriterTimeout(f"Vote non validé après {self.timeout}s")
+        if isinstance(intent.result, Exception):
+            raise intent.result
+        return intent.result
+
+    def _collect(self):
+        """Attendre un premier vote puis compléter le lot jusqu'à batch_max ou la fin de la fenêtre"""
+        try:
+            batch = [self._queue.get(timeout=0.1)]
+        except queue.Empty:
+            return []
+        deadline = time.perf_counter() + self.batch_window
+        while len(batch) < self.batch_max:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        start = time.perf_counter()
+        try:
+            with self.app.app_context():
+                try:
+                    results = ballot.cast_votes([(i.electeur_id, i.candidat_id) for i in batch])
+                except Exception:
+                    db.session.rollback()
+                    raise
+                finally:
+                    db.session.remove()
+        except Exception as e:
+            self.app.logger.error(f"Erreur écriture groupée des votes: {e}")
+            with self._lock:
+                self.batch_errors += 1
+            results = [e] * len(batch)
+        committed = time.perf_counter()
+
+        for intent, result in zip(batch, results):
+            intent.result = result
+            intent.done.set()
+
+        with self._lock:
+            self.batches += 1
+            self.votes += len(batch)
+            self.max_batch = max(self.max_batch, len(batch))
+            self._commit_time_total += committed - start
+            self._wait_time_total += sum(committed - i.submitted_at for i in batch)
+
+    def _run(self):
+        while not (self._stopped and self._queue.empty()):
+            batch = self._collect()
+            if batch:
+                self._write(batch)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'batch_max': self.batch_max,
+                'batch_window_ms': self.batch_window * 1000,
+                'pending': self._queue.qsize(),
+                'batches': self.batches,
+                'votes': self.votes,
+                'avg_batch_size': round(self.votes / self.batches, 2) if self.batches else None,
+                'max_batch_size': self.max_batch,
+                'avg_commit_time_ms': round(self._commit_time_total / self.batches * 1000, 3) if self.batches else None,
+                'avg_ack_latency_ms': round(self._wait_time_total / self.votes * 1000, 3) if self.votes else None,
+                'overflows': self.overflows,
+                'batch_errors': self.batch_errors,
+                'timeouts': self.timeouts
+            }
+
+
+_vote_writer = None
+_vote_writer_lock = threading.Lock()
+
+
+def get_vote_writer():
+    """Obtenir le thread d'écriture groupée du processus (démarré au premier appel)"""
+    global _vote_writer
+    if _vote_writer is None:
+        with _vote_writer_lock:
+            if _vote_writer is None:
+                writer = VoteWriter(
+                    current_app._get_current_object(),
+                    batch_max=current_app.config.get('VOTE_BATCH_MAX', 200),
+                    batch_window=current_app.config.get('VOTE_BATCH_WINDOW', 0.005),
+                    max_pending=current_app.config.get('VOTE_WRITER_QUEUE_MAX', 10000),
+                    timeout=current_app.config.get('VOTE_WRITER_TIMEOUT', 10.0)
+                )
+                writer.start()
+                _vote_writer = writer
+    return _vote_writer
+
+
+metrics.register('vote_writer', lambda: _vote_writer.stats() if _vote_writer is not None else {'batches': 0})
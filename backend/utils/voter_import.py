@@ -0,0 +1,228 @@
+import csv
+import io
+import json
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy.exc import IntegrityError
+
+from models import db, Electeur
+from utils import metrics, tally
+from utils.sms_service import format_phone_number, validate_phone_number
+
+FIELDS = ('identifiant_electeur', 'identifiant_aadhar', 'numero_telephone')
+FORMATS = ('csv', 'ndjson')
+
+# Motifs de rejet d'une ligne
+REJECT_MALFORMED = 'ligne_illisible'
+REJECT_MISSING = 'champ_manquant'
+REJECT_PHONE = 'telephone_invalide'
+REJECT_DUPLICATE_ELECTEUR = 'identifiant_electeur_existant'
+REJECT_DUPLICATE_AADHAR = 'identifiant_aadhar_existant'
+
+_lock = threading.Lock()
+_stats = {
+    'imports': 0,
+    'rows_read': 0,
+    'rows_imported': 0,
+    'rows_rejected': 0
+}
+
+
+def _bump(key, delta=1):
+    with _lock:
+        _stats[key] += delta
+
+
+def detect_format(filename, default='csv'):
+    """Format d'après l'extension : .ndjson / .jsonl -> ndjson, sinon `default`"""
+    lowered = (filename or '').lower()
+    if lowered.endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    if lowered.endswith('.csv'):
+        return 'csv'
+    return default
+
+
+def iter_records(stream, fmt):
+    """
+    Lire un flux texte ligne à ligne
+
+    Yields:
+        tuple: (numéro de ligne, dict des champs ou None si la ligne est illisible)
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+    elif fmt == 'ndjson':
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                yield line_number, None
+                continue
+            yield line_number, record if isinstance(record, dict) else None
+    else:
+        raise ValueError(f"Format inconnu : {fmt} (attendu : {', '.join(FORMATS)})")
+
+
+def text_stream(binary, encoding='utf-8'):
+    """Flux texte sur un flux binaire (fichier ouvert en 'rb', request.stream)"""
+    return io.TextIOWrapper(binary, encoding=encoding, newline='')
+
+
+class VoterImporter:
+    """
+    Import en masse d'une liste électorale (CSV ou NDJSON) dans electeurs.
+
+    Les identifiants existants sont chargés une fois dans deux ensembles ; le
+    flux est traité par paquets de `chunk_size` lignes : normalisation et
+    validation du téléphone (sms_service), rejet des doublons (base et
+    fichier) par recherche dans les ensembles, puis un INSERT multi-lignes
+    (executemany) et l'incrément du compteur global 'electeurs' dans la même
+    transaction. Un paquet en conflit avec une inscription concurrente est
+    rejoué sans les lignes devenues doublons.
+    """
+
+    def __init__(self, chunk_size=5000, max_rejects=10000, progress=None):
+        self.chunk_size = chunk_size
+        self.max_rejects = max_rejects
+        self.progress = progress  # fonction(rapport) appelée après chaque paquet
+
+        self._electeurs = set()
+        self._aadhars = set()
+
+    def _load_existing(self):
+        query = db.session.query(Electeur.identifiant_electeur, Electeur.identifiant_aadhar)
+        for identifiant_electeur, identifiant_aadhar in query.yield_per(50000):
+            self._electeurs.add(identifiant_electeur)
+            self._aadhars.add(identifiant_aadhar)
+
+    def _reject(self, report, line_number, reason, record=None):
+        report['rejetes'] += 1
+        report['motifs'][reason] = report['motifs'].get(reason, 0) + 1
+        if len(report['rejets']) < self.max_rejects:
+            identifiant = record.get('identifiant_electeur') if isinstance(record, dict) else None
+            report['rejets'].append({'ligne': line_number, 'motif': reason, 'identifiant_electeur': identifiant})
+
+    def _validate(self, chunk, report):
+        """Lignes à insérer du paquet ; les autres sont rejetées"""
+        rows = []
+        for line_number, record in chunk:
+            if record is None:
+                self._reject(report, line_number, REJECT_MALFORMED)
+                continue
+            values = {field: str(record.get(field) or '').strip() for field in FIELDS}
+            if not all(values.values()):
+                self._reject(report, line_number, REJECT_MISSING, record)
+                continue
+            if not validate_phone_number(values['numero_telephone']):
+                self._reject(report, line_number, REJECT_PHONE, record)
+                continue
+            if values['identifiant_electeur'] in self._electeurs:
+                self._reject(report, line_number, REJECT_DUPLICATE_ELECTEUR, record)
+                continue
+            if values['identifiant_aadhar'] in self._aadhars:
+                self._reject(report, line_number, REJECT_DUPLICATE_AADHAR, record)
+                continue
+            values['numero_telephone'] = format_phone_number(values['numero_telephone'])
+            self._electeurs.add(values['identifiant_electeur'])
+            self._aadhars.add(values['identifiant_aadhar'])
+            rows.append((line_number, values))
+        return rows
+
+    def _insert(self, rows, report):
+        now = datetime.utcnow()
+        while rows:
+            try:
+                db.session.execute(db.insert(Electeur), [
+                    {**values, 'a_vote': False, 'modele_facial_entraine': False, 'date_inscription': now}
+                    for _, values in rows
+                ])
+                tally.increment_counter(tally.TOTAL_ELECTEURS, len(rows))
+                db.session.commit()
+                report['importes'] += len(rows)
+                return
+            except IntegrityError:
+                # Inscriptions concurrentes (/register) : écarter les lignes désormais en double
+                db.session.rollback()
+                taken_electeurs = {value for (value,) in db.session.query(Electeur.identifiant_electeur).filter(
+                    Electeur.identifiant_electeur.in_([values['identifiant_electeur'] for _, values in rows]))}
+                taken_aadhars = {value for (value,) in db.session.query(Electeur.identifiant_aadhar).filter(
+                    Electeur.identifiant_aadhar.in_([values['identifiant_aadhar'] for _, values in rows]))}
+                if not taken_electeurs and not taken_aadhars:
+                    raise
+                kept = []
+                for line_number, values in rows:
+                    if values['identifiant_electeur'] in taken_electeurs:
+                        self._reject(report, line_number, REJECT_DUPLICATE_ELECTEUR, values)
+                    elif values['identifiant_aadhar'] in taken_aadhars:
+                        self._reject(report, line_number, REJECT_DUPLICATE_AADHAR, values)
+                    else:
+                        kept.append((line_number, values))
+                rows = kept
+
+    def run(self, records):
+        """
+        Importer des enregistrements (iter_records)
+
+        Returns:
+            dict: {'lus', 'importes', 'rejetes', 'motifs', 'rejets' (au plus
+                max_rejects : ligne, motif, identifiant_electeur), 'duree'}
+        """
+        start = time.perf_counter()
+        report = {'lus': 0, 'importes': 0, 'rejetes': 0, 'motifs': {}, 'rejets': [], 'duree': 0.0}
+        self._load_existing()
+
+        chunk = []
+        for item in records:
+            chunk.append(item)
+            if len(chunk) >= self.chunk_size:
+                self._process(chunk, report, start)
+                chunk = []
+        if chunk:
+            self._process(chunk, report, start)
+
+        report['duree'] = round(time.perf_counter() - start, 3)
+        _bump('imports')
+        _bump('rows_read', report['lus'])
+        _bump('rows_imported', report['importes'])
+        _bump('rows_rejected', report['rejetes'])
+        return report
+
+    def _process(self, chunk, report, start):
+        report['lus'] += len(chunk)
+        self._insert(self._validate(chunk, report), report)
+        report['duree'] = round(time.perf_counter() - start, 3)
+        if self.progress is not None:
+            self.progress(report)
+
+
+def import_voters(stream, fmt, chunk_size=5000, max_rejects=10000, progress=None):
+    """
+    Importer une liste électorale depuis un flux texte
+
+    Args:
+        stream: Flux texte (fichier, text_stream(request.stream))
+        fmt (str): 'csv' (en-tête identifiant_electeur,identifiant_aadhar,numero_telephone) ou 'ndjson'
+        chunk_size (int): Lignes par INSERT / transaction
+        max_rejects (int): Rejets détaillés conservés dans le rapport
+        progress (callable): Appelée avec le rapport après chaque paquet
+
+    Returns:
+        dict: Rapport (VoterImporter.run)
+    """
+    importer = VoterImporter(chunk_size=chunk_size, max_rejects=max_rejects, progress=progress)
+    return importer.run(iter_records(stream, fmt))
+
+
+def stats():
+    with _lock:
+        return dict(_stats)
+
+
+metrics.register('voter_import', stats)
@@ -448,8 +448,9 @@ function completeLoginFlow(sessionToken) {
             document.getElementById('startRecognition').style.display = 'none';
             document.getElementById('proceedToVote').style.display = 'inline-flex';
             
-            // Stockage du jeton final et nettoyage
-            localStorage.setItem('auth_bearer_token', sessionToken);
+            // Stockage du jeton final (signé, trois étapes validées) et nettoyage
+            localStorage.setItem('session_token', data.session_token);
+            localStorage.setItem('auth_bearer_token', data.session_token);
             localStorage.removeItem('login_phone_number');
 
             // --- AJOUT ICI ---
@@ -477,21 +477,22 @@ async function startFaceCapture() {
         canvas.width = video.videoWidth;
         canvas.height = video.videoHeight;
         canvas.getContext('2d').drawImage(video, 0, 0);
-        const imageBase64 = canvas.toDataURL('image/jpeg').split(',')[1];
+        // JPEG binaire : pas d'encodage base64 (-33 % de volume)
+        const imageBlob = await new Promise(resolve => canvas.toBlob(resolve, 'image/jpeg'));
 
         try {
             // CORRECTION : On appelle la nouvelle route de test pour chaque image
             const detectResponse = await fetch('http://127.0.0.1:5000/api/face/detect-single', {
                 method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ image: imageBase64 })
+                headers: { 'Content-Type': 'image/jpeg' },
+                body: imageBlob
             });
             const detectionResult = await detectResponse.json();
 
             if (detectionResult.detected) {
                 // Succès ! Le visage est détecté
                 video.style.border = '3px solid #28a745'; // Bordure verte
-                validImages.push(imageBase64); // On sauvegarde l'image valide
+                validImages.push(imageBlob); // On sauvegarde l'image valide
 
                 // Mise à jour de la progression
                 const progress = (validImages.length / maxCaptures) * 100;
@@ -526,14 +527,28 @@ async function startFaceCapture() {
     // Si on a nos 10 images, on les envoie pour l'entraînement final
     captureText.textContent = 'Toutes les photos sont valides. Envoi pour entraînement...';
     try {
+        const formData = new FormData();
+        formData.append('electeur_id', electeurId);
+        validImages.forEach((blob, i) => formData.append('images', blob, `capture_${i + 1}.jpg`));
+
         const trainResponse = await fetch('http://127.0.0.1:5000/api/face/capture', {
             method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ electeur_id: electeurId, images: validImages })
+            body: formData
         });
         const trainResult = await trainResponse.json();
         if (!trainResponse.ok) throw new Error(trainResult.error);
 
+        // L'entraînement est asynchrone : suivre la tâche jusqu'à sa fin
+        captureText.textContent = 'Photos enregistrées. Entraînement du modèle...';
+        let job = { statut: 'en_attente' };
+        while (job.statut === 'en_attente' || job.statut === 'en_cours') {
+            await new Promise(resolve => setTimeout(resolve, 1000));
+            const jobResponse = await fetch(`http://127.0.0.1:5000${trainResult.status_url}`);
+            job = await jobResponse.json();
+            if (!jobResponse.ok) throw new Error(job.error);
+        }
+        if (job.statut !== 'termine') throw new Error(job.message || "L'entraînement a échoué.");
+
         window.VoteSecure.hideLoading(startBtn);
         startBtn.style.display = 'none';
         completeBtn.style.display = 'inline-flex';
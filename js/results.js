@@ -49,14 +49,7 @@ async function loadResultsData() {
             throw new Error("Le format des données de résultats est invalide.");
         }
 
-        resultsData = data.results.map(item => ({
-            id: item.id,
-            name: item.candidat,
-            party: item.parti,
-            votes: item.votes,
-            percentage: item.pourcentage,
-            photo: '', // Photo statique pour l'exemple
-        }));
+        resultsData = data.results.map(mapResult);
         console.log('Données des résultats chargées:', resultsData);
 
     } catch (error) {
@@ -365,9 +358,51 @@ async function loadLiveStatsFromServer() {
     console.log('Statistiques en direct chargées et interface mise à jour');
 }
 
+function mapResult(item) {
+    return {
+        id: item.id,
+        name: item.candidat,
+        party: item.parti,
+        votes: item.votes,
+        percentage: item.pourcentage,
+        photo: '',
+    };
+}
+
+function applyResultsDelta(delta) {
+    // Le serveur n'envoie que les candidats dont les votes ou le pourcentage ont changé
+    const removed = new Set(delta.removed || []);
+    const byId = new Map(resultsData.filter(c => !removed.has(c.id)).map(c => [c.id, c]));
+    (delta.results || []).forEach(item => byId.set(item.id, mapResult(item)));
+    resultsData = Array.from(byId.values()).sort((a, b) => b.votes - a.votes);
+}
+
+function refreshLiveView() {
+    updateChartsData();
+    populateResultsTable();
+    updateStatistics();
+    updateLastUpdateTime();
+}
+
 function startLiveUpdates() {
-    // Rafraîchir toutes les 30 secondes pour un effet plus "direct"
-    liveUpdateInterval = setInterval(loadLiveStatsFromServer, 30000); 
+    if (typeof EventSource === 'undefined') {
+        // Navigateur sans SSE : rafraîchir toutes les 30 secondes
+        liveUpdateInterval = setInterval(loadLiveStatsFromServer, 30000);
+        return;
+    }
+
+    // Flux SSE : instantané à la connexion, puis deltas calculés une fois par tick côté serveur
+    const source = new EventSource('http://localhost:5000/api/vote/results/stream');
+    source.addEventListener('snapshot', (event) => {
+        resultsData = JSON.parse(event.data).results.map(mapResult);
+        refreshLiveView();
+    });
+    source.addEventListener('delta', (event) => {
+        applyResultsDelta(JSON.parse(event.data));
+        refreshLiveView();
+    });
+    // En cas de coupure, EventSource se reconnecte et reçoit un nouvel instantané
+    source.onerror = () => console.warn('Flux des résultats interrompu, reconnexion...');
 }
 
 function updateChartsData() {